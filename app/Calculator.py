@@ -4,21 +4,37 @@
 # @github: github.com/Syncriix
 
 # Builtins
-import sys
-import os
 import platform
+import threading
+import time
 
 import tkinter as tk
 from tkinter import Menu, FALSE
 
 from functools import partial
-from json import load as json_load
-from json import dump as json_dump
-
-from copy import deepcopy
+from json import dumps as json_dumps
 
 # Local
-from .calc import Calc
+from .compiler import FUNCTIONS
+from .engine import Engine
+from .input_model import InputBuffer, NUMBER, NAME, OPERATOR, OPEN, CLOSE, RESULT, ERROR, OPERATOR_CHARS
+from .plot_window import PlotWindow
+from .settings import load as load_settings
+from .profiling import dump as dump_stats
+
+# Abstand, in dem das Ergebnis einer laufenden Berechnung abgefragt wird.
+POLL_INTERVAL_MS = 15
+
+# Bindtag, über den alle Schaltflächen des Layouts dieselbe Ereignisbehandlung teilen.
+# Klassenbindungen gelten im ganzen Tk-Interpreter, jedes Fenster hängt deshalb seinen Pfad an.
+KEY_TAG = 'CalculatorKey'
+
+# Tastenkombination, die die Messung einschaltet und den Menüeintrag "Diagnostics" zeigt.
+DIAGNOSTICS_SHORTCUT = '<Control-Shift-D>'
+
+# Bits der Umschalt- und Strg-Taste in event.state
+SHIFT_MASK = 0x1
+CONTROL_MASK = 0x4
 
 
 class Calculator:
@@ -34,15 +50,55 @@ class Calculator:
         . | 0 | = | /
           |   | ^ | √
 
+        Die Anordnung wird in ``app/settings/layout.json`` festgelegt.
+
         HINWEIS: Es ist notwendig, das im View-Paket enthaltene Style-Modul zu importieren, 
         zu importieren und eine seiner Style-Klassen auszuwählen.
     """
 
-    def __init__(self, master):
+    # Aktionen, die eine Schaltfläche im Layout auslösen kann, und die zugehörige Methode.
+    _ACTIONS = {
+        'value': '_set_values_in_input',
+        'operator': '_set_operator_in_input',
+        'dot': '_set_dot_in_input',
+        'open': '_set_open_parent',
+        'close': '_set_close_parent',
+        'delete': '_del_last_value_in_input',
+        'clear': '_clear_input',
+        'result': '_get_data_in_input',
+    }
+
+    def __init__(self, master, engine=None):
         self.master = master
-        self.calc = Calc()
 
-        self.settings = self._load_settings()
+        # Rechenkern, Arbeitsprozess und Verlauf teilen sich alle Fenster eines Prozesses.
+        self.engine = engine or Engine(self._load_settings())
+        self.engine.windows.append(self)
+        self.settings = self.engine.settings
+        self.layout = self.engine.layout
+        self._themes = self.engine.themes
+        self.calc = self.engine.calc
+
+        # Auswertung außerhalb der Tk-Ereignisschleife, siehe _get_data_in_input
+        self._worker = self.engine.worker
+        self._job = None
+        self._eval_timeout = self.settings['evaluation']['timeout']
+        self._eval_started = None
+        self._poll_id = None
+        self._styled_buttons = []
+
+        self._history = self.engine.history
+        self._history_trail = None
+        self._history_draft = None
+        self._pending_expr = None
+
+        # Messung (siehe app.profiling), standardmäßig aus
+        self._diagnostics = self.settings['diagnostics']
+        self._diagnostics_window = None
+        self._diagnostics_shown = False
+
+        # Funktionsgraph, wird erst über das Menü geöffnet
+        self._plot_window = None
 
         # Legt den Standardstil für macOS fest, wenn es als Betriebssystem verwendet wird
         if platform.system() == 'Darwin':
@@ -53,8 +109,11 @@ class Calculator:
         # Top-Level-Ausgabe
         self.master.title('Malia Calculator')
         self.master.minsize(width=680, height=415)
-        self.master.geometry('-150+100')
+        # Weitere Fenster leicht versetzt, damit sie sich nicht genau überdecken.
+        offset = 30 * (len(self.engine.windows) - 1)
+        self.master.geometry(f'-{150 + offset}+{100 + offset}')
         self.master.resizable(True, True)
+        self.master.protocol('WM_DELETE_WINDOW', self._close_window)
         self.master['bg'] = self.theme['master_bg']
 
         # Eingabebereich
@@ -67,8 +126,8 @@ class Calculator:
         self._frame_buttons = tk.Frame(self.master, bg=self.theme['frame_bg'])
         self._frame_buttons.pack(
             side="top", padx=20, pady=20, fill=tk.BOTH, expand=True)
-        self._frame_buttons.rowconfigure(tuple(range(6)), weight=1)
-        self._frame_buttons.columnconfigure(tuple(range(8)), weight=1)
+        self._frame_buttons.rowconfigure(tuple(range(self.layout['rows'])), weight=1)
+        self._frame_buttons.columnconfigure(tuple(range(self.layout['columns'])), weight=1)
 
         # Start-up-Funktionen
         self._create_input(self._frame_input)
@@ -77,28 +136,28 @@ class Calculator:
 
     @staticmethod
     def _load_settings():
-        """Dienstprogramm zum Laden der Rechner-Konfigurationsdatei."""
-        with open('./app/settings/settings.json', mode='r', encoding='utf-8') as f:
-            settings = json_load(f)
-
-        return settings
+        """Lädt Einstellungen, Layout und die vorberechneten Themen, siehe :mod:`app.settings`."""
+        return load_settings()
 
     def _get_theme(self, name='Dark'):
-        """Gibt die Stileinstellungen für das angegebene Thema zurück."""
-
-        list_of_themes = self.settings['themes']
-
-        found_theme = None
-        for t in list_of_themes:
-            if name == t['name']:
-                found_theme = deepcopy(t)
-                break
+        """Gibt die (unveränderlichen) Stileinstellungen für das angegebene Thema zurück."""
+        return self._themes.get(name)
 
-        return found_theme
+    def _button(self, master, text, style):
+        """Erstellt eine Schaltfläche im angegebenen Stil und merkt sie sich für Themenwechsel."""
+        button = tk.Button(master, text=text, cnf=self.theme[style])
+        self._styled_buttons.append((button, style))
+        return button
 
     def _create_input(self, master):
+        # Das Eingabefeld dient nur zur Anzeige, der Inhalt wird im Eingabemodell geführt.
+        self._input = InputBuffer(max_length=self.settings['input']['max_length'])
         self._entry = tk.Entry(master, cnf=self.theme['INPUT'])
-        self._entry.insert(0, 0)
+        self._entry.insert(0, self._input.text)
+        self._entry.bind('<Key>', self._on_entry_key)
+        # Einfügen aus Menüs oder mit der mittleren Maustaste; Strg+V kommt über _on_entry_key.
+        self._entry.bind('<<Paste>>', self._on_paste)
+        self._entry.bind('<<PasteSelection>>', partial(self._on_paste, selection=True))
         self._entry.pack(ipadx=20, fill=tk.X, expand=True)
 
     def _create_menu(self, master):
@@ -108,8 +167,29 @@ class Calculator:
 
         # Konfiguration
         config = Menu(calc_menu)
+        # Das Themen-Menü wird erst beim ersten Öffnen befüllt.
         theme = Menu(config)
-        # Themen Menu
+        theme['postcommand'] = partial(self._fill_theme_menu, theme)
+        # Konfiguration
+        calc_menu.add_cascade(label='Konfiguration', menu=config)
+        config.add_cascade(label='Theme', menu=theme)
+        config.add_command(label='Funktionsgraph', command=self._show_plot)
+        config.add_command(label='Neues Fenster', command=self._new_window)
+
+        config.add_separator()
+        config.add_command(label='Beenden', command=self._exit)
+
+        # Der Eintrag "Diagnostics" ist versteckt, bis die Messung eingeschaltet wird.
+        self._config_menu = config
+        self.master.bind(DIAGNOSTICS_SHORTCUT, self._enable_diagnostics)
+        if self.calc.profiler is not None:
+            self._enable_diagnostics()
+
+    def _fill_theme_menu(self, theme):
+        """Befüllt das Themen-Menü beim ersten Öffnen."""
+        if theme.index('end') is not None:
+            return
+
         incompitables_theme = ['Default Theme For MacOS']
         for t in self.settings['themes']:
 
@@ -119,370 +199,501 @@ class Calculator:
             else:
                 theme.add_command(label=name, command=partial(
                     self._change_theme_to, name))
-        # Konfiguration
-        calc_menu.add_cascade(label='Konfiguration', menu=config)
-        config.add_cascade(label='Theme', menu=theme)
 
-        config.add_separator()
-        config.add_command(label='Beenden', command=self._exit)
+    def _enable_diagnostics(self, event=None):
+        """Schaltet die Messung ein, zeigt den Menüeintrag und startet die regelmäßige Ausgabe."""
+        if self._diagnostics_shown:
+            return
+
+        self._diagnostics_shown = True
+        self.calc.enable_profiling()
+        # Nach "Theme", vor dem Trennstrich
+        self._config_menu.insert_command(1, label='Diagnostics', command=self._show_diagnostics)
+        if self._diagnostics['dump_path']:
+            self.master.after(int(self._diagnostics['dump_interval'] * 1000), self._dump_diagnostics)
+
+    def _diagnostics_stats(self):
+        stats = self.calc.stats()
+        stats['evaluation'] = 'inline' if self._worker is None else 'worker'
+        return stats
+
+    def _dump_diagnostics(self):
+        """Schreibt die Messwerte regelmäßig im Hintergrund in ``diagnostics.dump_path``."""
+        snapshot = self._diagnostics_stats()
+        threading.Thread(target=dump_stats, args=(snapshot, self._diagnostics['dump_path']),
+                         name='dump-diagnostics').start()
+        self.master.after(int(self._diagnostics['dump_interval'] * 1000), self._dump_diagnostics)
+
+    def _show_diagnostics(self):
+        """Zeigt die Messwerte in einem eigenen Fenster an, das sich jede Sekunde aktualisiert."""
+        if self._diagnostics_window is not None:
+            self._diagnostics_window.lift()
+            return
+
+        window = tk.Toplevel(self.master)
+        window.title('Diagnostics')
+        text = tk.Text(window, width=60, height=30, cnf=self.theme['INPUT'])
+        text.pack(fill=tk.BOTH, expand=True)
+        tk.Button(window, text='Zurücksetzen', command=self.calc.profiler.reset).pack(fill=tk.X)
+
+        def refresh():
+            if self._diagnostics_window is None:
+                return
+            text.delete('1.0', tk.END)
+            text.insert('1.0', json_dumps(self._diagnostics_stats(), indent=4))
+            window.after(1000, refresh)
+
+        def close():
+            self._diagnostics_window = None
+            window.destroy()
+
+        window.protocol('WM_DELETE_WINDOW', close)
+        self._diagnostics_window = window
+        refresh()
+
+    def _show_plot(self):
+        """Öffnet das Fenster mit dem Funktionsgraphen oder holt es in den Vordergrund."""
+        if self._plot_window is not None and self._plot_window.window.winfo_exists():
+            self._plot_window.lift()
+            return
+
+        plot = self.settings['plot']
+        self._plot_window = PlotWindow(self.master, self.calc, self.theme, expr=plot['expression'],
+                                       x_range=plot['range'], frame_budget=plot['frame_budget_ms'] / 1000)
+
+    def _measure_keypress(self):
+        """Misst die Zeit vom Tastendruck bis nach dem Neuzeichnen der Anzeige."""
+        profiler = self.calc.profiler
+        # Das Neuzeichnen ist selbst eine Leerlaufaufgabe; erst in der folgenden Runde ist es erledigt.
+        self.master.after_idle(self.master.after_idle, self._record_keypress, profiler, time.perf_counter())
+
+    @staticmethod
+    def _record_keypress(profiler, started):
+        profiler.add('keypress', time.perf_counter() - started)
 
     def _change_theme_to(self, name='Dark'):
+        """Wendet das Thema auf alle Widgets aller Fenster an, ohne die Anwendung neu zu starten."""
         self.settings['current_theme'] = name
+        # Unter macOS bleibt wie beim Start immer das Standardthema aktiv.
+        if platform.system() != 'Darwin':
+            for window in self.engine.windows:
+                window._apply_theme(name)
+        self._save_settings()
+
+    def _apply_theme(self, name):
+        """Konfiguriert alle Widgets mit den vorberechneten Stilen des Themas um."""
+        self.theme = self._get_theme(name)
 
-        with open('./app/settings/settings.json', 'w') as outfile:
-            json_dump(self.settings, outfile, indent=4)
+        self.master['bg'] = self.theme['master_bg']
+        self._frame_input['bg'] = self.theme['frame_bg']
+        self._frame_buttons['bg'] = self.theme['frame_bg']
+        self._entry.config(cnf=self.theme['INPUT'])
 
-        self._realod_app()
+        for button, style in self._styled_buttons:
+            button.config(cnf=self.theme[style])
+
+    def _save_settings(self):
+        """Speichert die Einstellungen im Hintergrund, siehe :meth:`app.engine.Engine.save_settings`."""
+        self.engine.save_settings()
 
     def _create_buttons(self, master):
-        """"Methode, die für die Erstellung aller Schaltflächen des Taschenrechners verantwortlich ist,
-        vom Hinzufügen von Ereignissen zu den einzelnen Schaltflächen bis hin zu ihrer Verteilung auf dem Rasterlayout.
+        """"Methode, die für die Erstellung aller Schaltflächen des Taschenrechners verantwortlich ist.
+
+        Die Schaltflächen werden aus der Layout-Tabelle (``layout.json``) erstellt. Jeder Eintrag
+        legt Beschriftung, Position, Stil, Aktion und das einzufügende Token fest. Alle Schaltflächen
+        teilen sich eine einzige Ereignisbindung, siehe ``_on_keypress``.
+
+        Die wissenschaftlichen Schaltflächen (Panel ``scientific``) werden erst erstellt, nachdem das
+        Fenster zum ersten Mal gezeichnet wurde.
         """
+        self._keys = {}
+        self._panels = set()
+        self._key_tag = f'{KEY_TAG}{self.master}'
+        master.bind_class(self._key_tag, '<ButtonRelease-1>', self._on_keypress)
+
+        self._create_panel(master, 'basic')
+        self.master.after_idle(self.master.after, 0, self._create_panel, master, 'scientific')
+
+    def _create_panel(self, master, panel):
+        """Erstellt alle Schaltflächen eines Panels aus der Layout-Tabelle und verteilt sie im Grid."""
+        for key in self.layout['buttons']:
+            if key.get('panel', 'basic') != panel:
+                continue
+
+            button = self._button(master, key['label'], key['style'])
+            button.grid(row=key['row'], column=key['column'], padx=1, pady=1, sticky="news")
+
+            # Leere Schaltflächen (Aktion "none") für die zukünftige Implementierung bleiben ohne Ereignis.
+            action = self._ACTIONS.get(key['action'])
+            if action is not None:
+                self._keys[button] = (getattr(self, action), key.get('token'))
+                button.bindtags(button.bindtags() + (self._key_tag,))
 
-        # Globale Einstellungen (Breite, Höhe, Schriftart usw.) für die angegebene Schaltfläche festlegen.
-        self.theme['BTN_NUMBER'].update(self.settings['global'])
-
-        self._BTN_NUM_0 = tk.Button(
-            master, text=0, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_1 = tk.Button(
-            master, text=1, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_2 = tk.Button(
-            master, text=2, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_3 = tk.Button(
-            master, text=3, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_4 = tk.Button(
-            master, text=4, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_5 = tk.Button(
-            master, text=5, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_6 = tk.Button(
-            master, text=6, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_7 = tk.Button(
-            master, text=7, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_8 = tk.Button(
-            master, text=8, cnf=self.theme['BTN_NUMBER'])
-        self._BTN_NUM_9 = tk.Button(
-            master, text=9, cnf=self.theme['BTN_NUMBER'])
-
-        # Globale Einstellungen (Breite, Höhe, Schriftart usw.) für die angegebene Schaltfläche festlegen.
-        self.theme['BTN_OPERATOR'].update(self.settings['global'])
-
-        # Instanziierung der Schaltflächen der numerischen Operatoren
-        self._BTN_ADD = tk.Button(
-            master, text='+', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_SUB = tk.Button(
-            master, text='-', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_DIV = tk.Button(
-            master, text='/', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_MULT = tk.Button(
-            master, text='*', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_EXP = tk.Button(
-            master, text='^', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_SQR = tk.Button(
-            master, text='√', cnf=self.theme['BTN_OPERATOR'])
-
-        # Globale Einstellungen (Breite, Höhe, Schriftart usw.) für die angegebene Schaltfläche festlegen.
-        self.theme['BTN_DEFAULT'].update(self.settings['global'])
-        self.theme['BTN_CLEAR'].update(self.settings['global'])
-
-        # Installation der Funktionstasten des Rechners.
-        self._BTN_OPEN_PARENT = tk.Button(
-            master, text='(', cnf=self.theme['BTN_DEFAULT'])
-        self._BTN_CLOSE_PARENT = tk.Button(
-            master, text=')', cnf=self.theme['BTN_DEFAULT'])
-        self._BTN_CLEAR = tk.Button(
-            master, text='C', cnf=self.theme['BTN_DEFAULT'])
-        self._BTN_DEL = tk.Button(
-            master, text='<', cnf=self.theme['BTN_CLEAR'])
-        self._BTN_RESULT = tk.Button(
-            master, text='=', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_DOT = tk.Button(
-            master, text='.', cnf=self.theme['BTN_DEFAULT'])
-
-        # Installation der Wissenschaftlichen Funktionstasten des Rechners.
-        self._BTN_PI = tk.Button(
-            master, text='π', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_SIN = tk.Button(
-            master, text='sin', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_COS = tk.Button(
-            master, text='cos', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_TAN = tk.Button(
-            master, text='tan', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_2PI = tk.Button(
-            master, text='2π', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_COSH = tk.Button(
-            master, text='cosh', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_TANH = tk.Button(
-            master, text='tanh', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_SINH = tk.Button(
-            master, text='sinh', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_LOG = tk.Button(
-            master, text='log', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_INV = tk.Button(
-            master, text='inv', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_MOD = tk.Button(
-            master, text='mod', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_E = tk.Button(
-            master, text='e', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_LOG2 = tk.Button(
-            master, text='log2', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_DEG = tk.Button(
-            master, text='deg', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_ACOSH = tk.Button(
-            master, text='acosh', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_ASINH = tk.Button(
-            master, text='asinh', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_LOG10 = tk.Button(
-            master, text='log10', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_LOG1P = tk.Button(
-            master, text='log1p', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_EXPM1 = tk.Button(
-            master, text='expm1', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_LGAMMA = tk.Button(
-            master, text='lgamma', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_RAD = tk.Button(
-            master, text='rad', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_GAMMA = tk.Button(
-            master, text='gamma', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_ERF = tk.Button(
-            master, text='erf', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_ERFC = tk.Button(
-            master, text='erfc', cnf=self.theme['BTN_OPERATOR'])
-
-        # Instanziierung der leeren Schaltflächen, für die zukünftige Implementierung
-        self._BTN_EMPTY1 = tk.Button(
-            master, text='', cnf=self.theme['BTN_OPERATOR'])
-        self._BTN_EMPTY2 = tk.Button(
-            master, text='', cnf=self.theme['BTN_OPERATOR'])
-
-        # Verteilung von Schaltflächen in einem Grid-Layout-Manager
-        # Zeile 0
-        self._BTN_CLEAR.grid(row=0, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_OPEN_PARENT.grid(
-            row=0, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_CLOSE_PARENT.grid(
-            row=0, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_DEL.grid(row=0, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_PI.grid(row=0, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_SIN.grid(row=0, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_COS.grid(row=0, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_TAN.grid(row=0, column=7, padx=1, pady=1, sticky="news")
-
-        # Zeile 1
-        self._BTN_NUM_7.grid(row=1, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_8.grid(row=1, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_9.grid(row=1, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_MULT.grid(row=1, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_2PI.grid(row=1, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_COSH.grid(row=1, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_TANH.grid(row=1, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_SINH.grid(row=1, column=7, padx=1, pady=1, sticky="news")
-
-        # Zeile 2
-        self._BTN_NUM_4.grid(row=2, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_5.grid(row=2, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_6.grid(row=2, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_SUB.grid(row=2, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_LOG.grid(row=2, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_INV.grid(row=2, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_MOD.grid(row=2, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_E.grid(row=2, column=7, padx=1, pady=1, sticky="news")
-
-        # Zeile 3
-        self._BTN_NUM_1.grid(row=3, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_2.grid(row=3, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_3.grid(row=3, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_ADD.grid(row=3, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_RAD.grid(row=3, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_GAMMA.grid(row=3, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_ERF.grid(row=3, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_ERFC.grid(row=3, column=7, padx=1, pady=1, sticky="news")
-
-        # Zeile 4
-        self._BTN_DOT.grid(row=4, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_NUM_0.grid(row=4, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_RESULT.grid(row=4, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_DIV.grid(row=4, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_LOG2.grid(row=4, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_DEG.grid(row=4, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_ACOSH.grid(row=4, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_ASINH.grid(row=4, column=7, padx=1, pady=1, sticky="news")
-
-        # Zeile 5
-        self._BTN_EMPTY1.grid(row=5, column=0, padx=1, pady=1, sticky="news")
-        self._BTN_EMPTY2.grid(row=5, column=1, padx=1, pady=1, sticky="news")
-        self._BTN_EXP.grid(row=5, column=2, padx=1, pady=1, sticky="news")
-        self._BTN_SQR.grid(row=5, column=3, padx=1, pady=1, sticky="news")
-        self._BTN_LOG10.grid(row=5, column=4, padx=1, pady=1, sticky="news")
-        self._BTN_LOG1P.grid(row=5, column=5, padx=1, pady=1, sticky="news")
-        self._BTN_EXPM1.grid(row=5, column=6, padx=1, pady=1, sticky="news")
-        self._BTN_LGAMMA.grid(row=5, column=7, padx=1, pady=1, sticky="news")
-
-        # Anzahl Schaltflächen Ereignisse
-        self._BTN_NUM_0['command'] = partial(self._set_values_in_input, 0)
-        self._BTN_NUM_1['command'] = partial(self._set_values_in_input, 1)
-        self._BTN_NUM_2['command'] = partial(self._set_values_in_input, 2)
-        self._BTN_NUM_3['command'] = partial(self._set_values_in_input, 3)
-        self._BTN_NUM_4['command'] = partial(self._set_values_in_input, 4)
-        self._BTN_NUM_5['command'] = partial(self._set_values_in_input, 5)
-        self._BTN_NUM_6['command'] = partial(self._set_values_in_input, 6)
-        self._BTN_NUM_7['command'] = partial(self._set_values_in_input, 7)
-        self._BTN_NUM_8['command'] = partial(self._set_values_in_input, 8)
-        self._BTN_NUM_9['command'] = partial(self._set_values_in_input, 9)
-
-        # Ereignisse der mathematischen Operationstasten
-        self._BTN_ADD['command'] = partial(self._set_operator_in_input, '+')
-        self._BTN_SUB['command'] = partial(self._set_operator_in_input, '-')
-        self._BTN_MULT['command'] = partial(self._set_operator_in_input, '*')
-        self._BTN_DIV['command'] = partial(self._set_operator_in_input, '/')
-        self._BTN_EXP['command'] = partial(self._set_operator_in_input, '**')
-        self._BTN_SQR['command'] = partial(
-            self._set_operator_in_input, '**(1/2)')
-
-        # Ergebnis der Wissenschaftlichen Funktionstasten.
-
-        self._BTN_PI['command'] = partial(self._set_values_in_input, 'pi')
-        self._BTN_SIN['command'] = partial(self._set_values_in_input, 'sin')
-        self._BTN_COS['command'] = partial(self._set_values_in_input, 'cos')
-        self._BTN_TAN['command'] = partial(self._set_values_in_input, 'tan')
-        self._BTN_2PI['command'] = partial(self._set_values_in_input, '2*pi')
-        self._BTN_COSH['command'] = partial(self._set_values_in_input, 'cosh')
-        self._BTN_TANH['command'] = partial(self._set_values_in_input, 'tanh')
-        self._BTN_SINH['command'] = partial(self._set_values_in_input, 'sinh')
-        self._BTN_LOG['command'] = partial(self._set_values_in_input, 'log')
-        self._BTN_INV['command'] = partial(self._set_values_in_input, '1/')
-        self._BTN_MOD['command'] = partial(self._set_values_in_input, '%')
-        self._BTN_E['command'] = partial(self._set_values_in_input, 'e')
-        self._BTN_LOG2['command'] = partial(self._set_values_in_input, 'log2')
-        self._BTN_DEG['command'] = partial(
-            self._set_values_in_input, 'degrees')
-        self._BTN_ACOSH['command'] = partial(
-            self._set_values_in_input, 'acosh')
-        self._BTN_ASINH['command'] = partial(
-            self._set_values_in_input, 'asinh')
-        self._BTN_LOG10['command'] = partial(
-            self._set_values_in_input, 'log10')
-        self._BTN_LOG1P['command'] = partial(
-            self._set_values_in_input, 'log1p')
-        self._BTN_EXPM1['command'] = partial(
-            self._set_values_in_input, 'expm1')
-        self._BTN_LGAMMA['command'] = partial(
-            self._set_values_in_input, 'lgamma')
-        self._BTN_RAD['command'] = partial(
-            self._set_values_in_input, 'radians')
-        self._BTN_GAMMA['command'] = partial(
-            self._set_values_in_input, 'gamma')
-        self._BTN_ERF['command'] = partial(self._set_values_in_input, 'erf')
-        self._BTN_ERFC['command'] = partial(self._set_values_in_input, 'erfc')
-
-        # Ereignisse der Funktionstasten des Taschenrechners
-        self._BTN_DOT['command'] = partial(self._set_dot_in_input, '.')
-        self._BTN_OPEN_PARENT['command'] = self._set_open_parent
-        self._BTN_CLOSE_PARENT['command'] = self._set_close_parent
-        self._BTN_DEL['command'] = self._del_last_value_in_input
-        self._BTN_CLEAR['command'] = self._clear_input
-        self._BTN_RESULT['command'] = self._get_data_in_input
+        self._panels.add(panel)
+
+    def _on_keypress(self, event):
+        """Gemeinsame Ereignisbehandlung aller Schaltflächen des Layouts."""
+        button = event.widget
+
+        # Wie bei 'command' zählt nur ein Loslassen über der Schaltfläche.
+        if not (0 <= event.x < button.winfo_width() and 0 <= event.y < button.winfo_height()):
+            return
+
+        handler, token = self._keys[button]
+        # Während einer Berechnung ist nur 'C' (Abbrechen) erlaubt.
+        if self._is_busy() and handler != self._clear_input:
+            return
+        if self.calc.profiler is not None:
+            self._measure_keypress()
+        self._history_trail = None
+
+        if token is None:
+            handler()
+        else:
+            handler(token)
 
     def _set_values_in_input(self, value):
         """Methode, die für die Erfassung des angeklickten und in der Eingabe gesetzten numerischen Wertes verantwortlich ist"""
-        if self._entry.get() == 'Error':
-            self._entry.delete(0, len(self._entry.get()))
+        value = str(value)
+        kind = NUMBER if value.isdigit() else NAME
+
+        if self._input.is_error:
+            self._replace_input('', None)
 
-        if self._entry.get() == '0':
-            self._entry.delete(0)
-            self._entry.insert(0, value)
-        elif self._lenght_max(self._entry.get()):
-            self._entry.insert(len(self._entry.get()), value)
+        if self._input.is_zero:
+            self._replace_input(value, kind)
+        elif self._input.has_room():
+            self._append_to_input(value, kind)
 
     def _set_dot_in_input(self, dot):
         """Methode, die für das Setzen des Dezimaltrennzeichens im Wert zuständig ist"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error:
             return
 
-        if self._entry.get()[-1] not in '.+-/*' and self._lenght_max(self._entry.get()):
-            self._entry.insert(len(self._entry.get()), dot)
+        if self._input.last_char not in '.' + OPERATOR_CHARS and self._input.has_room():
+            self._append_to_input(dot, NUMBER)
 
     def _set_open_parent(self):
         """Methode zum Setzen der öffnenden Klammern in der Eingabe"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error:
             return
 
-        if self._entry.get() == '0':
-            self._entry.delete(0)
-            self._entry.insert(len(self._entry.get()), '(')
-        elif self._entry.get()[-1] in '+-/*' and self._lenght_max(self._entry.get()):
-            self._entry.insert(len(self._entry.get()), '(')
+        if self._input.is_zero:
+            self._replace_input('(', OPEN)
+        elif not self._input.has_room():
+            return
+        # Nach einem Operator, einer Klammer, einem Komma oder einem Funktionsnamen (z.B. sin) ist eine Klammer erlaubt.
+        elif self._input.last_char in OPERATOR_CHARS + '(,' or self._input.last_token in FUNCTIONS:
+            self._append_to_input('(', OPEN)
 
     def _set_close_parent(self):
         """Methode zum Setzen der schließenden Klammern in der Eingabe"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error:
             return
 
-        if self._entry.get().count('(') <= self._entry.get().count(')'):
+        if self._input.depth <= 0:
             return
-        if self._entry.get()[-1] not in '+-/*(' and self._lenght_max(self._entry.get()):
-            self._entry.insert(len(self._entry.get()), ')')
+        if self._input.last_char not in OPERATOR_CHARS + '(,' and self._input.has_room():
+            self._append_to_input(')', CLOSE)
 
     def _clear_input(self):
-        """Setzt die Rechnereingabe zurück, löscht sie vollständig und gibt den Wert 0 ein."""
-        self._entry.delete(0, len(self._entry.get()))
-        self._entry.insert(0, 0)
+        """Setzt die Rechnereingabe zurück, löscht sie vollständig und gibt den Wert 0 ein.
+        Eine laufende Berechnung wird dabei abgebrochen."""
+        if self._is_busy():
+            self._worker.cancel(self._job)
+            self._finish_evaluation()
+        self._replace_input('0', NUMBER)
 
     def _del_last_value_in_input(self):
-        """Löscht die letzte Ziffer in der Eingabe"""
-        if self._entry.get() == 'Error':
+        """Löscht das letzte Token in der Eingabe, Funktionsnamen wie log10 als Ganzes."""
+        if self._input.is_error:
             return
 
-        if len(self._entry.get()) == 1:
-            self._entry.delete(0)
-            self._entry.insert(0, 0)
-        else:
-            self._entry.delete(len(self._entry.get()) - 1)
+        if self._input.length <= 1:
+            self._replace_input('0', NUMBER)
+            return
+
+        kind = self._input.last_kind
+        token = self._input.pop()
+        self._entry.delete(self._input.length, tk.END)
+
+        # Ergebnisse werden wie Zahlen zeichenweise gelöscht.
+        if kind == RESULT and len(token) > 1:
+            self._append_to_input(token[:-1], RESULT)
+        elif not self._input.length:
+            self._replace_input('0', NUMBER)
 
     def _set_operator_in_input(self, operator):
         """Methode, die für die Erfassung des angeklickten und in der Eingabe gesetzten mathematischen Operators zuständig ist"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error:
             return
 
-        if self._entry.get() == '':
+        if not self._input.length:
             # print('\33[91mUngültige Operation.\33[m'))
             return
         # Vermeiden von aufeinanderfolgenden Wiederholungen von Vorgängen, um Fehler zu vermeiden.
-        if self._entry.get()[-1] not in '+-*/' and self._lenght_max(self._entry.get()):
-            self._entry.insert(len(self._entry.get()), operator)
+        if self._input.last_char not in OPERATOR_CHARS and self._input.has_room():
+            self._append_to_input(operator, OPERATOR)
 
     def _get_data_in_input(self):
         """Nimmt die Daten mit allen in der Eingabe enthaltenen Operationen
         um die Berechnung durchzuführen"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error or self._is_busy():
+            return
+
+        expr = self._input.text
+        if self._worker is None:
+            result = self.calc.calculation(expr)
+        else:
+            # Bekannte Ergebnisse (auch aus dem Verlauf) kommen ohne Umweg über den Arbeitsprozess.
+            result = self.calc.cached(expr)
+
+        if result is not None:
+            self._remember(expr, result)
+            self._set_result_in_input(result=result)
             return
 
-        result = self.calc.calculation(self._entry.get())
+        # Die Berechnung läuft im Arbeitsprozess, das Ergebnis wird per 'after' abgeholt.
+        self._pending_expr = expr
+        self._job = self._worker.submit(expr)
+        self._eval_started = time.monotonic()
+        self.master.config(cursor='watch')
+        self.master.title('Malia Calculator - berechne . . .')
+        self._poll_id = self.master.after(POLL_INTERVAL_MS, self._poll_result)
+
+    def _poll_result(self):
+        """Holt das Ergebnis des Arbeitsprozesses ab, ohne die Oberfläche zu blockieren."""
+        self._poll_id = None
+        if not self._is_busy():
+            return
+
+        result = self._worker.poll(self._job)
+
+        if result is None and time.monotonic() - self._eval_started > self._eval_timeout:
+            # Zeitbudget überschritten
+            self._worker.cancel(self._job)
+            result = 'Error'
+
+        if result is None:
+            self._poll_id = self.master.after(POLL_INTERVAL_MS, self._poll_result)
+            return
+
+        if self.calc.profiler is not None:
+            # Im Arbeitsprozess wird nicht gemessen, erfasst wird die gesamte Wartezeit.
+            self.calc.profiler.add('worker', time.monotonic() - self._eval_started)
+        self._finish_evaluation()
+        self._remember(self._pending_expr, result)
         self._set_result_in_input(result=result)
 
+    def _remember(self, expr, result):
+        """Schreibt eine erfolgreiche Berechnung in den Verlauf und den Zwischenspeicher."""
+        if result == 'Error':
+            return
+
+        context = self.calc.context()
+        self.calc.seed([(context, expr, result)])
+        if self._history is not None:
+            self._history.append(expr, result, context)
+
+    def _browse_history(self, step):
+        """Blättert mit den Pfeiltasten im Verlauf (``step`` -1 älter, +1 neuer).
+
+        Wie in einer Shell dient die Eingabe beim ersten Blättern als Anfang, nach dem
+        gesucht wird. Beim Zurückblättern über den neuesten Treffer hinaus erscheint
+        wieder die ursprüngliche Eingabe.
+        """
+        if self._history is None:
+            return
+
+        if self._history_trail is None:
+            text = self._input.text
+            searching = not (self._input.is_zero or self._input.last_kind in (RESULT, ERROR))
+            self._history_trail = []
+            self._history_draft = (text, self._input.last_kind, text if searching else '')
+        prefix = self._history_draft[2]
+
+        if step < 0:
+            before = self._history_trail[-1] if self._history_trail else None
+            index = self._history.search(prefix, before=before)
+            # Gleiche Ausdrücke hintereinander werden übersprungen.
+            while index is not None and self._history[index].expr == self._input.text:
+                index = self._history.search(prefix, before=index)
+            if index is None:
+                return
+            self._history_trail.append(index)
+        elif not self._history_trail:
+            return
+        else:
+            self._history_trail.pop()
+            if not self._history_trail:
+                text, kind, _ = self._history_draft
+                self._replace_input(text, kind)
+                return
+            index = self._history_trail[-1]
+
+        self._replace_input(self._history[index].expr, RESULT)
+
+    def _finish_evaluation(self):
+        """Setzt die Anzeige nach einer Berechnung zurück."""
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._eval_started = None
+        self._job = None
+        self.master.config(cursor='')
+        self.master.title('Malia Calculator')
+
+    def _is_busy(self):
+        return self._eval_started is not None
+
     def _set_result_in_input(self, result=0):
         """Das Ergebnis der gesamten Operation in der Eingabe mit Pfeilen"""
-        if self._entry.get() == 'Error':
+        if self._input.is_error:
             return
 
-        self._entry.delete(0, len(self._entry.get()))
-        self._entry.insert(0, result)
+        result = str(result)
+        self._replace_input(result, ERROR if result == 'Error' else RESULT)
+
+    def _append_to_input(self, token, kind):
+        """Hängt ein Token an das Eingabemodell an und zeigt es im Eingabefeld an."""
+        self._input.append(token, kind)
+        self._entry.insert(tk.END, token)
+
+    def _replace_input(self, text, kind):
+        """Ersetzt die gesamte Eingabe im Modell und im Eingabefeld."""
+        self._input.reset(text, kind)
+        self._entry.delete(0, tk.END)
+        self._entry.insert(0, text)
+
+    def _on_entry_key(self, event):
+        """Leitet Tastatureingaben im Eingabefeld über dieselben Methoden wie die Schaltflächen,
+        damit das Eingabemodell und die Anzeige übereinstimmen."""
+        char = event.char
+        if self._is_busy() and event.keysym != 'Escape':
+            return 'break'
+        if self.calc.profiler is not None:
+            self._measure_keypress()
+
+        if event.keysym in ('Up', 'Down'):
+            self._browse_history(-1 if event.keysym == 'Up' else 1)
+            return 'break'
+        # Jede andere Taste beendet das Blättern im Verlauf.
+        self._history_trail = None
+
+        if event.keysym == 'BackSpace':
+            self._del_last_value_in_input()
+        elif event.keysym in ('Return', 'KP_Enter'):
+            self._get_data_in_input()
+        elif event.keysym == 'Escape':
+            self._clear_input()
+        elif _is_paste(event):
+            self._on_paste()
+        elif event.keysym in ('Left', 'Right', 'Home', 'End', 'Tab') or _is_copy(event):
+            return None
+        elif char and char.isprintable():
+            self._type_char(char)
+
+        return 'break'
+
+    def _on_paste(self, event=None, selection=False):
+        """Fügt die Zwischenablage (oder die Auswahl) Zeichen für Zeichen wie getippt ein."""
+        try:
+            text = self._entry.selection_get() if selection else self._entry.clipboard_get()
+        except tk.TclError:  # leere Zwischenablage
+            return 'break'
+        if not self._is_busy():
+            self._history_trail = None
+            for char in text:
+                self._type_char(char)
+        return 'break'
+
+    def _type_char(self, char):
+        """Ordnet ein getipptes oder eingefügtes Zeichen der passenden Eingabemethode zu.
+
+        Buchstaben bilden zusammen mit folgenden Ziffern einen Namen (``sin``, ``log10``),
+        ``^`` steht für ``**``. Zeichen ohne eigene Methode, z.B. das Komma in ``atan2(y, x)``,
+        werden unverändert übernommen; Leerzeichen haben im Ausdruck keine Bedeutung.
+        """
+        if char.isspace():
+            return
+        if (char.isalnum() or char == '_') and self._extend_name(char):
+            return
 
-    @staticmethod
-    def _lenght_max(data_in_input):
-        """Überprüfen, ob die Eingabe die maximale Anzahl von Zeichen erreicht hat"""
-        if len(str(data_in_input)) >= 15:
+        if char.isdigit() or char.isalpha() or char == '_':
+            self._set_values_in_input(char)
+        elif char in OPERATOR_CHARS:
+            self._type_operator(char)
+        elif char == '^':
+            self._set_operator_in_input('**')
+        elif char == '.':
+            self._set_dot_in_input(char)
+        elif char == '(':
+            self._set_open_parent()
+        elif char == ')':
+            self._set_close_parent()
+        else:
+            self._insert_text_in_input(char)
+
+    def _extend_name(self, char):
+        """Hängt ``char`` an einen getippten Namen an, damit er ein Token bleibt."""
+        if self._input.last_kind != NAME or not self._input.last_token.isidentifier():
             return False
+        if self._input.has_room():
+            self._input.append(self._input.pop() + char, NAME)
+            self._entry.insert(tk.END, char)
         return True
 
+    def _type_operator(self, char):
+        """Operator von der Tastatur; ``**`` und ``//`` entstehen durch zweimaliges Tippen."""
+        doubled = char in '*/' and self._input.last_kind == OPERATOR and self._input.last_token == char
+        if doubled and self._input.has_room():
+            self._input.append(self._input.pop() + char, OPERATOR)
+            self._entry.insert(tk.END, char)
+        else:
+            self._set_operator_in_input(char)
+
+    def _insert_text_in_input(self, text):
+        """Übernimmt Text ohne eigene Eingabemethode unverändert; Fehler meldet die Berechnung."""
+        if self._input.is_error or self._input.is_zero:
+            self._replace_input(text, NAME)
+        elif self._input.has_room():
+            self._append_to_input(text, NAME)
+
     def start(self):
         print('\33[92mCalculator Tk Started. . . .\33[m\n')
         self.master.mainloop()
 
-    @staticmethod
-    def _realod_app():
-        """Startet die Anwendung neu."""
-        python = sys.executable  # Ruft den Pfad der ausführbaren Python-Datei ab
-        os.execl(python, python, * sys.argv)
+    def _new_window(self):
+        """Öffnet ein weiteres Fenster, das denselben Rechenkern verwendet."""
+        # Am Hauptfenster, sonst würde es mit dem öffnenden Fenster ohne _close_window zerstört.
+        return Calculator(tk.Toplevel(self.master._root()), self.engine)
+
+    def _close_window(self):
+        """Schließt dieses Fenster; mit dem letzten Fenster endet die Anwendung."""
+        if self._is_busy():
+            self._worker.cancel(self._job)
+            self._finish_evaluation()
+        self.engine.windows.remove(self)
+        if not self.engine.windows:
+            self._exit()
+        elif isinstance(self.master, tk.Tk):
+            # Mit dem Hauptfenster würden auch alle anderen Fenster geschlossen.
+            self.master.withdraw()
+        else:
+            self.master.destroy()
 
     def _exit(self):
+        self.engine.close()
         exit()
+
+
+def _is_paste(event):
+    """Strg+V oder Umschalt+Einfg"""
+    if event.keysym in ('v', 'V'):
+        return bool(event.state & CONTROL_MASK)
+    return event.keysym == 'Insert' and bool(event.state & SHIFT_MASK)
+
+
+def _is_copy(event):
+    """Strg+C oder Strg+Einfg; Kopieren ändert die Eingabe nicht und bleibt dem Eingabefeld überlassen."""
+    return event.keysym in ('c', 'C', 'Insert') and bool(event.state & CONTROL_MASK)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
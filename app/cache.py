@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Begrenzter Zwischenspeicher, der bei Überlauf den am längsten nicht
+    verwendeten Eintrag verwirft und Treffer, Fehlschläge und Verdrängungen zählt.
+
+    Alle Methoden sind threadsicher.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Gibt den Wert zu ``key`` zurück und markiert ihn als zuletzt verwendet."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Speichert ``value`` unter ``key`` und verdrängt bei Bedarf den ältesten Eintrag."""
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Gibt die Zähler des Zwischenspeichers als Dictionary zurück."""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
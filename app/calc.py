@@ -3,34 +3,265 @@
 # @autor: Sebastian Rohner
 # @github: github.com/Syncriix
 
+# Builtins
+import threading
+from decimal import Decimal
+from fractions import Fraction
 
-import ast
-# skipcq: PY-W2000
-from math import pi, cos, sin, tan, acos, asin, atan, sqrt, log, log10, exp, factorial, pow, e, tau, inf, nan
+# Local
+from .cache import LRUCache
+from .compiler import compile_tree, parse, parse_tokens, tokenize
+from .cost import CostLimitError, CostLimits, analyze, to_float
+from .numeric import FLOAT, FRACTION, select_backend
+from .optimizer import optimize, to_source
+from .profiling import Profiler
+from .session import Session
+from .vectorize import evaluate_columns
 
 
 class Calc:
-    """Klasse, die für die Durchführung aller Berechnungen im Taschenrechner verantwortlich ist"""
+    """Klasse, die für die Durchführung aller Berechnungen im Taschenrechner verantwortlich ist
 
-    def calculation(self, calc):
+    Übersetzte Ausdrücke werden in einem LRU-Zwischenspeicher gehalten, die Ergebnisse
+    von Ausdrücken ohne Variablen in einem zweiten. ``cache_size`` begrenzt beide.
+
+    ``mode`` wählt das Zahlensystem (``float``, ``decimal``, ``fraction`` oder ``auto``),
+    ``precision`` die Anzahl signifikanter Stellen für ``decimal`` und ``auto``.
+    Beides kann bei jedem Aufruf von :meth:`calculation` überschrieben werden.
+
+    ``limits`` (:class:`app.cost.CostLimits`) begrenzt den Aufwand eines Ausdrucks. Ist
+    die Abschätzung zu hoch, wird näherungsweise mit float gerechnet oder abgelehnt;
+    der Grund des letzten Fehlers steht in ``last_error``.
+
+    Mit ``profiler`` (:class:`app.profiling.Profiler`) werden die Phasen jeder
+    Berechnung gemessen, siehe :meth:`stats`. Ohne Profiler entfällt die Messung.
+
+    Ein Objekt kann von mehreren Threads gleichzeitig verwendet werden (z.B. von
+    allen Fenstern eines Prozesses, siehe :class:`app.engine.Engine`): Die
+    Zwischenspeicher sind threadsicher, ``last_error`` gilt jeweils für den Thread.
+    """
+
+    def __init__(self, cache_size=256, mode='float', precision=None, limits=None, profiler=None):
+        self._parse_cache = LRUCache(cache_size)
+        self._result_cache = LRUCache(cache_size)
+        self.mode = mode
+        self.precision = precision
+        self.limits = limits or CostLimits()
+        self._local = threading.local()
+        self.profiler = profiler
+        select_backend(mode, precision)  # Prüft den Modus schon beim Erstellen.
+
+    @property
+    def last_error(self):
+        """Grund des letzten Fehlers in diesem Thread oder ``None``."""
+        return getattr(self._local, 'error', None)
+
+    @last_error.setter
+    def last_error(self, value):
+        self._local.error = value
+
+    def calculation(self, calc, mode=None, precision=None):
         """Verantwortlich für die Entgegennahme der auszuführenden Berechnung, Rückgabe
         des Ergebnisses oder einer Fehlermeldung im Falle eines Fehlers.
         """
-        return self.__calculation_validation(calc=calc)
+        backend, precision = self._backend(mode, precision)
+        key = (backend.name, precision, self._normalize(calc))
+        self.last_error = None
+        result = self._result_cache.get(key)
+        if result is None:
+            result = self.__calculation_validation(key=key, backend=backend)
+        return result
+
+    def cached(self, calc, mode=None, precision=None):
+        """Gibt das gespeicherte Ergebnis zurück, ohne zu rechnen, oder ``None``."""
+        backend, precision = self._backend(mode, precision)
+        return self._result_cache.get((backend.name, precision, self._normalize(calc)))
+
+    def context(self, mode=None, precision=None):
+        """Kennung des Zahlensystems, in dem ein Ergebnis gilt, z.B. ``float`` oder ``decimal:28``."""
+        backend, precision = self._backend(mode, precision)
+        return backend.name if precision is None else f'{backend.name}:{precision}'
+
+    def seed(self, entries):
+        """Füllt den Ergebnis-Zwischenspeicher mit (kontext, ausdruck, ergebnis)-Einträgen,
+        z.B. aus :class:`app.history.History`. Spätere Einträge gelten als zuletzt verwendet."""
+        for context, calc, result in entries:
+            name, _, precision = context.partition(':')
+            self._result_cache.put((name, int(precision) if precision else None, self._normalize(calc)), result)
+
+    def compile(self, calc, mode='float', precision=None):
+        """Gibt das übersetzte Programm für den Ausdruck zurück, aus dem Zwischenspeicher falls vorhanden."""
+        backend, precision = self._backend(mode, precision)
+        return self._compile((backend.name, precision, self._normalize(calc)), backend)
+
+    def _compile(self, key, backend):
+        program = self._parse_cache.get(key)
+        if program is None:
+            _, precision, source = key
+            with backend.context(precision):
+                program = self._build(source, backend, precision)
+            self._parse_cache.put(key, program)
+        return program
+
+    def _build(self, source, backend, precision):
+        """Übersetzt den Ausdruck, nachdem seine Kosten abgeschätzt wurden."""
+        profiler = self.profiler
+        if profiler is None:
+            return self._translate(parse(source, backend, precision), backend)
+
+        with profiler.timer('tokenize'):
+            tokens = tokenize(source, backend.number)
+        with profiler.timer('parse'):
+            tree = parse_tokens(tokens, backend, precision)
+        with profiler.timer('compile'):
+            program = self._translate(tree, backend)
+        profiler.count_folded(tree, program.tree)
+        return program
+
+    def _translate(self, tree, backend, values=None):
+        """Übersetzt den Syntaxbaum innerhalb der Kostengrenzen, notfalls näherungsweise mit float.
+
+        Die Kosten werden vor der Optimierung (:func:`app.optimizer.optimize`) geschätzt,
+        da diese konstante Teilausdrücke bereits ausrechnet. ``values`` enthält die
+        Werte der Variablen, falls sie schon bekannt sind (siehe :class:`app.session.Session`);
+        die Näherung muss dann mit deren float-Werten ausgeführt werden.
+        """
+        estimate = analyze(tree, self.limits, rational=backend is FRACTION, values=values,
+                           exact_pow=backend is not FLOAT)
+        if not estimate.exceeded:
+            return compile_tree(optimize(tree, backend), backend)
+
+        reasons = '; '.join(estimate.reasons)
+        if self.limits.on_exceed == 'float':
+            try:
+                approximate = to_float(tree)
+                if values is not None:
+                    values = {name: float(value) for name, value in values.items()}
+                if not analyze(approximate, self.limits, values=values).exceeded:
+                    program = compile_tree(optimize(approximate, FLOAT), FLOAT)
+                    program.notes = tuple('Näherung mit float: ' + reason for reason in estimate.reasons)
+                    return program
+            except OverflowError:
+                raise CostLimitError(f'{reasons}; Näherung mit float läuft über') from None
+
+        raise CostLimitError(reasons)
+
+    def analyze(self, calc, mode=None, precision=None):
+        """Gibt die Kostenabschätzung (:class:`app.cost.Estimate`) für den Ausdruck zurück."""
+        backend, precision = self._backend(mode, precision)
+        with backend.context(precision):
+            tree = parse(self._normalize(calc), backend, precision)
+        return analyze(tree, self.limits, rational=backend is FRACTION, exact_pow=backend is not FLOAT)
+
+    def explain(self, calc, mode=None, precision=None):
+        """Zeigt zur Fehlersuche, wie der Ausdruck nach der Optimierung ausgeführt wird.
+
+        Gibt ein Dictionary mit dem optimierten Ausdruck (gemeinsame Teilausdrücke als
+        ``t0 = ...``), den Instruktionen des Programms und den Hinweisen zurück.
+        """
+        backend, precision = self._backend(mode, precision)
+        program = self._compile((backend.name, precision, self._normalize(calc)), backend)
+        return {
+            'expression': self._normalize(calc),
+            'optimized': to_source(program.tree),
+            'code': program.listing(),
+            'notes': list(program.notes),
+        }
+
+    def _backend(self, mode, precision):
+        """Bestimmt Backend und Genauigkeit; ``float`` ignoriert die Genauigkeit."""
+        mode = mode or self.mode
+        precision = precision or self.precision
+        backend = select_backend(mode, precision)
+        return backend, (None if backend is FLOAT else precision)
+
+    def session(self, mode=None, precision=None):
+        """Erstellt eine :class:`app.session.Session` mit Variablen und Funktionen, die
+        Zahlensystem, Kostengrenzen und Formatierung dieses Objekts verwendet."""
+        return Session(self, mode, precision)
+
+    def evaluate_batch(self, expr, **columns):
+        """Wertet einen Ausdruck mit freien Variablen über ganze Wertereihen aus.
+
+        Jede Variable wird als Schlüsselwort mit einer Sequenz (oder einem Skalar)
+        übergeben, z.B. ``calc.evaluate_batch('sin(x)*y', x=xs, y=ys)``. Der Ausdruck
+        wird nur einmal übersetzt; das Ergebnis ist ein ``numpy.ndarray`` wenn NumPy
+        installiert ist, sonst ein ``array('d')``.
+        """
+        return evaluate_columns(self.compile(expr), columns)
+
+    def cache_stats(self):
+        """Gibt die Zähler beider Zwischenspeicher zurück."""
+        return {
+            'parse': self._parse_cache.stats(),
+            'result': self._result_cache.stats(),
+        }
+
+    def enable_profiling(self, enabled=True):
+        """Schaltet die Messung ein oder aus und gibt den Profiler zurück."""
+        if not enabled:
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = Profiler()
+        return self.profiler
 
-    def __calculation_validation(self, calc):
+    def stats(self):
+        """Gibt die Messwerte des Profilers (falls aktiv) und die Zähler der Zwischenspeicher zurück."""
+        stats = self.profiler.stats() if self.profiler is not None else {}
+        stats['cache'] = self.cache_stats()
+        return stats
+
+    def clear_cache(self):
+        self._parse_cache.clear()
+        self._result_cache.clear()
+
+    @staticmethod
+    def _normalize(calc):
+        """Fasst Leerzeichen zusammen, damit gleichwertige Eingaben denselben Schlüssel erhalten."""
+        return ' '.join(str(calc).split())
+
+    def __calculation_validation(self, key, backend):
         """Verantwortlich für die Überprüfung, ob die angegebene Berechnung durchgeführt werden kann"""
-        result = ast.literal_eval(calc)
         try:
-            print(ast.literal_eval(calc))
-            return self.__format_result(result=result)
-        except (NameError, ZeroDivisionError, SyntaxError, ValueError):
+            program = self._compile(key, backend)
+            if program.names:
+                raise NameError(f'Unbekannte Namen: {", ".join(sorted(program.names))}')
+            with backend.context(key[1]):
+                if self.profiler is None:
+                    result = self._format_result(result=program.run())
+                else:
+                    result = self.__profiled_run(program)
+        except (NameError, SyntaxError, ValueError, ArithmeticError, TypeError, RecursionError) as exc:
+            self.last_error = str(exc) or type(exc).__name__
             return 'Error'
 
+        # Ausdrücke ohne Variablen liefern immer dasselbe Ergebnis.
+        self._result_cache.put(key, result)
+        return result
+
+    def __profiled_run(self, program):
+        profiler = self.profiler
+        with profiler.timer('evaluate'):
+            value = program.run()
+        profiler.count_run(program)
+        with profiler.timer('format'):
+            return self._format_result(result=value)
+
     @staticmethod
-    def __format_result(result):
+    def _format_result(result):
         """Formatiert das Ergebnis in wissenschaftlicher Notation, wenn es zu groß ist
-        und gibt den formatierten Wert im String-Typ zurück"""
+        und gibt den formatierten Wert im String-Typ zurück.
+
+        Exakte Ergebnisse (Decimal, Fraction) werden vollständig ausgegeben."""
+
+        if isinstance(result, (Decimal, Fraction)):
+            return str(result)
+
+        if isinstance(result, int):
+            # Höchstens 15 Zeichen; größere Ganzzahlen exakt runden, über float würde z.B. 10**400 zu INF.
+            if -10 ** 14 < result < 10 ** 15:
+                return str(result)
+            return '{:5.5E}'.format(Decimal(result))
 
         result = str(result)
         if len(result) > 15:
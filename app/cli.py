@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Kommandozeilen-Einstiegspunkt des Taschenrechners.
+
+    python -m app                 startet die grafische Oberfläche
+    python -m app eval [DATEI]    wertet Ausdrücke zeilenweise aus (Standard: stdin)
+    python -m app serve           startet den HTTP/JSON-Dienst
+    python -m app explain AUSDRUCK zeigt den optimierten Ausdruck und das Programm
+    python -m app gui --windows 4 mehrere Fenster mit gemeinsamem Rechenkern
+"""
+
+# Builtins
+import argparse
+import sys
+
+# Local
+from .calc import Calc
+from .cost import ON_EXCEED, CostLimits
+from .numeric import MODES
+
+# Anzahl der Ergebniszeilen, die gesammelt und gemeinsam geschrieben werden.
+FLUSH_LINES = 4096
+
+
+def evaluate_stream(lines, out, calc, echo=False, flush_lines=FLUSH_LINES, session=None):
+    """Wertet jede Zeile aus ``lines`` aus und schreibt das Ergebnis nach ``out``.
+
+    Es wird immer nur ein Block von ``flush_lines`` Ergebnissen im Speicher gehalten,
+    der Speicherbedarf ist also unabhängig von der Größe der Eingabe. Leere Zeilen
+    erzeugen eine leere Ausgabezeile, damit Ein- und Ausgabe zeilengleich bleiben.
+
+    Mit ``session`` (:class:`app.session.Session`) werden die Zeilen nacheinander in
+    der Sitzung ausgeführt und dürfen Variablen und Funktionen definieren.
+    """
+    source = session or calc
+    evaluate = session.execute if session is not None else calc.calculation
+    buffer = []
+    count = 0
+    for line in lines:
+        expr = line.strip()
+        if not expr:
+            buffer.append('\n')
+        elif echo:
+            result = evaluate(expr)
+            # Mit --echo wird auch der Grund eines Fehlers ausgegeben.
+            reason = f'  # {source.last_error}' if source.last_error else ''
+            # Funktionsdefinitionen haben kein Ergebnis.
+            buffer.append(f'{expr} = {result}{reason}\n' if result else f'{expr}\n')
+        else:
+            buffer.append(f'{evaluate(expr)}\n')
+
+        count += 1
+        if len(buffer) >= flush_lines:
+            out.writelines(buffer)
+            buffer.clear()
+
+    out.writelines(buffer)
+    out.flush()
+    return count
+
+
+def _open_inputs(paths):
+    """Liefert die Zeilen aller Eingabedateien nacheinander, ``-`` steht für stdin."""
+    for path in paths or ['-']:
+        if path == '-':
+            yield from sys.stdin
+        else:
+            with open(path, mode='r', encoding='utf-8') as f:
+                yield from f
+
+
+def _run_eval(args):
+    lines = _open_inputs(args.files)
+    limits = CostLimits(max_digits=args.max_digits, on_exceed=args.on_exceed)
+    if args.parallel and args.session:
+        print('--session kann nicht mit --parallel verwendet werden', file=sys.stderr)
+        return 2
+    if args.parallel:
+        # Import erst hier, parallel importiert seinerseits dieses Modul.
+        from .parallel import evaluate_parallel
+        evaluate_parallel(lines, sys.stdout, jobs=args.jobs, chunk_size=args.chunk_size,
+                          cache_size=args.cache_size, mode=args.mode, precision=args.precision,
+                          limits=limits, echo=args.echo)
+    else:
+        calc = Calc(cache_size=args.cache_size, mode=args.mode, precision=args.precision, limits=limits)
+        session = calc.session() if args.session else None
+        evaluate_stream(lines, sys.stdout, calc, echo=args.echo, session=session)
+    return 0
+
+
+def _run_explain(args):
+    calc = Calc(mode=args.mode, precision=args.precision)
+    explanation = calc.explain(args.expression)
+    print(explanation['optimized'])
+    print()
+    print('\n'.join(explanation['code']))
+    for note in explanation['notes']:
+        print(f'# {note}')
+    return 0
+
+
+def _run_serve(args):
+    # asyncio wird nur für den Dienst benötigt.
+    from .server import run
+
+    limits = CostLimits(max_digits=args.max_digits, on_exceed=args.on_exceed)
+    calc = Calc(cache_size=args.cache_size, mode=args.mode, precision=args.precision, limits=limits)
+    run(args.host, args.port, calc, max_body=args.max_body, max_batch=args.max_batch,
+        max_connections=args.max_connections, idle_timeout=args.idle_timeout,
+        max_precision=args.max_precision, timeout=args.timeout)
+    return 0
+
+
+def _run_gui(args):
+    # tkinter wird nur für die Oberfläche benötigt.
+    import tkinter as tk
+    from .Calculator import Calculator
+
+    master = tk.Tk()
+    calculator = Calculator(master)
+    # Weitere Fenster teilen sich Rechenkern, Arbeitsprozess und Verlauf des ersten.
+    for _ in range(getattr(args, 'windows', 1) - 1):
+        calculator._new_window()
+    calculator.start()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m app', description='Malia Calculator')
+    parser.set_defaults(func=_run_gui)
+    commands = parser.add_subparsers(title='Befehle')
+
+    gui = commands.add_parser('gui', help='Startet die grafische Oberfläche (Standard)')
+    gui.add_argument('--windows', type=int, default=1,
+                     help='Anzahl der Fenster, die sich einen Rechenkern teilen (Standard: 1)')
+    gui.set_defaults(func=_run_gui)
+
+    evaluate = commands.add_parser('eval', help='Wertet Ausdrücke zeilenweise aus')
+    evaluate.add_argument('files', nargs='*', metavar='DATEI',
+                          help='Eingabedateien, "-" oder keine Angabe für stdin')
+    evaluate.add_argument('--echo', action='store_true',
+                          help='Gibt den Ausdruck vor dem Ergebnis aus')
+    evaluate.add_argument('--cache-size', type=int, default=256,
+                          help='Größe der Zwischenspeicher (Standard: 256)')
+    evaluate.add_argument('--mode', choices=MODES, default='float',
+                          help='Zahlensystem (Standard: float)')
+    evaluate.add_argument('--precision', type=int, default=None,
+                          help='Signifikante Stellen für --mode decimal oder auto')
+    evaluate.add_argument('--max-digits', type=int, default=4300,
+                          help='Größte Stellenzahl exakter Zwischenergebnisse (Standard: 4300)')
+    evaluate.add_argument('--on-exceed', choices=ON_EXCEED, default='float',
+                          help='Verhalten bei zu teuren Ausdrücken (Standard: float)')
+    evaluate.add_argument('-s', '--session', action='store_true',
+                          help='Zeilen wie "a = 3" oder "f(x) = x**2" definieren Variablen und Funktionen')
+    evaluate.add_argument('-p', '--parallel', action='store_true',
+                          help='Verteilt die Auswertung auf mehrere Prozesse')
+    evaluate.add_argument('-j', '--jobs', type=int, default=None,
+                          help='Anzahl der Prozesse mit --parallel (Standard: Anzahl der CPUs)')
+    evaluate.add_argument('--chunk-size', type=int, default=2048,
+                          help='Zeilen pro Block mit --parallel (Standard: 2048)')
+    evaluate.set_defaults(func=_run_eval)
+
+    explain = commands.add_parser('explain', help='Zeigt, wie ein Ausdruck nach der Optimierung ausgeführt wird')
+    explain.add_argument('expression', metavar='AUSDRUCK')
+    explain.add_argument('--mode', choices=MODES, default='float',
+                         help='Zahlensystem (Standard: float)')
+    explain.add_argument('--precision', type=int, default=None,
+                         help='Signifikante Stellen für --mode decimal oder auto')
+    explain.set_defaults(func=_run_explain)
+
+    serve = commands.add_parser('serve', help='Startet den HTTP/JSON-Dienst')
+    serve.add_argument('--host', default='127.0.0.1', help='Adresse (Standard: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8080, help='Port (Standard: 8080)')
+    serve.add_argument('--cache-size', type=int, default=4096,
+                       help='Größe der gemeinsamen Zwischenspeicher (Standard: 4096)')
+    serve.add_argument('--mode', choices=MODES, default='float',
+                       help='Standard-Zahlensystem (Standard: float)')
+    serve.add_argument('--precision', type=int, default=None,
+                       help='Signifikante Stellen für --mode decimal oder auto')
+    serve.add_argument('--max-digits', type=int, default=4300,
+                       help='Größte Stellenzahl exakter Zwischenergebnisse (Standard: 4300)')
+    serve.add_argument('--on-exceed', choices=ON_EXCEED, default='float',
+                       help='Verhalten bei zu teuren Ausdrücken (Standard: float)')
+    serve.add_argument('--max-body', type=int, default=1024 * 1024,
+                       help='Größter Anfragekörper in Bytes (Standard: 1 MiB)')
+    serve.add_argument('--max-batch', type=int, default=10000,
+                       help='Höchstzahl an Ausdrücken pro Anfrage (Standard: 10000)')
+    serve.add_argument('--max-connections', type=int, default=256,
+                       help='Höchstzahl gleichzeitiger Verbindungen (Standard: 256)')
+    serve.add_argument('--idle-timeout', type=float, default=30.0,
+                       help='Sekunden, nach denen ruhende Verbindungen geschlossen werden (Standard: 30)')
+    serve.add_argument('--max-precision', type=int, default=1000,
+                       help='Höchste Genauigkeit, die eine Anfrage wählen darf (Standard: 1000)')
+    serve.add_argument('--timeout', type=float, default=10.0,
+                       help='Sekunden, die eine Anfrage rechnen darf (Standard: 10)')
+    serve.set_defaults(func=_run_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # z.B. bei "python -m app eval | head"
+        sys.stderr.close()
+        return 0
+    except KeyboardInterrupt:
+        return 130
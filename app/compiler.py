@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Übersetzt Rechenausdrücke in ein kompaktes Postfix-Programm.
+
+Die Übersetzung läuft in drei Schritten ab:
+
+    Quelltext --tokenize--> Tokens --parse--> Baum --compile--> Programm
+
+Ein übersetztes Programm ist eine flache Liste von Instruktionen für eine
+Stapelmaschine und kann beliebig oft mit unterschiedlichen Variablenbelegungen
+ausgeführt werden, ohne den Text erneut zu zerlegen.
+"""
+
+# Builtins
+import operator
+import re
+
+# Local
+# Konstanten, Funktionen und Operatoren des float-Backends werden von hier aus
+# weiterverwendet. Die übrigen Zahlensysteme beschreibt :mod:`app.numeric`.
+from .numeric import BINARY_OPERATORS, CONSTANTS, FLOAT, FUNCTIONS  # noqa: F401
+
+
+# Knotentypen des Syntaxbaums. Ein Knoten ist ein Tupel, dessen erstes Element
+# der Typ ist, dadurch sind Bäume unveränderlich, vergleichbar und hashbar.
+NUM = 'num'      # (NUM, wert)
+NAME = 'name'    # (NAME, bezeichner)
+NEG = 'neg'      # (NEG, operand)
+BIN = 'bin'      # (BIN, operator, links, rechts)
+CALL = 'call'    # (CALL, funktion, (argumente, ...))
+# Gemeinsame Teilausdrücke, siehe :mod:`app.optimizer`
+SHARED = 'shared'  # (SHARED, platz, teilbaum): berechnen und im Platz merken
+SLOT = 'slot'      # (SLOT, platz): gemerkten Wert wiederverwenden
+
+# Opcodes des Postfix-Programms.
+PUSH = 0
+LOAD = 1
+UNARY = 2
+BINARY = 3
+CALL_FUNC = 4
+STORE = 5
+FETCH = 6
+
+_OPCODE_NAMES = {PUSH: 'PUSH', LOAD: 'LOAD', UNARY: 'UNARY', BINARY: 'BINARY',
+                 CALL_FUNC: 'CALL', STORE: 'STORE', FETCH: 'FETCH'}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*|//|[-+*/%(),])
+    )""", re.VERBOSE)
+
+
+def tokenize(source, number=FLOAT.number):
+    """Zerlegt den Quelltext in eine Liste von (art, wert)-Tupeln. Zahlenliterale
+    werden mit ``number`` in das Zahlensystem des Backends umgewandelt."""
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+
+    while position < end:
+        match = _TOKEN_RE.match(source, position)
+        if match is None:
+            raise SyntaxError(f'Unerwartetes Zeichen an Position {position}: {source[position:]!r}')
+
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'number':
+            tokens.append((kind, number(text)))
+        else:
+            tokens.append((kind, text))
+        position = match.end()
+
+    return tokens
+
+
+class _Parser:
+    """Rekursiver Abstiegsparser mit der Operatorrangfolge von Python.
+
+        expr  := term (('+' | '-') term)*
+        term  := unary (('*' | '/' | '//' | '%') unary)*
+        unary := ('+' | '-') unary | power
+        power := atom ('**' unary)?
+        atom  := NUMBER | NAME | NAME '(' args ')' | '(' expr ')'
+    """
+
+    def __init__(self, tokens, constants=CONSTANTS):
+        self._tokens = tokens
+        self._constants = constants
+        self._index = 0
+
+    def parse(self):
+        if not self._tokens:
+            raise SyntaxError('Leerer Ausdruck')
+
+        node = self._expr()
+        if self._index != len(self._tokens):
+            raise SyntaxError(f'Unerwartetes Token: {self._tokens[self._index][1]!r}')
+        return node
+
+    def _peek(self):
+        if self._index < len(self._tokens):
+            return self._tokens[self._index]
+        return None, None
+
+    def _accept(self, *values):
+        kind, value = self._peek()
+        if kind == 'op' and value in values:
+            self._index += 1
+            return value
+        return None
+
+    def _expect(self, value):
+        if self._accept(value) is None:
+            raise SyntaxError(f'{value!r} erwartet')
+
+    def _expr(self):
+        node = self._term()
+        while True:
+            op = self._accept('+', '-')
+            if op is None:
+                return node
+            node = (BIN, op, node, self._term())
+
+    def _term(self):
+        node = self._unary()
+        while True:
+            op = self._accept('*', '/', '//', '%')
+            if op is None:
+                return node
+            node = (BIN, op, node, self._unary())
+
+    def _unary(self):
+        op = self._accept('+', '-')
+        if op == '-':
+            return (NEG, self._unary())
+        if op == '+':
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._atom()
+        if self._accept('**') is not None:
+            node = (BIN, '**', node, self._unary())
+        return node
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind is None:
+            raise SyntaxError('Unerwartetes Ende des Ausdrucks')
+        self._index += 1
+
+        if kind == 'number':
+            return (NUM, value)
+
+        if kind == 'name':
+            if self._accept('(') is None:
+                if value in self._constants:
+                    return (NUM, self._constants[value])
+                return (NAME, value)
+
+            args = []
+            if self._accept(')') is None:
+                args.append(self._expr())
+                while self._accept(',') is not None:
+                    args.append(self._expr())
+                self._expect(')')
+            return (CALL, value, tuple(args))
+
+        if value == '(':
+            node = self._expr()
+            self._expect(')')
+            return node
+
+        raise SyntaxError(f'Unerwartetes Token: {value!r}')
+
+
+def parse(source, backend=FLOAT, precision=None):
+    """Übersetzt den Quelltext in einen Syntaxbaum aus Tupeln."""
+    return parse_tokens(tokenize(source, backend.number), backend, precision)
+
+
+def parse_tokens(tokens, backend=FLOAT, precision=None):
+    """Erzeugt den Syntaxbaum aus bereits zerlegten Tokens (siehe :func:`tokenize`)."""
+    return _Parser(tokens, backend.constants(precision)).parse()
+
+
+class Program:
+    """Übersetzter Ausdruck in Postfix-Form.
+
+    ``code`` ist eine Liste von (opcode, argument)-Tupeln, ``names`` die Menge
+    der freien Variablen, die beim Ausführen belegt werden müssen. ``notes``
+    enthält Hinweise aus der Übersetzung, z.B. warum näherungsweise gerechnet wird.
+    ``slots`` ist die Anzahl der Plätze für gemeinsame Teilausdrücke, ``tree`` der
+    übersetzte Baum (zur Fehlersuche, siehe :meth:`app.calc.Calc.explain`).
+    """
+
+    __slots__ = ('code', 'names', 'constant', 'is_constant', 'notes', 'slots', 'tree')
+
+    def __init__(self, code, names, notes=(), slots=0, tree=None):
+        self.code = code
+        self.names = frozenset(names)
+        self.notes = tuple(notes)
+        self.slots = slots
+        self.tree = tree
+        # Vollständig gefaltete Ausdrücke werden nicht mehr interpretiert.
+        self.is_constant = len(code) == 1 and code[0][0] == PUSH
+        self.constant = code[0][1] if self.is_constant else None
+
+    def run(self, env=None):
+        """Führt das Programm mit der Variablenbelegung ``env`` aus."""
+        if self.is_constant:
+            return self.constant
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        slots = [None] * self.slots
+        for op, arg in self.code:
+            if op == PUSH:
+                push(arg)
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = arg(stack[-1], right)
+            elif op == LOAD:
+                try:
+                    push(env[arg])
+                except (KeyError, TypeError):
+                    raise NameError(f'Variable {arg!r} ist nicht definiert') from None
+            elif op == UNARY:
+                stack[-1] = arg(stack[-1])
+            elif op == FETCH:
+                push(slots[arg])
+            elif op == STORE:
+                slots[arg] = stack[-1]
+            else:
+                func, count = arg
+                if count == 1:
+                    stack[-1] = func(stack[-1])
+                else:
+                    split = len(stack) - count
+                    args = stack[split:]
+                    del stack[split:]
+                    push(func(*args))
+
+        return stack[0]
+
+    def listing(self):
+        """Gibt die Instruktionen lesbar zurück, eine Zeile pro Instruktion."""
+        lines = []
+        for op, arg in self.code:
+            if op == CALL_FUNC:
+                arg = f'{getattr(arg[0], "__name__", arg[0])}/{arg[1]}'
+            elif op in (UNARY, BINARY):
+                arg = getattr(arg, '__name__', arg)
+            lines.append(f'{_OPCODE_NAMES[op]:<7}{arg}')
+        return lines
+
+    def __repr__(self):
+        return f'Program({len(self.code)} ops, names={sorted(self.names)})'
+
+
+def _emit(node, code, names, backend):
+    """Erzeugt die Postfix-Instruktionen für ``node``. Teilbäume ohne freie
+    Variablen werden dabei sofort ausgewertet (Konstantenfaltung).
+    """
+    kind = node[0]
+
+    if kind == NUM:
+        code.append((PUSH, node[1]))
+        return
+
+    if kind == NAME:
+        code.append((LOAD, node[1]))
+        names.add(node[1])
+        return
+
+    if kind == SLOT:
+        code.append((FETCH, node[1]))
+        return
+
+    if kind == SHARED:
+        _emit(node[2], code, names, backend)
+        code.append((STORE, node[1]))
+        return
+
+    start = len(code)
+    if kind == NEG:
+        _emit(node[1], code, names, backend)
+        code.append((UNARY, operator.neg))
+    elif kind == BIN:
+        _emit(node[2], code, names, backend)
+        _emit(node[3], code, names, backend)
+        code.append((BINARY, backend.operators[node[1]]))
+    elif kind == CALL:
+        func = backend.functions.get(node[1])
+        if func is None:
+            raise NameError(f'Funktion {node[1]!r} ist nicht definiert')
+        for arg in node[2]:
+            _emit(arg, code, names, backend)
+        code.append((CALL_FUNC, (func, len(node[2]))))
+
+    # Konstantenfaltung: besteht der Abschnitt nur aus Konstanten, wird er
+    # durch sein Ergebnis ersetzt.
+    section = code[start:]
+    if all(op == PUSH for op, _ in section[:-1]):
+        value = Program(section, ()).run()
+        del code[start:]
+        code.append((PUSH, value))
+
+
+def compile_tree(tree, backend=FLOAT):
+    """Übersetzt einen Syntaxbaum in ein :class:`Program`."""
+    code = []
+    names = set()
+    _emit(tree, code, names, backend)
+    slots = 1 + max((arg for op, arg in code if op == STORE), default=-1)
+    return Program(code, names, slots=slots, tree=tree)
+
+
+def compile_expression(source, backend=FLOAT, precision=None):
+    """Übersetzt den Quelltext in ein :class:`Program`. Das Zwischenspeichern
+    übernimmt :class:`app.calc.Calc`.
+
+    Für das decimal-Backend muss die Übersetzung im Kontext des Backends laufen,
+    da Konstanten und gefaltete Teilausdrücke von der Genauigkeit abhängen.
+    """
+    return compile_tree(parse(source, backend, precision), backend)
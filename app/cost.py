@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Statische Kostenabschätzung für Syntaxbäume.
+
+Bevor ein Ausdruck übersetzt (und dabei teilweise schon ausgerechnet) wird,
+schätzt :func:`analyze` anhand des Baums ab, wie viele Dezimalstellen die
+exakten Zwischenergebnisse (``int``, ``Fraction``) höchstens haben und wie viele
+Operationen nötig sind. Nur exakte Zahlen können beliebig groß und damit beliebig
+teuer werden; Gleitkommazahlen sind durch ``float`` bzw. die decimal-Genauigkeit
+begrenzt und brechen bei einem Überlauf sofort mit einem Fehler ab.
+
+Überschreitet die Abschätzung die :class:`CostLimits`, wird der Ausdruck entweder
+abgelehnt oder mit :func:`to_float` in eine Gleitkomma-Näherung umgewandelt.
+"""
+
+# Builtins
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+# Local
+from .compiler import BIN, CALL, NAME, NEG, NUM
+
+# Größenordnung (log10), ab der ``float`` überläuft.
+FLOAT_MAX = 309.0
+
+# Erlaubte Werte für CostLimits.on_exceed.
+ON_EXCEED = ('float', 'reject')
+
+# Funktionen, deren Ergebnis bei exakter Eingabe exakt bleibt.
+_EXACT_FUNCTIONS = {'floor', 'ceil', 'abs'}
+
+
+class CostLimitError(ValueError):
+    """Der Ausdruck überschreitet die eingestellten Kostengrenzen."""
+
+
+class CostLimits:
+    """Grenzen für die Auswertung eines Ausdrucks.
+
+    ``max_digits``      größte erlaubte Stellenzahl exakter Zwischenergebnisse
+    ``max_operations``  größte erlaubte Anzahl an Operationen im Ausdruck
+    ``on_exceed``       ``'float'`` rechnet stattdessen näherungsweise mit float,
+                        ``'reject'`` lehnt den Ausdruck ab
+    """
+
+    def __init__(self, max_digits=4300, max_operations=10000, on_exceed='float'):
+        if on_exceed not in ON_EXCEED:
+            raise ValueError(f"on_exceed muss 'float' oder 'reject' sein, nicht {on_exceed!r}")
+        self.max_digits = max_digits
+        self.max_operations = max_operations
+        self.on_exceed = on_exceed
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(**settings)
+
+
+class Estimate:
+    """Ergebnis von :func:`analyze`."""
+
+    __slots__ = ('digits', 'operations', 'reasons')
+
+    def __init__(self, digits, operations, reasons):
+        self.digits = digits
+        self.operations = operations
+        self.reasons = reasons
+
+    @property
+    def exceeded(self):
+        return bool(self.reasons)
+
+    def __repr__(self):
+        return f'Estimate(digits={self.digits:.4g}, operations={self.operations}, reasons={self.reasons})'
+
+
+def _size(value):
+    """log10 des Betrags bzw. der Stellenzahl einer Zahl."""
+    if isinstance(value, int):
+        if value == 0:
+            return 0.0
+        if value.bit_length() < 1000:
+            return math.log10(abs(value))
+        return value.bit_length() * math.log10(2)
+    if isinstance(value, Fraction):
+        return max(_size(value.numerator), _size(value.denominator))
+    if isinstance(value, Decimal):
+        return float(max(value.adjusted(), 0)) if value.is_finite() and value else 0.0
+    if math.isfinite(value) and value:
+        return max(math.log10(abs(value)), 0.0)
+    return 0.0
+
+
+def _power(base, exponent):
+    """Größe von base**exponent, wobei ``exponent`` als log10 angegeben ist."""
+    if exponent > 18:
+        return math.inf
+    return base * 10 ** exponent
+
+
+def _sum(a, b):
+    """Größe von x + y, wenn x und y die Größen ``a`` und ``b`` haben."""
+    high, low = max(a, b), min(a, b)
+    if math.isinf(high):
+        return high
+    return high + math.log10(1 + 10 ** (low - high))
+
+
+class _Analyzer:
+
+    def __init__(self, rational, values=None, exact_pow=False):
+        self.rational = rational
+        self.exact_pow = exact_pow
+        self.values = values or {}
+        self.operations = 0
+        self.digits = 0.0
+
+    def visit(self, node):
+        """Gibt (größe, exakt) für den Knoten zurück und merkt sich die größte exakte Größe.
+
+        Die Größe ist ``None``, wenn sie von einer Variablen ohne bekannten Wert abhängt.
+        """
+        self.operations += 1
+        size, exact = self._visit(node)
+        if size is None:
+            return None, False
+        if exact:
+            self.digits = max(self.digits, size)
+        else:
+            size = min(size, FLOAT_MAX)
+        return size, exact
+
+    def _visit(self, node):
+        kind = node[0]
+
+        if kind == NUM:
+            value = node[1]
+            return _size(value), isinstance(value, (int, Fraction))
+
+        if kind == NAME:
+            if node[1] in self.values:
+                value = self.values[node[1]]
+                return _size(value), isinstance(value, (int, Fraction))
+            return None, False
+
+        if kind == NEG:
+            return self.visit(node[1])
+
+        if kind == BIN:
+            op = node[1]
+            a, ea = self.visit(node[2])
+            b, eb = self.visit(node[3])
+            if a is None or b is None:
+                return None, False
+            exact = ea and eb
+
+            if op in ('+', '-'):
+                return (a + b if self.rational else _sum(a, b)), exact
+            if op == '*':
+                return a + b, exact
+            if op == '/':
+                return a + b, exact and self.rational
+            if op in ('//', '%'):
+                return a, exact
+            # '**': nur exakte Potenzen können beliebig groß werden, float läuft vorher über.
+            return _power(a, b), exact
+
+        if kind == CALL:
+            name, args = node[1], node[2]
+            sizes = [self.visit(arg) for arg in args]
+            if any(size is None for size, _ in sizes):
+                return None, False
+            if name == 'factorial' and sizes:
+                a, _ = sizes[0]
+                # n! hat höchstens n * log10(n) Stellen, n <= 10**a. Auch bei decimal
+                # wird n! exakt mit int berechnet, daher gilt das Ergebnis immer als exakt.
+                return _power(1.0, a) * max(a, 1.0), True
+            if name == 'pow' and self.exact_pow and len(sizes) == 2:
+                # Wie '**': exakte Argumente ergeben eine exakte, beliebig große Potenz.
+                (a, ea), (b, eb) = sizes
+                return _power(a, b), ea and eb
+            if name in _EXACT_FUNCTIONS and sizes:
+                a, exact = sizes[0]
+                return a, exact or name != 'abs'
+            return FLOAT_MAX, False
+
+        raise SyntaxError(f'Unbekannter Knoten: {kind!r}')
+
+
+def analyze(tree, limits, rational=False, values=None, exact_pow=False):
+    """Schätzt die Kosten von ``tree`` ab und vergleicht sie mit ``limits``.
+
+    ``rational`` gibt an, dass ``/`` exakt rechnet (fraction-Backend), ``exact_pow``,
+    dass ``pow()`` wie ``**`` rechnet statt über float (decimal und fraction). ``values``
+    ordnet Variablen ihren aktuellen Wert zu; die Größe anderer Variablen ist
+    unbekannt und wird nicht als Überschreitung gewertet.
+    """
+    analyzer = _Analyzer(rational, values, exact_pow)
+    analyzer.visit(tree)
+
+    reasons = []
+    if limits.max_digits is not None and analyzer.digits > limits.max_digits:
+        if math.isinf(analyzer.digits):
+            reasons.append(f'Zwischenergebnis wäre unbegrenzt groß (Grenze: {limits.max_digits} Stellen)')
+        else:
+            reasons.append(f'Zwischenergebnis hätte etwa {analyzer.digits:.3g} Stellen '
+                           f'(Grenze: {limits.max_digits})')
+    if limits.max_operations is not None and analyzer.operations > limits.max_operations:
+        reasons.append(f'Ausdruck hat {analyzer.operations} Operationen (Grenze: {limits.max_operations})')
+
+    return Estimate(analyzer.digits, analyzer.operations, reasons)
+
+
+def to_float(node):
+    """Wandelt alle exakten Zahlen im Baum in ``float`` um (Näherung statt exakter Rechnung).
+
+    ``factorial(n)`` wird dabei durch ``gamma(n + 1)`` ersetzt, wenn ``n`` sicher eine
+    natürliche Zahl ist. Sonst bleibt ``factorial`` erhalten und meldet ungültige
+    Argumente weiterhin als Fehler, statt einen Wert der Gammafunktion zu liefern.
+    """
+    kind = node[0]
+
+    if kind == NUM:
+        return (NUM, float(node[1]))
+    if kind == NAME:
+        return node
+    if kind == NEG:
+        return (NEG, to_float(node[1]))
+    if kind == BIN:
+        return (BIN, node[1], to_float(node[2]), to_float(node[3]))
+
+    args = tuple(to_float(arg) for arg in node[2])
+    if node[1] == 'factorial' and len(args) == 1 and _natural(node[2][0]):
+        return (CALL, 'gamma', ((BIN, '+', args[0], (NUM, 1.0)),))
+    return (CALL, node[1], args)
+
+
+def _natural(node):
+    """Prüft ohne zu rechnen, ob der Baum sicher eine natürliche Zahl (einschließlich 0) ergibt."""
+    kind = node[0]
+    if kind == NUM:
+        value = node[1]
+        if isinstance(value, float) or (isinstance(value, Decimal) and not value.is_finite()):
+            return False
+        return value >= 0 and value == int(value)
+    if kind == BIN:
+        return node[1] in ('+', '*', '**', '//', '%') and _natural(node[2]) and _natural(node[3])
+    return False
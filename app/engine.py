@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Gemeinsamer Rechenkern aller Taschenrechner-Fenster eines Prozesses.
+
+Ein :class:`Engine` hält die Einstellungen, das :class:`app.calc.Calc` mit seinen
+Zwischenspeichern, den Arbeitsprozess (:class:`app.worker.EvaluationWorker`) und den
+Verlauf. Jedes Fenster (:class:`app.Calculator.Calculator`) verwendet diese Objekte
+nur. Mehrere Fenster in einem Prozess teilen sich so Interpreter, Zwischenspeicher,
+Arbeitsprozess und Verlauf, statt alles je Fenster neu zu laden.
+
+    engine = Engine()
+    Calculator(tk.Tk(), engine)
+    Calculator(tk.Toplevel(), engine)
+"""
+
+# Builtins
+import copy
+import threading
+
+# Local
+from .calc import Calc
+from .cost import CostLimits
+from .history import History
+from .settings import load as load_settings, save as save_settings
+from .worker import EvaluationWorker
+
+
+class Engine:
+    """Rechenkern, den sich alle Fenster teilen. ``windows`` enthält die offenen Fenster."""
+
+    def __init__(self, snapshot=None):
+        snapshot = snapshot or load_settings()
+        self.settings = snapshot.settings
+        self.layout = snapshot.layout
+        self.themes = snapshot.themes
+        self.windows = []
+        self._save_lock = threading.Lock()
+        self._save_sequence = 0
+
+        settings = self.settings
+        limits = CostLimits.from_settings(settings['limits'])
+        self.calc = Calc(cache_size=settings['cache']['size'],
+                         mode=settings['numeric']['mode'],
+                         precision=settings['numeric']['precision'],
+                         limits=limits)
+
+        # Auswertung außerhalb der Tk-Ereignisschleife, siehe Calculator._get_data_in_input
+        evaluation = settings['evaluation']
+        self.worker = None
+        if evaluation['async']:
+            memory_limit = evaluation['memory_limit_mb']
+            self.worker = EvaluationWorker(cache_size=settings['cache']['size'],
+                                           mode=settings['numeric']['mode'],
+                                           precision=settings['numeric']['precision'],
+                                           limits=limits,
+                                           memory_limit=memory_limit * 1024 * 1024 if memory_limit else None)
+            self.worker.start()
+
+        # Verlauf aller Berechnungen, füllt beim Start den Ergebnis-Zwischenspeicher
+        self.history = self._open_history(settings['history'])
+
+        # Messung (siehe app.profiling), standardmäßig aus
+        if settings['diagnostics']['enabled']:
+            self.calc.enable_profiling()
+
+    def _open_history(self, settings):
+        """Öffnet den Verlauf und übernimmt die letzten Ergebnisse in den Zwischenspeicher."""
+        if not settings['enabled']:
+            return None
+
+        try:
+            history = History(settings['path'])
+        except (OSError, ValueError) as exc:
+            print(f'\33[91mVerlauf nicht verfügbar: {exc}\33[m')
+            return None
+
+        # Älteste zuerst, damit die neuesten Einträge zuletzt verwendet gelten.
+        self.calc.seed(reversed(history.recent(settings['seed'])))
+        # Die Suche mit den Pfeiltasten soll den Tk-Thread nicht aufhalten.
+        history.build_index(background=True)
+        return history
+
+    def save_settings(self):
+        """Speichert die Einstellungen im Hintergrund, atomar über :func:`app.settings.save`.
+
+        Jede Speicherung erhält eine fortlaufende Nummer. Geschrieben wird nur der
+        neueste Stand; wird ein älterer Thread erst danach ausgeführt, verwirft er
+        seinen Stand, statt den neueren zu überschreiben. Nur aus dem Tk-Thread aufrufen.
+        """
+        self._save_sequence += 1
+        snapshot = copy.deepcopy(self.settings)
+        threading.Thread(target=self._write_settings, args=(self._save_sequence, snapshot),
+                         name='save-settings').start()
+
+    def _write_settings(self, sequence, snapshot):
+        with self._save_lock:
+            if sequence == self._save_sequence:
+                save_settings(snapshot)
+
+    def close(self):
+        """Beendet den Arbeitsprozess und schließt den Verlauf."""
+        if self.worker is not None:
+            self.worker.close()
+        if self.history is not None:
+            self.history.close()
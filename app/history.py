@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Dauerhafter Verlauf aller Berechnungen.
+
+Der Verlauf besteht aus zwei Dateien, an die nur angehängt wird:
+
+    history.bin       Kopf, danach je Eintrag: <BII> (Längen) + Kontext + Ausdruck + Ergebnis
+    history.bin.idx   Position jedes Eintrags in history.bin als 8-Byte-Zahl
+
+Beide Dateien werden zum Lesen per ``mmap`` eingeblendet. Über die Positionen in
+``history.bin.idx`` ist jeder Eintrag in O(1) erreichbar.
+
+Für die Suche nach dem Anfang eines Ausdrucks (Pfeiltasten im Eingabefeld) gibt es
+einen Präfixindex: die Nummern aller Einträge als ``array('Q')``, sortiert nach
+Ausdruck und Nummer. Die Ausdrücke selbst bleiben in der eingeblendeten Datei, alle
+Einträge mit einem Anfang liegen nebeneinander und werden per Binärsuche gefunden.
+Der Index wird einmal sortiert aufgebaut, auf Wunsch in einem eigenen Thread
+(:meth:`History.build_index`); bis er fertig ist, wird rückwärts gesucht. Neue
+Einträge werden bei der nächsten Suche einsortiert. Gibt es viele Treffer, liegt
+der neueste meist nahe; dann wird zuerst ein Stück rückwärts gesucht.
+
+Die Suche nach einem Teil des Ausdrucks hat keinen Index, sie durchsucht die Datei
+rückwärts mit ``mmap.rfind`` (in C).
+
+Der Kontext (z.B. ``float`` oder ``decimal:28``) hält fest, in welchem Zahlensystem
+das Ergebnis berechnet wurde, siehe :meth:`app.calc.Calc.context`.
+"""
+
+# Builtins
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+MAGIC = b'MALIAH\x00\x01'
+_RECORD = struct.Struct('<BII')
+_OFFSET = struct.Struct('<Q')
+
+# Ab so vielen passenden Einträgen wird zuerst höchstens so weit rückwärts gesucht.
+_SCAN_STEPS = 1024
+
+Entry = namedtuple('Entry', 'context expr result')
+
+
+class History:
+    """Verlauf mit Anhängen, Direktzugriff und Rückwärtssuche.
+
+    Einträge sind von alt (0) nach neu (``len(history) - 1``) nummeriert.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._index_path = self.path + '.idx'
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._log = open(self.path, 'a+b')
+        self._index = open(self._index_path, 'a+b')
+        self._log_map = None
+        self._index_map = None
+        self._offsets = ()
+        # Präfixindex, siehe build_index
+        self._order = None
+        self._ordered = 0
+        self._building = False
+        self._recover()
+
+    # -- Dateien ----------------------------------------------------------------
+
+    def _recover(self):
+        """Prüft Kopf und Index und repariert sie nach einem Absturz beim Schreiben."""
+        size = os.fstat(self._log.fileno()).st_size
+        if size == 0:
+            self._log.write(MAGIC)
+            self._log.flush()
+            size = len(MAGIC)
+        else:
+            self._log.seek(0)
+            if self._log.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{self.path} ist keine Verlaufsdatei')
+
+        count = os.fstat(self._index.fileno()).st_size // _OFFSET.size
+        self._index.truncate(count * _OFFSET.size)
+        self._remap()
+
+        # Index auf den letzten vollständig geschriebenen Eintrag zurücksetzen ...
+        position = len(MAGIC)
+        while count:
+            last = self._offsets[count - 1]
+            end = self._record_end(last, size)
+            if end is not None:
+                position = end
+                break
+            count -= 1
+        self._index.truncate(count * _OFFSET.size)
+
+        # ... und danach geschriebene Einträge nachtragen bzw. einen halben Eintrag abschneiden.
+        self._log.seek(0)
+        data = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            missing = []
+            while True:
+                end = self._record_end(position, size, data)
+                if end is None:
+                    break
+                missing.append(_OFFSET.pack(position))
+                position = end
+        finally:
+            data.close()
+
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(b''.join(missing))
+        self._index.flush()
+        if position < size:
+            self._log.truncate(position)
+        self._remap()
+        self._last = self[-1] if len(self) else None
+
+    def _record_end(self, position, size, data=None):
+        """Ende des Eintrags ab ``position`` oder ``None``, wenn er unvollständig ist."""
+        data = self._log_map if data is None else data
+        if data is None or position + _RECORD.size > size:
+            return None
+        lengths = _RECORD.unpack_from(data, position)
+        end = position + _RECORD.size + sum(lengths)
+        return end if end <= size else None
+
+    def _remap(self):
+        """Blendet beide Dateien (neu) ein, nachdem sie gewachsen sind."""
+        self._unmap()
+        self._log.flush()
+        self._index.flush()
+        if os.fstat(self._log.fileno()).st_size:
+            self._log_map = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+        if os.fstat(self._index.fileno()).st_size:
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            self._offsets = memoryview(self._index_map).cast('Q')
+        else:
+            self._offsets = ()
+
+    def _unmap(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = ()
+        for data in (self._log_map, self._index_map):
+            if data is not None:
+                data.close()
+        self._log_map = self._index_map = None
+
+    def _mapped(self):
+        if self._log_map is None:
+            self._remap()
+        return self._log_map
+
+    # -- Schreiben --------------------------------------------------------------
+
+    def append(self, expr, result, context='float'):
+        """Hängt einen Eintrag an; eine direkte Wiederholung des letzten Eintrags wird übersprungen."""
+        entry = Entry(context, expr, result)
+        if entry == self._last:
+            return
+
+        parts = [part.encode('utf-8') for part in (context, expr, result)]
+        position = self._log.seek(0, os.SEEK_END)
+        self._log.write(_RECORD.pack(*map(len, parts)) + b''.join(parts))
+        self._log.flush()
+        # Der Index wird erst nach dem Eintrag geschrieben, siehe _recover.
+        self._index.write(_OFFSET.pack(position))
+        self._index.flush()
+        self._last = entry
+        # Die Einblendung wird beim nächsten Lesen erneuert.
+        self._unmap()
+
+    def close(self):
+        self._unmap()
+        self._order = None
+        self._log.close()
+        self._index.close()
+
+    # -- Lesen ------------------------------------------------------------------
+
+    def __len__(self):
+        if self._log_map is None:
+            self._remap()
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('Verlaufseintrag existiert nicht')
+
+        data = self._mapped()
+        position = self._offsets[index]
+        lengths = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        fields = []
+        for length in lengths:
+            fields.append(data[position:position + length].decode('utf-8'))
+            position += length
+        return Entry(*fields)
+
+    def recent(self, count):
+        """Gibt die letzten ``count`` Einträge zurück, der neueste zuerst."""
+        total = len(self)
+        return [self[i] for i in range(total - 1, max(total - count, 0) - 1, -1)]
+
+    def search(self, text, before=None, prefix=True):
+        """Sucht rückwärts den neuesten Eintrag vor ``before``, dessen Ausdruck mit ``text``
+        beginnt (oder ihn mit ``prefix=False`` enthält). Gibt die Nummer oder ``None`` zurück."""
+        count = len(self)
+        before = count if before is None else min(before, count)
+        if before <= 0:
+            return None
+        if not text:
+            return before - 1
+        if prefix:
+            return self._search_prefix(text, before)
+
+        data = self._mapped()
+        offsets = self._offsets
+        needle = text.encode('utf-8')
+        end = offsets[before] if before < count else len(data)
+
+        while True:
+            found = data.rfind(needle, len(MAGIC), end)
+            if found < 0:
+                return None
+
+            index = bisect_right(offsets, found) - 1
+            context, expr, _ = _RECORD.unpack_from(data, offsets[index])
+            start = offsets[index] + _RECORD.size + context
+            if start <= found and found + len(needle) <= start + expr:
+                return index
+            end = found + len(needle) - 1
+
+    def build_index(self, background=False):
+        """Baut den Präfixindex auf, mit ``background=True`` in einem eigenen Thread.
+
+        Ohne Aufruf wird er bei der ersten Suche nach einem Anfang aufgebaut.
+        """
+        if self._order is not None or self._building:
+            return
+        self._building = True
+        if background:
+            threading.Thread(target=self._build_index, name='history-index', daemon=True).start()
+        else:
+            self._build_index()
+
+    def _build_index(self):
+        """Liest beide Dateien über eigene Dateiobjekte, damit ``append`` weiterlaufen kann."""
+        try:
+            offsets = array('Q')
+            with open(self._index_path, 'rb') as f:
+                data = f.read()
+            offsets.frombytes(data[:len(data) - len(data) % _OFFSET.size])
+            exprs = []
+            if offsets:
+                with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                    for position in offsets:
+                        context, expr, _ = _RECORD.unpack_from(log, position)
+                        start = position + _RECORD.size + context
+                        exprs.append(log[start:start + expr])
+            # Stabil sortiert: gleiche Ausdrücke bleiben nach Nummer geordnet.
+            order = array('Q', sorted(range(len(exprs)), key=exprs.__getitem__))
+            self._ordered = len(order)
+            self._order = order
+        except (OSError, ValueError, struct.error):
+            pass  # Ohne Index wird rückwärts gesucht.
+        finally:
+            self._building = False
+
+    def _prefix_order(self):
+        """Gibt den Präfixindex mit allen Einträgen zurück oder ``None``, solange er aufgebaut wird."""
+        if self._order is None:
+            if self._building:
+                return None
+            self.build_index()
+            if self._order is None:
+                return None
+
+        order = self._order
+        count = len(self)
+        # Neue Einträge haben die größte Nummer und kommen hinter gleiche Ausdrücke.
+        for index in range(self._ordered, count):
+            order.insert(self._bisect(order, self._expr_bytes(index), right=True), index)
+        self._ordered = count
+        return order
+
+    def _expr_bytes(self, index):
+        data = self._mapped()
+        position = self._offsets[index]
+        context, expr, _ = _RECORD.unpack_from(data, position)
+        start = position + _RECORD.size + context
+        return data[start:start + expr]
+
+    def _bisect(self, order, needle, low=0, right=False):
+        """Binärsuche im Präfixindex nach dem Ausdruck ``needle`` (UTF-8, gleiche Ordnung wie str)."""
+        high = len(order)
+        while low < high:
+            middle = (low + high) // 2
+            expr = self._expr_bytes(order[middle])
+            if expr < needle or (right and expr == needle):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _search_prefix(self, text, before):
+        """Neuester Eintrag vor ``before`` mit dem Anfang ``text``."""
+        needle = text.encode('utf-8')
+        order = self._prefix_order()
+        if order is None:
+            return self._scan_prefix(needle, before, 0)
+
+        low = self._bisect(order, needle)
+        # 0xFF kommt in UTF-8 nicht vor, alle Ausdrücke mit dem Anfang liegen davor.
+        high = self._bisect(order, needle + b'\xff', low)
+        if low == high:
+            return None
+        if high - low > _SCAN_STEPS:
+            stop = max(before - _SCAN_STEPS, 0)
+            index = self._scan_prefix(needle, before, stop)
+            if index is not None or not stop:
+                return index
+            before = stop
+        return max(filter(before.__gt__, order[low:high]), default=None)
+
+    def _scan_prefix(self, needle, before, stop):
+        """Sucht rückwärts von ``before`` bis ``stop`` und hält beim ersten Treffer an."""
+        data = self._mapped()
+        offsets = self._offsets
+        for index in range(before - 1, stop - 1, -1):
+            position = offsets[index]
+            context, expr, _ = _RECORD.unpack_from(data, position)
+            start = position + _RECORD.size + context
+            if expr >= len(needle) and data[start:start + len(needle)] == needle:
+                return index
+        return None
+
+    def find(self, text, limit=20, prefix=False):
+        """Gibt bis zu ``limit`` passende Einträge zurück, der neueste zuerst."""
+        entries = []
+        index = self.search(text, prefix=prefix)
+        while index is not None and len(entries) < limit:
+            entries.append(self[index])
+            index = self.search(text, before=index, prefix=prefix)
+        return entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
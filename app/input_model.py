@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Modell der Rechnereingabe als Liste von Tokens.
+
+Die Eingabe wird nicht bei jedem Tastendruck aus dem ``tk.Entry`` gelesen und neu
+durchsucht. Stattdessen merkt sich :class:`InputBuffer` die eingegebenen Tokens
+zusammen mit Länge, Klammertiefe und dem letzten Zeichen, sodass jede Prüfung
+und jede Änderung unabhängig von der Länge der Eingabe konstante Zeit braucht.
+Mehrzeichen-Tokens wie ``log10`` oder ``2*pi`` werden als Einheit gelöscht.
+"""
+
+# Arten von Tokens
+NUMBER = 'number'      # Ziffern und Dezimaltrennzeichen
+NAME = 'name'          # Funktionen und Konstanten, z.B. sin, pi, 2*pi
+OPERATOR = 'operator'  # +, -, *, /, %, **, //, **(1/2)
+OPEN = 'open'          # (
+CLOSE = 'close'        # )
+RESULT = 'result'      # Ergebnis einer Berechnung
+ERROR = 'error'        # Fehlermeldung
+
+OPERATOR_CHARS = '+-*/%'
+
+
+class InputBuffer:
+    """Tokenpuffer der Eingabe mit inkrementell geführter Länge und Klammertiefe.
+
+    ``max_length`` begrenzt die Anzahl der Zeichen, ``None`` hebt die Grenze auf.
+    """
+
+    def __init__(self, max_length=15):
+        self.max_length = max_length
+        self._tokens = []
+        self.length = 0
+        self.depth = 0
+        self.reset('0', NUMBER)
+
+    @property
+    def text(self):
+        return ''.join(token for token, _ in self._tokens)
+
+    @property
+    def last_kind(self):
+        return self._tokens[-1][1] if self._tokens else None
+
+    @property
+    def last_token(self):
+        return self._tokens[-1][0] if self._tokens else ''
+
+    @property
+    def last_char(self):
+        return self._tokens[-1][0][-1] if self._tokens else ''
+
+    @property
+    def is_error(self):
+        return self.last_kind == ERROR
+
+    @property
+    def is_zero(self):
+        """``True``, wenn die Eingabe nur aus der Anfangs-Null besteht."""
+        return len(self._tokens) == 1 and self._tokens[0][0] == '0'
+
+    def has_room(self):
+        """Überprüfen, ob die Eingabe die maximale Anzahl von Zeichen noch nicht erreicht hat"""
+        return not self.max_length or self.length < self.max_length
+
+    def append(self, token, kind):
+        """Hängt ein Token an die Eingabe an."""
+        self._tokens.append((token, kind))
+        self.length += len(token)
+        self.depth += token.count('(') - token.count(')')
+
+    def pop(self):
+        """Entfernt das letzte Token und gibt es zurück."""
+        token, _ = self._tokens.pop()
+        self.length -= len(token)
+        self.depth -= token.count('(') - token.count(')')
+        return token
+
+    def reset(self, text='0', kind=NUMBER):
+        """Ersetzt die gesamte Eingabe durch ``text`` als einzelnes Token."""
+        self._tokens.clear()
+        self.length = 0
+        self.depth = 0
+        if text:
+            self.append(text, kind)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self.text
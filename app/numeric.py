@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Zahlensysteme (Backends), in denen ein Ausdruck ausgewertet werden kann.
+
+    float      Gleitkommazahlen, schnellste Variante (ca. 15 signifikante Stellen)
+    decimal    ``decimal.Decimal`` mit einstellbarer Genauigkeit
+    fraction   ``fractions.Fraction``, exakt für +, -, *, / und ganzzahlige Potenzen
+
+Ein Backend legt fest, wie Zahlenliterale eingelesen werden und welche Konstanten,
+Funktionen und Operatoren verwendet werden. Funktionen ohne exaktes Gegenstück
+(z.B. ``sin`` bei ``fraction`` oder ``gamma`` bei ``decimal``) werden über ``float``
+berechnet. Nur ``auto`` lehnt sie oberhalb der float-Genauigkeit ab, da es die
+gewünschte Genauigkeit zusichert. Die Kosten der Backends misst
+``benchmarks/numeric_backends.py``.
+"""
+
+# Builtins
+import math
+import operator
+from contextlib import nullcontext
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal, getcontext, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+# Anzahl signifikanter Stellen, die ``float`` zuverlässig darstellt.
+FLOAT_DIGITS = 15
+
+# Standardgenauigkeit des decimal-Backends (wie im decimal-Modul).
+DEFAULT_PRECISION = 28
+
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+    'inf': math.inf,
+    'nan': math.nan,
+}
+
+FUNCTIONS = {
+    name: getattr(math, name) for name in (
+        'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2',
+        'sinh', 'cosh', 'tanh', 'asinh', 'acosh', 'atanh',
+        'sqrt', 'exp', 'expm1', 'log', 'log2', 'log10', 'log1p',
+        'factorial', 'gamma', 'lgamma', 'erf', 'erfc',
+        'degrees', 'radians', 'fabs', 'floor', 'ceil', 'pow', 'hypot',
+    )
+}
+FUNCTIONS['abs'] = abs
+
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '**': operator.pow,
+}
+
+
+class Backend:
+    """Beschreibt ein Zahlensystem für den Compiler."""
+
+    def __init__(self, name, number, constants, functions, operators=BINARY_OPERATORS):
+        self.name = name
+        self.number = number
+        self._constants = constants
+        self.functions = functions
+        self.operators = operators
+
+    def constants(self, precision=None):
+        """Gibt die Konstanten für die angegebene Genauigkeit zurück."""
+        if callable(self._constants):
+            return self._constants(precision)
+        return self._constants
+
+    def context(self, precision=None):
+        """Kontextmanager, in dem übersetzt und ausgeführt wird."""
+        return nullcontext()
+
+    def __repr__(self):
+        return f'Backend({self.name!r})'
+
+
+def _float_number(text):
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def _exact_factorial(x):
+    """``factorial`` für Decimal- und Fraction-Werte, die eine ganze Zahl darstellen."""
+    if x != int(x):
+        raise ValueError('factorial() akzeptiert nur ganzzahlige Werte')
+    return type(x)(math.factorial(int(x)))
+
+
+# -- decimal ------------------------------------------------------------------
+
+@lru_cache(maxsize=8)
+def _decimal_constants(precision):
+    """Berechnet pi und e mit ``precision`` Stellen (Verfahren aus der decimal-Dokumentation)."""
+    with localcontext() as ctx:
+        ctx.prec = precision + 2
+        three = Decimal(3)
+        last, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != last:
+            last = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+        pi = s
+        e = Decimal(1).exp()
+
+    with localcontext() as ctx:
+        ctx.prec = precision
+        return {
+            'pi': +pi,
+            'e': +e,
+            'tau': +(2 * pi),
+            'inf': Decimal('Infinity'),
+            'nan': Decimal('NaN'),
+        }
+
+
+def _decimal_via_float(func):
+    """Berechnet ``func`` über ``float`` und gibt das Ergebnis als Decimal zurück."""
+    def wrapper(*args):
+        return Decimal(repr(func(*map(float, args))))
+    wrapper.via_float = True
+    return wrapper
+
+
+def _float_only(name):
+    """Ersatz für eine über float berechnete Funktion, wenn mehr Stellen verlangt sind."""
+    def wrapper(*args):
+        raise ValueError(f'{name}() wird nur mit float-Genauigkeit ({FLOAT_DIGITS} Stellen) berechnet, '
+                         f'verlangt sind {getcontext().prec}')
+    return wrapper
+
+
+def _decimal_log(x, base=None):
+    if base is None:
+        return x.ln()
+    return x.ln() / Decimal(base).ln()
+
+
+class _DecimalBackend(Backend):
+
+    def context(self, precision=None):
+        ctx = getcontext().copy()
+        ctx.prec = precision or DEFAULT_PRECISION
+        return localcontext(ctx)
+
+
+def _decimal_functions():
+    functions = {name: _decimal_via_float(func) for name, func in FUNCTIONS.items()}
+    functions.update({
+        'sqrt': Decimal.sqrt,
+        'exp': Decimal.exp,
+        'log': _decimal_log,
+        'log10': Decimal.log10,
+        'log2': lambda x: x.ln() / Decimal(2).ln(),
+        'fabs': abs,
+        'abs': abs,
+        'floor': lambda x: x.to_integral_value(rounding=ROUND_FLOOR),
+        'ceil': lambda x: x.to_integral_value(rounding=ROUND_CEILING),
+        'pow': operator.pow,
+        'factorial': _exact_factorial,
+    })
+    return functions
+
+
+def _precise_decimal_functions():
+    """Wie :func:`_decimal_functions`, aber ohne die Funktionen, die über float rechnen."""
+    functions = _decimal_functions()
+    for name, func in functions.items():
+        if getattr(func, 'via_float', False):
+            functions[name] = _float_only(name)
+    return functions
+
+
+# -- fraction -----------------------------------------------------------------
+
+def _fraction_functions():
+    functions = dict(FUNCTIONS)
+    functions.update({
+        'abs': abs,
+        'pow': operator.pow,
+        'factorial': _exact_factorial,
+    })
+    return functions
+
+
+FLOAT = Backend('float', _float_number, CONSTANTS, FUNCTIONS)
+DECIMAL = _DecimalBackend('decimal', Decimal, lambda precision: _decimal_constants(precision or DEFAULT_PRECISION),
+                          _decimal_functions())
+# Irrationale Konstanten bleiben float, das Ergebnis ist dann ebenfalls nicht exakt.
+FRACTION = Backend('fraction', Fraction, CONSTANTS, _fraction_functions())
+# decimal für mode='auto' oberhalb von FLOAT_DIGITS, eigener Name für die Zwischenspeicher.
+AUTO_DECIMAL = _DecimalBackend('auto', Decimal, DECIMAL._constants, _precise_decimal_functions())
+
+BACKENDS = {backend.name: backend for backend in (FLOAT, DECIMAL, FRACTION)}
+MODES = ('auto',) + tuple(BACKENDS)
+
+
+def select_backend(mode='float', precision=None):
+    """Gibt das Backend für ``mode`` zurück.
+
+    Mit ``mode='auto'`` wird das schnellste Backend gewählt, das die gewünschte
+    Genauigkeit erreicht: ``float`` bis 15 Stellen, darüber ``decimal``. Funktionen,
+    die decimal nur über float berechnet (z.B. ``sin``), lösen dann ``ValueError`` aus.
+    """
+    if mode == 'auto':
+        if precision is None or precision <= FLOAT_DIGITS:
+            return FLOAT
+        return AUTO_DECIMAL
+
+    try:
+        return BACKENDS[mode]
+    except KeyError:
+        raise ValueError(f'Unbekannter Modus {mode!r}, erlaubt sind: {", ".join(MODES)}') from None
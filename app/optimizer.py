@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Optimierung des Syntaxbaums vor der Übersetzung.
+
+    Baum --simplify--> vereinfachter Baum --share--> Baum mit gemeinsamen Teilausdrücken
+
+:func:`simplify` faltet konstante Teilbäume (``2*pi`` von der Schaltfläche wird
+zu einer Zahl) und wendet algebraische Identitäten an, die für jedes Zahlensystem
+exakt gelten, z.B. ``x*1 -> x`` oder ``--x -> x``. Regeln wie ``x*0 -> 0`` oder
+``x-x -> 0`` gelten für ``inf`` und ``nan`` nicht, ``x+0 -> x`` nicht für ``-0.0``
+(``-0.0+0`` ist ``0.0``); sie werden deshalb nicht angewendet. Ebenso ``x-(-y) -> x+y``:
+Exakte Nullen (``int``, ``Fraction``) haben kein Vorzeichen, ``-0.0-(-0)`` ist
+``-0.0``, ``-0.0+0`` aber ``0.0``. In decimal kehrt ``-x`` das Vorzeichen nicht nur um
+(``-Decimal('-0')`` ist ``0``, gerundet wird auch), dort entfällt auch ``--x -> x``.
+Decimal-Werte müssen bereits auf die Genauigkeit des Kontexts gerundet sein, sonst
+rundet ``x*1`` anders als ``x``.
+
+:func:`share` ersetzt mehrfach vorkommende Teilausdrücke wie ``sin(x)`` in
+``sin(x)**2+sin(x)``: Das erste Vorkommen wird berechnet und gemerkt (``SHARED``),
+jedes weitere liest den gemerkten Wert (``SLOT``).
+
+:func:`to_source` gibt den optimierten Baum als Text aus, gemeinsame
+Teilausdrücke als vorangestellte Zuweisungen ``t0 = ...``.
+"""
+
+# Builtins
+from collections import Counter
+from decimal import Decimal
+from fractions import Fraction
+
+# Local
+from .compiler import BIN, CALL, NAME, NEG, NUM, SHARED, SLOT
+from .numeric import FLOAT
+
+# Rangfolge für die Textausgabe, höher bindet stärker.
+_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '//': 2, '%': 2, NEG: 3, '**': 4}
+_ATOM = 5
+
+
+def optimize(tree, backend=FLOAT):
+    """Vereinfacht den Baum und fasst gemeinsame Teilausdrücke zusammen."""
+    return share(simplify(tree, backend))
+
+
+# -- Vereinfachung --------------------------------------------------------------
+
+def _is(node, value):
+    """Prüft, ob ``node`` die exakte Zahl ``value`` ist. float- und Decimal-Literale
+    zählen nicht, da ``x*1.0`` den Typ und ``x+Decimal(0)`` die Rundung ändern kann."""
+    return node[0] == NUM and type(node[1]) in (int, Fraction) and node[1] == value
+
+
+def _identity(op, left, right):
+    if op == '-':
+        if _is(right, 0):
+            return left
+    elif op == '*':
+        if _is(right, 1):
+            return left
+        if _is(left, 1):
+            return right
+    elif op == '**' and _is(right, 1):
+        return left
+    return (BIN, op, left, right)
+
+
+def simplify(node, backend=FLOAT):
+    """Faltet Konstanten und wendet Identitäten an, von den Blättern zur Wurzel.
+
+    Muss im Kontext des Backends laufen (siehe :meth:`app.numeric.Backend.context`).
+    """
+    kind = node[0]
+
+    if kind in (NUM, NAME):
+        return node
+
+    if kind == NEG:
+        operand = simplify(node[1], backend)
+        if operand[0] == NUM:
+            return (NUM, -operand[1])
+        if operand[0] == NEG and backend.number is not Decimal:
+            return operand[1]
+        return (NEG, operand)
+
+    if kind == BIN:
+        op = node[1]
+        left = simplify(node[2], backend)
+        right = simplify(node[3], backend)
+        if left[0] == NUM and right[0] == NUM:
+            return (NUM, backend.operators[op](left[1], right[1]))
+        return _identity(op, left, right)
+
+    if kind == CALL:
+        args = tuple(simplify(arg, backend) for arg in node[2])
+        func = backend.functions.get(node[1])
+        # Unbekannte Funktionen meldet erst die Übersetzung.
+        if func is not None and all(arg[0] == NUM for arg in args):
+            return (NUM, func(*(arg[1] for arg in args)))
+        return (CALL, node[1], args)
+
+    raise SyntaxError(f'Unbekannter Knoten: {kind!r}')
+
+
+# -- Gemeinsame Teilausdrücke ---------------------------------------------------
+
+def _children(node):
+    kind = node[0]
+    if kind == NEG:
+        return (node[1],)
+    if kind == BIN:
+        return (node[2], node[3])
+    if kind == CALL:
+        return node[2]
+    return ()
+
+
+def share(tree):
+    """Ersetzt mehrfach vorkommende Teilausdrücke durch ``SHARED``/``SLOT``-Knoten."""
+    # Jeder Teilbaum erhält eine Nummer, gleiche Teilbäume dieselbe. So muss kein
+    # (tief verschachteltes) Tupel mehrfach gehasht werden.
+    numbers = {}
+    keys = {}
+    total = Counter()
+
+    def number(node):
+        kind = node[0]
+        if kind == NUM:
+            # 1, 1.0 und -0.0, 0.0 sind gleich, liefern aber unterschiedliche Ergebnisse.
+            key = (NUM, type(node[1]), repr(node[1]))
+        elif kind == NAME:
+            key = node
+        else:
+            key = (kind, node[1] if kind in (BIN, CALL) else None,
+                   tuple(number(child) for child in _children(node)))
+        keys[id(node)] = numbers.setdefault(key, len(numbers))
+        total[keys[id(node)]] += 1
+        return keys[id(node)]
+
+    number(tree)
+
+    # Vorkommen innerhalb eines bereits gemeinsamen Teilausdrucks zählen nur einmal.
+    counts = Counter()
+
+    def count(node):
+        key = keys[id(node)]
+        counts[key] += 1
+        if total[key] > 1 and counts[key] > 1:
+            return
+        for child in _children(node):
+            count(child)
+
+    count(tree)
+    slots = {}
+
+    def rewrite(node):
+        if node[0] in (NUM, NAME):
+            return node
+        key = keys[id(node)]
+        if counts[key] > 1:
+            if key in slots:
+                return (SLOT, slots[key])
+            slots[key] = len(slots)
+            return (SHARED, slots[key], _rebuild(node, rewrite))
+        return _rebuild(node, rewrite)
+
+    return rewrite(tree)
+
+
+def _rebuild(node, transform):
+    kind = node[0]
+    if kind == NEG:
+        return (NEG, transform(node[1]))
+    if kind == BIN:
+        return (BIN, node[1], transform(node[2]), transform(node[3]))
+    return (CALL, node[1], tuple(transform(arg) for arg in node[2]))
+
+
+# -- Textausgabe ----------------------------------------------------------------
+
+def to_source(tree):
+    """Gibt den Baum als Ausdruck zurück, gemeinsame Teilausdrücke als ``t0 = ...`` davor."""
+    definitions = []
+
+    def fmt(node):
+        """Gibt (text, rangfolge) zurück."""
+        kind = node[0]
+        if kind == NUM:
+            text = str(node[1]) if not isinstance(node[1], float) else repr(node[1])
+            simple = text.replace('.', '').replace('E', '').replace('e', '').isdigit()
+            return text, _ATOM if simple else 0
+        if kind == NAME:
+            return node[1], _ATOM
+        if kind == SLOT:
+            return f't{node[1]}', _ATOM
+        if kind == SHARED:
+            definitions.append(f't{node[1]} = {fmt(node[2])[0]}')
+            return f't{node[1]}', _ATOM
+        if kind == NEG:
+            text, precedence = fmt(node[1])
+            return '-' + _wrap(text, precedence < _PRECEDENCE[NEG]), _PRECEDENCE[NEG]
+        if kind == CALL:
+            return f'{node[1]}({", ".join(fmt(arg)[0] for arg in node[2])})', _ATOM
+
+        op = node[1]
+        own = _PRECEDENCE[op]
+        left, left_precedence = fmt(node[2])
+        right, right_precedence = fmt(node[3])
+        if op == '**':
+            # rechtsassoziativ, -x**2 bedeutet -(x**2)
+            return f'{_wrap(left, left_precedence <= own)}**{_wrap(right, right_precedence < _PRECEDENCE[NEG])}', own
+        return f'{_wrap(left, left_precedence < own)}{op}{_wrap(right, right_precedence <= own)}', own
+
+    expression = fmt(tree)[0]
+    return '\n'.join(definitions + [expression])
+
+
+def _wrap(text, parenthesize):
+    return f'({text})' if parenthesize else text
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Parallele Auswertung großer Eingaben auf mehreren Prozessorkernen.
+
+Die Eingabe wird in Blöcke aufgeteilt, die ein Prozesspool abarbeitet. Jeder
+Arbeitsprozess besitzt ein eigenes :class:`Calc`-Objekt, dessen Zwischenspeicher
+über alle Blöcke dieses Prozesses hinweg warm bleibt. Es sind höchstens
+``jobs * 4`` Blöcke gleichzeitig unterwegs, die Ergebnisse werden in der
+Reihenfolge der Eingabe geschrieben, sobald sie vorliegen.
+"""
+
+# Builtins
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Local
+from .calc import Calc
+from .cli import evaluate_stream
+
+CHUNK_SIZE = 2048
+
+# Rechner des jeweiligen Arbeitsprozesses, wird von _init_worker gesetzt.
+_worker_calc = None
+
+
+def _init_worker(cache_size, mode, precision, limits):
+    global _worker_calc
+    _worker_calc = Calc(cache_size=cache_size, mode=mode, precision=precision, limits=limits)
+
+
+def _evaluate_chunk(lines, echo):
+    out = io.StringIO()
+    evaluate_stream(lines, out, _worker_calc, echo=echo)
+    return out.getvalue()
+
+
+def _chunks(lines, size):
+    iterator = iter(lines)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_parallel(lines, out, jobs=None, chunk_size=CHUNK_SIZE, cache_size=256,
+                      mode='float', precision=None, limits=None, echo=False):
+    """Wertet ``lines`` mit ``jobs`` Prozessen aus (Standard: Anzahl der CPUs) und
+    schreibt die Ergebnisse in Eingabereihenfolge nach ``out``.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    max_pending = jobs * 4
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_size, mode, precision, limits)) as pool:
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(_evaluate_chunk, chunk, echo))
+            # Rückstau: erst weiterlesen, wenn der älteste Block geschrieben ist.
+            if len(pending) >= max_pending:
+                out.write(pending.popleft().result())
+
+        while pending:
+            out.write(pending.popleft().result())
+
+    out.flush()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import math
+
+import tkinter as tk
+
+# Local
+from .plotting import Sampler
+
+# Zeit für die Abtastung pro Bild; was nicht fertig wird, folgt im nächsten Durchgang.
+FRAME_BUDGET = 1 / 60
+# Faktor pro Mausradschritt. Zweierpotenzen treffen das Raster des Samplers exakt.
+ZOOM_STEP = 2 ** 0.5
+# Anteil der Werte, der oben und unten bei der automatischen Skalierung ignoriert
+# wird, damit Polstellen (tan, gamma) den Graphen nicht flach drücken.
+CLIP = 0.02
+
+# Fehler beim Übersetzen und Abtasten, die im Fenster angezeigt werden.
+_ERRORS = (NameError, SyntaxError, ValueError, ArithmeticError, TypeError)
+
+
+class PlotWindow:
+    """Fenster mit dem Graphen eines Ausdrucks in ``x``.
+
+    Ziehen mit der Maus verschiebt den Ausschnitt, das Mausrad zoomt um die
+    Mausposition. Die Werte stammen aus einem :class:`app.plotting.Sampler`, bereits
+    berechnete Stellen werden dabei wiederverwendet.
+    """
+
+    def __init__(self, master, calc, theme, expr='sin(x)', x_range=(-10.0, 10.0), frame_budget=FRAME_BUDGET):
+        self.calc = calc
+        self.theme = theme
+        self.frame_budget = frame_budget
+        self.x0, self.x1 = map(float, x_range)
+        self._sampler = None
+        self._pending = None
+        self._drag = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title('Funktionsgraph')
+        self.window['bg'] = theme['master_bg']
+        self.window.protocol('WM_DELETE_WINDOW', self.close)
+
+        self._entry = tk.Entry(self.window, cnf=theme['INPUT'])
+        self._entry.insert(0, expr)
+        self._entry.bind('<Return>', self._on_submit)
+        self._entry.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        self._status = tk.Label(self.window, anchor=tk.W, bg=theme['master_bg'], fg=theme['INPUT']['fg'])
+        self._status.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
+
+        self._canvas = tk.Canvas(self.window, width=640, height=400, bg=theme['frame_bg'], highlightthickness=0)
+        self._canvas.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self._canvas.bind('<Configure>', self._schedule)
+        self._canvas.bind('<ButtonPress-1>', self._on_press)
+        self._canvas.bind('<B1-Motion>', self._on_drag)
+        self._canvas.bind('<MouseWheel>', self._on_wheel)
+        # X11 meldet das Mausrad als Taste 4 und 5.
+        self._canvas.bind('<Button-4>', self._on_wheel)
+        self._canvas.bind('<Button-5>', self._on_wheel)
+
+        self.plot(expr)
+
+    def plot(self, expr):
+        """Zeigt den Graphen von ``expr``; bei ungültigen Ausdrücken bleibt die Fläche leer."""
+        try:
+            self._sampler = Sampler(expr, self.calc)
+        except _ERRORS as exc:
+            self._sampler = None
+            self._show_error(exc)
+        self._schedule()
+
+    def lift(self):
+        self.window.lift()
+
+    def close(self):
+        if self._pending is not None:
+            self.window.after_cancel(self._pending)
+            self._pending = None
+        self.window.destroy()
+
+    def _show_error(self, exc):
+        self._status['text'] = str(exc) or type(exc).__name__
+
+    # -- Ereignisse -------------------------------------------------------------
+
+    def _on_submit(self, event=None):
+        self.plot(self._entry.get())
+
+    def _on_press(self, event):
+        self._drag = event.x
+
+    def _on_drag(self, event):
+        if self._drag is None:
+            return
+        shift = (self._drag - event.x) * (self.x1 - self.x0) / max(self._canvas.winfo_width(), 1)
+        self._drag = event.x
+        self.x0 += shift
+        self.x1 += shift
+        self._schedule()
+
+    def _on_wheel(self, event):
+        zoom_in = event.num == 4 or getattr(event, 'delta', 0) > 0
+        factor = 1 / ZOOM_STEP if zoom_in else ZOOM_STEP
+        # Die Stelle unter dem Mauszeiger bleibt stehen.
+        center = self.x0 + (self.x1 - self.x0) * event.x / max(self._canvas.winfo_width(), 1)
+        self.x0 = center - (center - self.x0) * factor
+        self.x1 = center + (self.x1 - center) * factor
+        self._schedule()
+
+    def _schedule(self, event=None):
+        """Fasst mehrere Ereignisse zu einem Neuzeichnen im nächsten Leerlauf zusammen."""
+        if self._pending is None:
+            self._pending = self.window.after_idle(self._redraw)
+
+    # -- Zeichnen ---------------------------------------------------------------
+
+    def _redraw(self):
+        self._pending = None
+        canvas = self._canvas
+        width, height = max(canvas.winfo_width(), 2), max(canvas.winfo_height(), 2)
+        canvas.delete('all')
+        if self._sampler is None:
+            return
+
+        try:
+            samples = self._sampler.sample(self.x0, self.x1, points=max(width // 8, 8),
+                                           tolerance=0.5 / height, budget=self.frame_budget)
+        except _ERRORS as exc:
+            # Aus einem Tk-Ereignis heraus bliebe der Fehler sonst unsichtbar.
+            self._show_error(exc)
+            return
+        y0, y1 = _value_range(samples.ys)
+
+        def px(x):
+            return (x - self.x0) / (self.x1 - self.x0) * width
+
+        def py(y):
+            return height - (y - y0) / (y1 - y0) * height
+
+        color = self.theme['INPUT']['fg']
+        if y0 <= 0 <= y1:
+            canvas.create_line(0, py(0), width, py(0), fill=color, dash=(2, 4))
+        if self.x0 <= 0 <= self.x1:
+            canvas.create_line(px(0), 0, px(0), height, fill=color, dash=(2, 4))
+
+        for segment in _segments(samples.xs, samples.ys, px, py, height):
+            if len(segment) >= 4:
+                canvas.create_line(*segment, fill=color, width=2)
+
+        self._status['text'] = (f'x: {self.x0:.4g} … {self.x1:.4g}   y: {y0:.4g} … {y1:.4g}   '
+                                f'{len(samples.xs)} Punkte')
+        # Nicht fertig verfeinert: im nächsten Durchgang mit den gemerkten Werten fortsetzen.
+        if not samples.complete:
+            self._pending = self.window.after(1, self._redraw)
+
+
+def _value_range(ys):
+    """Wertebereich für die automatische Skalierung, ohne die extremsten Werte."""
+    finite = sorted(y for y in ys if math.isfinite(y))
+    if not finite:
+        return -1.0, 1.0
+    clip = int(len(finite) * CLIP)
+    low, high = finite[clip], finite[-clip - 1]
+    if high - low < 1e-12:
+        low, high = low - 1, high + 1
+    margin = (high - low) * 0.05
+    return low - margin, high + margin
+
+
+def _segments(xs, ys, px, py, height):
+    """Teilt den Graphen an nicht definierten Stellen und Sprüngen über die ganze Höhe
+    in Linienzüge auf und gibt deren Koordinaten zurück."""
+    segment = []
+    previous = None
+    for x, y in zip(xs, ys):
+        if not math.isfinite(y):
+            yield segment
+            segment, previous = [], None
+            continue
+        # Koordinaten weit außerhalb der Fläche begrenzen, Tk rechnet mit Ganzzahlen.
+        y = min(max(py(y), -height), 2 * height)
+        if previous is not None and abs(y - previous) >= height:
+            yield segment
+            segment = []
+        segment.extend((px(x), y))
+        previous = y
+    yield segment
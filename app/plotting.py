@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Adaptive Abtastung von Funktionen einer Variablen, z.B. für den Funktionsgraphen.
+
+    xs, ys, complete = sample('gamma(x)', -4, 4)
+
+Die Abtastung beginnt mit einem groben Raster und halbiert nur die Intervalle, in
+denen der Mittelpunkt merklich von der Geraden zwischen den Endpunkten abweicht
+(oder die Funktion an einem Ende nicht definiert ist). Dicht abgetastet wird also nur
+dort, wo sich die Funktion schnell ändert.
+
+Alle Stellen liegen auf einem dyadischen Raster ``k * 2**e``: Dieselbe Stelle wird
+bei jeder Verschiebung und bei jeder Vergrößerung um Zweierpotenzen exakt wieder
+getroffen. :class:`Sampler` merkt sich alle berechneten Werte, Verschieben und
+Zoomen berechnen deshalb nur die neu sichtbaren Stellen. Jede Verfeinerungsstufe
+wird in einem Durchgang spaltenweise berechnet (:func:`app.vectorize.evaluate_columns`).
+
+Mit ``budget`` (Sekunden) bricht die Verfeinerung nach Ablauf der Zeit ab und meldet
+``complete=False``; ein weiterer Aufruf setzt sie fort, da die bereits berechneten
+Stellen im Zwischenspeicher liegen.
+"""
+
+# Builtins
+import math
+import time
+from collections import namedtuple
+
+# Local
+from .calc import Calc
+from .vectorize import evaluate_columns
+
+Samples = namedtuple('Samples', 'xs ys complete')
+
+# Intervalle im groben Raster, Verfeinerungsstufen und zulässige Abweichung
+# (Anteil am Wertebereich, 0.002 entspricht etwa einem Pixel bei 500 Pixeln Höhe).
+POINTS = 64
+MAX_DEPTH = 8
+TOLERANCE = 0.002
+# Höchstzahl gemerkter Stellen, danach wird der Zwischenspeicher geleert.
+MAX_CACHED = 200000
+
+
+class Sampler:
+    """Tastet einen Ausdruck mit höchstens einer freien Variablen ab und merkt sich die Werte.
+
+    Gerechnet wird immer mit float; Stellen, an denen die Funktion nicht definiert
+    ist, ergeben ``nan``.
+    """
+
+    def __init__(self, expr, calc=None, variable='x'):
+        calc = calc or Calc()
+        self.expr = expr
+        self.program = calc.compile(expr, mode='float')
+        names = self.program.names
+        if len(names) > 1:
+            raise NameError(f'Nur eine Variable erlaubt: {", ".join(sorted(names))}')
+        self.variable = next(iter(names)) if names else variable
+        self._values = {}
+        self.evaluations = 0
+
+    def sample(self, x0, x1, points=POINTS, tolerance=TOLERANCE, max_depth=MAX_DEPTH, budget=None):
+        """Tastet den Ausdruck im Bereich ``[x0, x1]`` ab und gibt :data:`Samples` zurück.
+
+        ``points`` legt das grobe Raster fest (auf eine Zweierpotenz gerundet),
+        ``max_depth`` wie oft ein Intervall höchstens halbiert wird.
+        """
+        if not x0 < x1:
+            raise ValueError('Der Bereich muss x0 < x1 erfüllen')
+        deadline = None if budget is None else time.perf_counter() + budget
+        if len(self._values) > MAX_CACHED:
+            self._values.clear()
+
+        step = 2.0 ** math.floor(math.log2((x1 - x0) / points))
+        first, last = math.floor(x0 / step), math.ceil(x1 / step)
+        xs = [k * step for k in range(first, last + 1)]
+        ys = self._evaluate(xs)
+        known = dict(zip(xs, ys))
+
+        finite = [y for y in ys if math.isfinite(y)]
+        span = (max(finite) - min(finite)) if finite else 0.0
+        limit = tolerance * (span or 1.0)
+
+        intervals = list(zip(xs, xs[1:]))
+        complete = True
+        for _ in range(max_depth):
+            if not intervals:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                complete = False
+                break
+
+            middles = [(a + b) / 2 for a, b in intervals]
+            for x, y in zip(middles, self._evaluate(middles)):
+                known[x] = y
+
+            refine = []
+            for (a, b), m in zip(intervals, middles):
+                if _needs_split(known[a], known[m], known[b], limit):
+                    refine.append((a, m))
+                    refine.append((m, b))
+            intervals = refine
+
+        xs = sorted(known)
+        return Samples(xs, [known[x] for x in xs], complete)
+
+    def _evaluate(self, xs):
+        """Gibt die Werte an den Stellen ``xs`` zurück, berechnet nur fehlende."""
+        values = self._values
+        missing = [x for x in xs if x not in values]
+        if missing:
+            self.evaluations += len(missing)
+            for x, y in zip(missing, evaluate_columns(self.program, {self.variable: missing})):
+                values[x] = float(y)
+        return [values[x] for x in xs]
+
+    def clear(self):
+        self._values.clear()
+
+
+def _needs_split(ya, ym, yb, limit):
+    """Entscheidet, ob das Intervall mit den Werten ``ya``, ``ym``, ``yb`` halbiert wird."""
+    defined = math.isfinite(ya) + math.isfinite(ym) + math.isfinite(yb)
+    if defined == 0:
+        return False
+    if defined < 3:
+        # Rand des Definitionsbereichs oder Polstelle
+        return True
+    return abs(ym - (ya + yb) / 2) > limit
+
+
+def sample(expr, x0, x1, calc=None, **options):
+    """Tastet ``expr`` im Bereich ``[x0, x1]`` adaptiv ab, siehe :meth:`Sampler.sample`."""
+    return Sampler(expr, calc).sample(x0, x1, **options)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Optionale Messung, wo im Taschenrechner die Zeit verbraucht wird.
+
+Ein :class:`Profiler` sammelt Laufzeiten je Phase (``tokenize``, ``parse``,
+``compile``, ``evaluate``, ``format`` sowie ``keypress`` und ``worker`` in der
+Oberfläche) und zählt die Aufrufe jeder Funktion. Ohne Profiler (``None``)
+prüfen :class:`app.calc.Calc` und :class:`app.Calculator.Calculator` nur ein
+Attribut, die Messung kostet dann praktisch nichts.
+
+    calc = Calc(profiler=Profiler())
+    calc.calculation('sin(1)+2')
+    calc.stats()
+"""
+
+# Builtins
+import json
+import os
+import threading
+import time
+from collections import Counter
+from tempfile import NamedTemporaryFile
+
+# Local
+from .compiler import CALL, CALL_FUNC, SHARED, SLOT
+from .numeric import BACKENDS
+
+# Reihenfolge der Phasen in der Ausgabe.
+PHASES = ('tokenize', 'parse', 'compile', 'evaluate', 'format', 'keypress', 'worker')
+
+
+# Name jeder Funktion aller Backends, übersetzte Programme enthalten nur die Funktion selbst.
+_FUNCTION_NAMES = {func: name for backend in BACKENDS.values() for name, func in backend.functions.items()}
+
+
+def _tree_calls(node, shared=None):
+    """Liefert den Namen jedes Funktionsaufrufs im Syntaxbaum. Gemeinsame Teilausdrücke
+    (siehe :mod:`app.optimizer`) zählen bei jeder Verwendung."""
+    shared = {} if shared is None else shared
+    kind = node[0]
+    if kind == SLOT:
+        yield from shared[node[1]]
+    elif kind == SHARED:
+        shared[node[1]] = list(_tree_calls(node[2], shared))
+        yield from shared[node[1]]
+    elif kind == CALL:
+        yield node[1]
+        for arg in node[2]:
+            yield from _tree_calls(arg, shared)
+    else:
+        for child in node[1:]:
+            if isinstance(child, tuple):
+                yield from _tree_calls(child, shared)
+
+
+def _program_calls(program):
+    """Liefert den Namen jeder Funktion, die beim Ausführen von ``program`` aufgerufen wird."""
+    for op, arg in program.code:
+        if op == CALL_FUNC:
+            yield _FUNCTION_NAMES.get(arg[0], getattr(arg[0], '__name__', '?'))
+
+
+class _Timer:
+    """Kontextmanager, der die Dauer des Blocks einer Phase zuschreibt."""
+
+    __slots__ = ('_profiler', '_phase', '_start')
+
+    def __init__(self, profiler, phase):
+        self._profiler = profiler
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._profiler.add(self._phase, time.perf_counter() - self._start)
+
+
+class Profiler:
+    """Sammelt Phasenzeiten, Funktionsaufrufe und Latenzen (threadsicher)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # Je Phase: [Anzahl, Summe in Sekunden, Maximum in Sekunden]
+            self.phases = {}
+            self.calls = Counter()
+            self.started = time.time()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            entry = self.phases.get(phase)
+            if entry is None:
+                self.phases[phase] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def timer(self, phase):
+        return _Timer(self, phase)
+
+    def count_folded(self, tree, optimized):
+        """Zählt die Funktionsaufrufe, die beim Übersetzen durch Konstantenfaltung
+        (z.B. ``sin(1)``) bereits ausgeführt wurden, d.h. im optimierten Baum fehlen."""
+        folded = Counter(_tree_calls(tree))
+        folded.subtract(_tree_calls(optimized))
+        with self._lock:
+            self.calls.update(+folded)
+
+    def count_run(self, program):
+        """Zählt die Funktionsaufrufe einer Ausführung von ``program``."""
+        calls = Counter(_program_calls(program))
+        with self._lock:
+            self.calls.update(calls)
+
+    def stats(self):
+        """Gibt alle Messwerte als JSON-fähiges Dictionary zurück (Zeiten in Millisekunden)."""
+        order = {phase: index for index, phase in enumerate(PHASES)}
+        with self._lock:
+            snapshot = {phase: tuple(entry) for phase, entry in self.phases.items()}
+            calls = dict(self.calls.most_common())
+        phases = {}
+        for phase in sorted(snapshot, key=lambda p: order.get(p, len(order))):
+            count, total, peak = snapshot[phase]
+            phases[phase] = {
+                'count': count,
+                'total_ms': total * 1000,
+                'mean_ms': total / count * 1000,
+                'max_ms': peak * 1000,
+            }
+
+        return {
+            'seconds': time.time() - self.started,
+            'phases': phases,
+            'calls': calls,
+        }
+
+
+def dump(stats, path):
+    """Schreibt ``stats`` atomar als JSON nach ``path``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as tmp:
+        json.dump(stats, tmp, indent=4)
+    os.replace(tmp.name, path)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Kleiner HTTP/JSON-Dienst für den Rechenkern (nur Standardbibliothek).
+
+    python -m app serve [--host 127.0.0.1] [--port 8080]
+
+Endpunkte:
+
+    POST /eval    {"expr": "1+2"}                 -> {"result": "3"}
+                  {"exprs": ["1+2", "sin(pi)"]}   -> {"results": ["3", "1.22465E-16"]}
+                  optional "mode" und "precision" wie bei Calc.calculation
+    GET  /stats   Zähler des Dienstes und Calc.stats() (Zwischenspeicher, Messwerte)
+    GET  /health  {"status": "ok"}
+
+Alle Verbindungen teilen sich ein :class:`Calc`-Objekt und damit dessen
+Zwischenspeicher. Verbindungen bleiben nach HTTP/1.1 offen (keep-alive).
+Rückstau: Anfragekörper, Stapelgröße, Genauigkeit und Anzahl gleichzeitiger
+Verbindungen sind begrenzt. Gerechnet wird in einem Thread-Pool, damit die
+Ereignisschleife frei bleibt; dauert eine Anfrage länger als ``timeout``
+Sekunden, wird sie mit 503 beantwortet.
+"""
+
+# Builtins
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+# Local
+from .calc import Calc
+from .numeric import MODES
+
+MAX_BODY = 1024 * 1024
+MAX_BATCH = 10000
+MAX_CONNECTIONS = 256
+IDLE_TIMEOUT = 30.0
+# Höchste Genauigkeit, die ein Client anfordern darf (decimal pi mit 20000 Stellen dauert ~16s).
+MAX_PRECISION = 1000
+# Sekunden, die eine Anfrage rechnen darf.
+TIMEOUT = 10.0
+# Threads für die Berechnung.
+WORKERS = 4
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class CalcServer:
+    """asyncio-Server, der Anfragen mit einem gemeinsamen :class:`Calc` beantwortet."""
+
+    def __init__(self, calc=None, max_body=MAX_BODY, max_batch=MAX_BATCH,
+                 max_connections=MAX_CONNECTIONS, idle_timeout=IDLE_TIMEOUT,
+                 max_precision=MAX_PRECISION, timeout=TIMEOUT, workers=WORKERS):
+        self.calc = calc or Calc(cache_size=4096)
+        self.max_body = max_body
+        self.max_batch = max_batch
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.max_precision = max_precision
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calc')
+        self._connections = 0
+        self.stats = {'connections': 0, 'requests': 0, 'expressions': 0, 'rejected': 0}
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Laufende Berechnungen lassen sich nicht abbrechen, auf sie wird nicht gewartet.
+            self._executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        if self._connections >= self.max_connections:
+            self.stats['rejected'] += 1
+            await self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE,
+                                {'error': 'Zu viele Verbindungen'}, keep_alive=False)
+            writer.close()
+            return
+
+        self._connections += 1
+        self.stats['connections'] += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as exc:
+                    # Ohne gültigen Anfragekopf ist unklar, wo die nächste Anfrage beginnt.
+                    self.stats['requests'] += 1
+                    await self._respond(writer, exc.status, {'error': str(exc)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.stats['requests'] += 1
+                try:
+                    status, payload = HTTPStatus.OK, await self._dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {'error': str(exc)}
+                    # Nach einem fehlerhaften Anfragekörper ist der Datenstrom nicht mehr zuverlässig.
+                    keep_alive = keep_alive and exc.status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                await self._respond(writer, status, payload, keep_alive)
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise asyncio.IncompleteReadError(b'', None)
+        if not head:
+            return None
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, path, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Ungültige Anfragezeile') from None
+        path = path.split('?', 1)[0]
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Ungültige Content-Length')
+        if length > self.max_body:
+            return method, path, headers, None
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == '/health' and method == 'GET':
+            return {'status': 'ok'}
+        if path == '/stats' and method == 'GET':
+            return dict(self.calc.stats(), server=dict(self.stats, open_connections=self._connections))
+        if path == '/eval':
+            if method != 'POST':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            if body is None:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return await self._evaluate(body)
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    async def _evaluate(self, body):
+        try:
+            request = json.loads(body or b'null')
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Ungültiges JSON') from None
+
+        if isinstance(request, list):
+            request = {'exprs': request}
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Erwartet wird ein Objekt oder eine Liste')
+
+        mode = request.get('mode')
+        if mode is not None and (not isinstance(mode, str) or mode not in MODES):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'"mode" muss einer von {", ".join(MODES)} sein')
+        precision = request.get('precision')
+        # bool ist eine Unterklasse von int, true wäre sonst Genauigkeit 1.
+        if precision is not None and (type(precision) is not int or not 1 <= precision <= self.max_precision):
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f'"precision" muss eine ganze Zahl von 1 bis {self.max_precision} sein')
+
+        if 'expr' in request:
+            exprs = [request['expr']]
+        else:
+            exprs = request.get('exprs')
+            if not isinstance(exprs, list):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, '"expr" oder "exprs" fehlt')
+            if len(exprs) > self.max_batch:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f'Höchstens {self.max_batch} Ausdrücke pro Anfrage')
+
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, self._calculate, exprs, mode, precision)
+        try:
+            results = await asyncio.wait_for(job, self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE,
+                            f'Berechnung dauert länger als {self.timeout:g} s') from None
+        except ValueError as exc:  # z.B. Genauigkeit für den Modus ungültig
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(exc)) from None
+
+        self.stats['expressions'] += len(exprs)
+        if 'expr' in request:
+            return {'result': results[0]}
+        return {'results': results}
+
+    def _calculate(self, exprs, mode, precision):
+        """Läuft im Thread-Pool und rechnet alle Ausdrücke einer Anfrage."""
+        return [self.calc.calculation(str(expr), mode, precision) for expr in exprs]
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def run(host='127.0.0.1', port=8080, calc=None, **options):
+    """Startet den Dienst und blockiert, bis er mit Strg+C beendet wird."""
+    server = CalcServer(calc, **options)
+    print(f'\33[92mCalculator service listening on http://{host}:{port}\33[m')
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
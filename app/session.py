@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Sitzung mit benannten Variablen und Funktionen, ähnlich einer Tabellenkalkulation.
+
+    session = Calc().session()
+    session.execute('a = 3')                  -> '3'
+    session.execute('f(x) = x**2 + sin(x)')   -> ''
+    session.execute('b = f(a) + 1')           -> '1.01411E+01'
+    session.execute('a = 4')                  -> berechnet a und b neu, sonst nichts
+
+Jede Variable ist eine Zelle mit einer Formel. Benutzerfunktionen werden beim
+Übersetzen in die Formel eingesetzt (wie ein Makro), jede Zelle ist also ein
+gewöhnliches :class:`app.compiler.Program`, dessen freie Variablen andere Zellen sind.
+Übersetzt wird eine Formel nur, wenn sie selbst oder eine aufgerufene Funktion
+sich ändert; danach wird nur noch das Programm mit den neuen Werten ausgeführt.
+
+Der Abhängigkeitsgraph hält für jeden Namen fest, welche Zellen ihn verwenden.
+Ändert sich eine Zelle, werden nur die von ihr abhängigen Zellen neu berechnet,
+jede höchstens einmal und in topologischer Reihenfolge. Ergibt eine Zelle denselben
+Wert wie zuvor, bleiben ihre Abhängigen unberührt. Definitionen, die einen
+Zirkelbezug erzeugen würden, werden mit :class:`CycleError` abgelehnt.
+"""
+
+# Builtins
+import re
+from collections import defaultdict, deque
+
+# Local
+from .compiler import BIN, CALL, NAME, NEG, NUM, parse
+from .cost import CostLimitError, analyze
+from .numeric import FLOAT, FRACTION
+
+_DEFINITION_RE = re.compile(r'\s*([A-Za-z_]\w*)\s*(?:\(([^()]*)\))?\s*=(.*)$', re.DOTALL)
+_NAME_RE = re.compile(r'[A-Za-z_]\w*$')
+
+# Fehler beim Übersetzen und Ausführen einer Formel, wie in Calc.
+_ERRORS = (NameError, SyntaxError, ValueError, ArithmeticError, TypeError, RecursionError)
+
+
+class CycleError(ValueError):
+    """Die Definition würde einen Zirkelbezug erzeugen."""
+
+
+class Session:
+    """Benannte Variablen (Zellen) und Funktionen mit inkrementeller Neuberechnung.
+
+    Zahlensystem, Kostengrenzen und Formatierung stammen vom übergebenen :class:`Calc`,
+    ``mode`` und ``precision`` überschreiben dessen Voreinstellung für die ganze Sitzung.
+    """
+
+    def __init__(self, calc, mode=None, precision=None):
+        self.calc = calc
+        self._backend, self._precision = calc._backend(mode, precision)
+        self._constants = self._backend.constants(self._precision)
+        self._trees = {}        # Zelle -> Syntaxbaum der Formel
+        self._sources = {}      # Zelle -> Formel als Text
+        self._functions = {}    # Funktion -> (parameter, syntaxbaum, text)
+        self._programs = {}     # Zelle -> Program, None bei Übersetzungsfehler
+        self._expanded = {}     # Zelle -> Syntaxbaum mit eingesetzten Funktionen
+        self._compile_errors = {}
+        self._uses = {}         # Zelle -> verwendete Namen (Zellen und Funktionen)
+        self._users = defaultdict(set)  # Name -> Zellen, die ihn verwenden
+        self._values = {}
+        self._errors = {}
+        self.last_error = None
+        self.evaluations = 0
+
+    # -- Eingabe ----------------------------------------------------------------
+
+    def execute(self, line):
+        """Führt eine Eingabezeile aus und gibt das Ergebnis als Text zurück.
+
+        ``name = formel`` definiert eine Variable und gibt ihren Wert zurück,
+        ``name(x, y) = formel`` eine Funktion (Rückgabe ``''``), alles andere wird
+        als Ausdruck ausgewertet. Bei Fehlern wird ``'Error'`` zurückgegeben und der
+        Grund in ``last_error`` abgelegt.
+        """
+        self.last_error = None
+        match = _DEFINITION_RE.match(line)
+        if match is None:
+            return self.evaluate(line)
+
+        name, params, source = match.groups()
+        try:
+            if params is None:
+                self.define(name, source)
+                return self.result(name)
+            self.define_function(name, [param.strip() for param in params.split(',') if param.strip()], source)
+            return ''
+        except _ERRORS as exc:
+            self.last_error = str(exc) or type(exc).__name__
+            return 'Error'
+
+    def evaluate(self, source):
+        """Wertet einen Ausdruck mit den Variablen und Funktionen der Sitzung aus, ohne ihn zu speichern."""
+        self.last_error = None
+        try:
+            program, error, _, tree = self._prepare(self._parse(source))
+            if program is None:
+                raise NameError(error)
+            value = self._run(program, tree)
+        except _ERRORS as exc:
+            self.last_error = str(exc) or type(exc).__name__
+            return 'Error'
+        return self.calc._format_result(value)
+
+    def define(self, name, source):
+        """Definiert die Variable ``name`` mit der Formel ``source`` oder ändert sie.
+
+        Gibt die Namen der neu berechneten Zellen in Berechnungsreihenfolge zurück.
+        Ungültige Formeln lösen ``SyntaxError`` aus; Formeln, die (noch) nicht
+        berechnet werden können, z.B. weil eine Variable fehlt, werden gespeichert
+        und ergeben ``'Error'``, bis die Ursache behoben ist.
+        """
+        self._check_name(name, function=False)
+        source = self.calc._normalize(source)
+        if self._sources.get(name) == source:
+            return []
+
+        tree = self._parse(source)
+        prepared = self._prepare(tree)
+        uses = prepared[2]
+        if self._reaches(uses, name, {name: uses}):
+            raise CycleError(f'Zirkelbezug: {name} hängt von sich selbst ab')
+
+        self._trees[name] = tree
+        self._sources[name] = source
+        self._set(name, *prepared)
+        return self._recompute({name})
+
+    def define_function(self, name, params, source):
+        """Definiert die Funktion ``name`` mit den Parametern ``params`` oder ändert sie.
+
+        Alle Zellen, die die Funktion (auch indirekt) aufrufen, werden neu übersetzt
+        und berechnet; ihre Namen werden in Berechnungsreihenfolge zurückgegeben.
+        """
+        self._check_name(name, function=True)
+        params = tuple(params)
+        for param in params:
+            if not _NAME_RE.match(param) or param in self._constants:
+                raise SyntaxError(f'Ungültiger Parameter: {param!r}')
+        if len(set(params)) != len(params):
+            raise SyntaxError(f'Doppelter Parameter in {name}({", ".join(params)})')
+
+        tree = self._parse(source)
+        # Rekursive Funktionen lassen sich nicht einsetzen.
+        self._check_recursion(name, tree)
+
+        previous = self._functions.get(name)
+        self._functions[name] = (params, tree, self.calc._normalize(source))
+        try:
+            affected = self._recompile(self._users.get(name, ()))
+        except CycleError:
+            self._restore_function(name, previous)
+            raise
+        return self._recompute(affected)
+
+    def remove(self, name):
+        """Entfernt eine Variable oder Funktion. Zellen, die sie verwenden, ergeben
+        danach ``'Error'``. Gibt die neu berechneten Zellen zurück."""
+        if name in self._functions:
+            del self._functions[name]
+            return self._recompute(self._recompile(self._users.get(name, ())))
+        if name not in self._sources:
+            raise NameError(f'{name!r} ist nicht definiert')
+
+        self._set(name, None, None, frozenset())
+        for table in (self._trees, self._sources, self._programs, self._expanded, self._compile_errors,
+                      self._uses, self._values, self._errors):
+            table.pop(name, None)
+        return self._recompute({name})
+
+    # -- Abfragen ---------------------------------------------------------------
+
+    def __contains__(self, name):
+        return name in self._sources or name in self._functions
+
+    def value(self, name):
+        """Gibt den Wert der Zelle im Zahlensystem der Sitzung zurück."""
+        if name in self._values:
+            return self._values[name]
+        if name in self._errors:
+            raise ValueError(f'{name}: {self._errors[name]}')
+        raise NameError(f'{name!r} ist nicht definiert')
+
+    def result(self, name):
+        """Gibt den formatierten Wert der Zelle zurück, ``'Error'`` bei einem Fehler (Grund in ``last_error``)."""
+        if name in self._values:
+            return self.calc._format_result(self._values[name])
+        self.last_error = self._errors.get(name, f'{name!r} ist nicht definiert')
+        return 'Error'
+
+    def error(self, name):
+        """Grund, warum die Zelle nicht berechnet werden konnte, sonst ``None``."""
+        return self._errors.get(name)
+
+    def results(self):
+        """Gibt alle Zellen mit ihrem formatierten Wert zurück, in der Reihenfolge der Definition."""
+        return {name: self.result(name) for name in self._sources}
+
+    def formulas(self):
+        """Gibt alle Definitionen als Eingabezeilen zurück, Funktionen zuerst."""
+        lines = [f'{name}({", ".join(params)}) = {source}' for name, (params, _, source) in self._functions.items()]
+        lines.extend(f'{name} = {source}' for name, source in self._sources.items())
+        return lines
+
+    def dependents(self, name):
+        """Alle Zellen, die direkt oder indirekt von ``name`` abhängen."""
+        found = set()
+        stack = list(self._users.get(name, ()))
+        while stack:
+            cell = stack.pop()
+            if cell not in found:
+                found.add(cell)
+                stack.extend(self._users.get(cell, ()))
+        return found
+
+    # -- Übersetzung ------------------------------------------------------------
+
+    def _check_name(self, name, function):
+        if not _NAME_RE.match(name):
+            raise SyntaxError(f'Ungültiger Name: {name!r}')
+        if name in self._constants or name in self._backend.functions:
+            raise ValueError(f'{name!r} ist bereits eingebaut')
+        if name in (self._sources if function else self._functions):
+            raise ValueError(f'{name!r} ist bereits als {"Variable" if function else "Funktion"} definiert')
+
+    def _parse(self, source):
+        with self._backend.context(self._precision):
+            return parse(self.calc._normalize(source), self._backend, self._precision)
+
+    def _check_recursion(self, name, tree):
+        """Prüft anhand der Aufrufe in den Funktionsrümpfen, ob ``name`` mit dem Rumpf
+        ``tree`` sich (auch indirekt) selbst aufrufen würde. Eingesetzt wird dabei nichts."""
+        seen = set()
+        stack = list(_calls(tree))
+        while stack:
+            callee = stack.pop()
+            if callee == name:
+                raise CycleError(f'Zirkelbezug: {name} ruft sich selbst auf')
+            if callee not in seen and callee in self._functions:
+                seen.add(callee)
+                stack.extend(_calls(self._functions[callee][1]))
+
+    def _expand(self, node, used, stack, budget, bindings=None):
+        """Setzt Benutzerfunktionen ein. ``used`` sammelt alle aufgerufenen Funktionen,
+        die nicht eingebaut sind, auch noch nicht definierte.
+
+        ``bindings`` ordnet den Parametern der gerade eingesetzten Funktion die bereits
+        eingesetzten Argumente und deren Knotenzahl zu. ``budget`` zählt die Knoten des
+        Ergebnisses, damit verschachtelte Funktionen nicht unbemerkt exponentiell wachsen.
+        """
+        kind = node[0]
+        if kind == NAME and bindings is not None and node[1] in bindings:
+            arg, size = bindings[node[1]]
+            budget.add(size)
+            return arg
+        budget.add(1)
+        if kind in (NUM, NAME):
+            return node
+        if kind == NEG:
+            return (NEG, self._expand(node[1], used, stack, budget, bindings))
+        if kind == BIN:
+            return (BIN, node[1], self._expand(node[2], used, stack, budget, bindings),
+                    self._expand(node[3], used, stack, budget, bindings))
+
+        name = node[1]
+        args = []
+        sizes = []
+        for arg in node[2]:
+            before = budget.count
+            args.append(self._expand(arg, used, stack, budget, bindings))
+            sizes.append(budget.count - before)
+        args = tuple(args)
+        if name in stack:
+            raise CycleError(f'Zirkelbezug: {name} ruft sich selbst auf')
+        if name in self._backend.functions:
+            return (CALL, name, args)
+
+        used.add(name)
+        if name not in self._functions:
+            return (CALL, name, args)  # meldet die Übersetzung als unbekannte Funktion
+        params, body, _ = self._functions[name]
+        if len(args) != len(params):
+            raise TypeError(f'{name}() erwartet {len(params)} Argument(e), erhalten: {len(args)}')
+        # Der Aufruf selbst entfällt, die Argumente zählen bei jeder Verwendung im Rumpf.
+        budget.count -= 1 + sum(sizes)
+        bindings = {param: (arg, size) for param, arg, size in zip(params, args, sizes)}
+        return self._expand(body, used, stack + (name,), budget, bindings)
+
+    def _prepare(self, tree):
+        """Übersetzt eine Formel. Gibt (Programm oder None, Fehler, verwendete Namen,
+        Baum mit eingesetzten Funktionen) zurück."""
+        used = set()
+        try:
+            expanded = self._expand(tree, used, (), _Budget(self.calc.limits.max_operations))
+        except _ERRORS as exc:
+            return None, str(exc) or type(exc).__name__, frozenset(used), None
+
+        uses = frozenset(used | _names(expanded))
+        try:
+            with self._backend.context(self._precision):
+                program = self.calc._translate(expanded, self._backend)
+        except _ERRORS as exc:
+            return None, str(exc) or type(exc).__name__, uses, expanded
+        return program, None, uses, expanded
+
+    def _recompile(self, cells):
+        """Übersetzt die Zellen neu, nachdem sich eine Funktion geändert hat, und gibt sie zurück.
+
+        Würde dabei ein Zirkelbezug entstehen, bleibt alles unverändert (:class:`CycleError`).
+        """
+        prepared = {cell: self._prepare(self._trees[cell]) for cell in cells}
+        overlay = {cell: entry[2] for cell, entry in prepared.items()}
+        for cell, uses in overlay.items():
+            if self._reaches(uses, cell, overlay):
+                raise CycleError(f'Zirkelbezug: {cell} hängt von sich selbst ab')
+        for cell, entry in prepared.items():
+            self._set(cell, *entry)
+        return set(prepared)
+
+    def _restore_function(self, name, previous):
+        if previous is None:
+            del self._functions[name]
+        else:
+            self._functions[name] = previous
+
+    def _reaches(self, start, target, overlay):
+        """Prüft, ob ``target`` von den Namen in ``start`` aus erreichbar ist.
+        ``overlay`` ersetzt die Abhängigkeiten einzelner Zellen (noch nicht übernommen)."""
+        seen = set()
+        stack = list(start)
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name not in seen:
+                seen.add(name)
+                stack.extend(overlay.get(name, self._uses.get(name, ())))
+        return False
+
+    def _set(self, cell, program, error, uses, expanded=None):
+        """Übernimmt das Ergebnis von :meth:`_prepare` und aktualisiert den Graphen."""
+        for name in self._uses.get(cell, ()):
+            self._users[name].discard(cell)
+            if not self._users[name]:
+                del self._users[name]
+        for name in uses:
+            self._users[name].add(cell)
+        self._uses[cell] = uses
+        self._programs[cell] = program
+        self._expanded[cell] = expanded
+        if error is None:
+            self._compile_errors.pop(cell, None)
+        else:
+            self._compile_errors[cell] = error
+
+    # -- Berechnung -------------------------------------------------------------
+
+    def _recompute(self, changed):
+        """Berechnet die Zellen in ``changed`` und alle davon abhängigen neu.
+
+        Die Zellen werden in topologischer Reihenfolge berechnet (Kahn), jede genau
+        einmal. Eine abhängige Zelle wird übersprungen, wenn keine ihrer Eingaben
+        einen neuen Wert erhalten hat. Gibt die berechneten Zellen zurück.
+        """
+        affected = set()
+        stack = list(changed)
+        while stack:
+            name = stack.pop()
+            if name not in affected:
+                affected.add(name)
+                stack.extend(self._users.get(name, ()))
+
+        cells = {name for name in affected if name in self._sources}
+        waiting = {cell: sum(1 for name in self._uses[cell] if name in cells) for cell in cells}
+        ready = deque(sorted(cell for cell, count in waiting.items() if not count))
+        dirty = set(changed)
+        order = []
+        while ready:
+            cell = ready.popleft()
+            if cell in dirty or not dirty.isdisjoint(self._uses[cell]):
+                before = self._values.get(cell, self._errors.get(cell))
+                self._evaluate(cell)
+                after = self._values.get(cell, self._errors.get(cell))
+                order.append(cell)
+                if type(before) is not type(after) or before != after:
+                    dirty.add(cell)
+            for user in self._users.get(cell, ()):
+                if user in waiting:
+                    waiting[user] -= 1
+                    if not waiting[user]:
+                        ready.append(user)
+        return order
+
+    def _evaluate(self, cell):
+        self._values.pop(cell, None)
+        self._errors.pop(cell, None)
+        self.evaluations += 1
+
+        program = self._programs[cell]
+        if program is None:
+            self._errors[cell] = self._compile_errors[cell]
+            return
+        try:
+            self._values[cell] = self._run(program, self._expanded[cell])
+        except _ERRORS as exc:
+            self._errors[cell] = str(exc) or type(exc).__name__
+
+    def _run(self, program, tree):
+        """Führt das Programm einer Formel mit den aktuellen Werten der Zellen aus.
+
+        Beim Übersetzen sind die Werte noch unbekannt, die Kosten werden deshalb hier
+        mit den tatsächlichen Werten geprüft. Sind sie zu hoch, wird wie in
+        :meth:`app.calc.Calc.calculation` näherungsweise mit float gerechnet oder abgelehnt.
+        """
+        unknown = sorted(name for name in program.names if name not in self._sources)
+        if unknown:
+            raise NameError(f'Unbekannte Namen: {", ".join(unknown)}')
+        failed = sorted(name for name in program.names if name not in self._values)
+        if failed:
+            raise ValueError(f'Fehler in: {", ".join(failed)}')
+
+        env = {name: self._values[name] for name in program.names}
+        with self._backend.context(self._precision):
+            estimate = analyze(tree, self.calc.limits, rational=self._backend is FRACTION, values=env,
+                               exact_pow=self._backend is not FLOAT)
+            if not estimate.exceeded:
+                return program.run(env)
+
+            program = self.calc._translate(tree, self._backend, values=env)
+            try:
+                return program.run({name: float(value) for name, value in env.items()})
+            except OverflowError:
+                reasons = '; '.join(estimate.reasons)
+                raise CostLimitError(f'{reasons}; Näherung mit float läuft über') from None
+
+
+class _Budget:
+    """Zählt die Knoten beim Einsetzen der Funktionen (siehe :meth:`Session._expand`)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+
+    def add(self, count):
+        self.count += count
+        if self.limit is not None and self.count > self.limit:
+            raise CostLimitError(f'Ausdruck hat nach dem Einsetzen der Funktionen mehr als '
+                                 f'{self.limit} Knoten (Grenze der Operationen)')
+
+
+def _calls(node):
+    """Gibt die Namen aller aufgerufenen Funktionen im Baum zurück."""
+    calls = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == NEG:
+            stack.append(node[1])
+        elif kind == BIN:
+            stack.extend(node[2:])
+        elif kind == CALL:
+            calls.add(node[1])
+            stack.extend(node[2])
+    return calls
+
+
+def _names(node):
+    """Gibt alle Variablen im Baum zurück."""
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == NAME:
+            names.add(node[1])
+        elif kind == NEG:
+            stack.append(node[1])
+        elif kind == BIN:
+            stack.extend(node[2:])
+        elif kind == CALL:
+            stack.extend(node[2])
+    return names
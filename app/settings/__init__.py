@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Laden und Speichern der Einstellungen (``settings.json``) und des Layouts (``layout.json``).
+
+Beide Dateien werden relativ zu diesem Paket gefunden, unabhängig vom aktuellen
+Verzeichnis. Beim ersten Laden werden sie geprüft (:func:`validate`), die Stile aller
+Themen vorberechnet und alles zusammen als ``marshal``-Schnappschuss in
+``__pycache__`` abgelegt. Weitere Starts lesen nur noch den Schnappschuss, solange
+Änderungszeit und Größe beider JSON-Dateien übereinstimmen.
+
+Themen sind unveränderlich (:class:`FrozenDict`) und über ihren Namen in O(1)
+erreichbar: ``load().themes['Dark']['BTN_NUMBER']``.
+"""
+
+# Builtins
+import json
+import marshal
+import os
+import stat
+import sys
+from collections import namedtuple
+from tempfile import NamedTemporaryFile
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SETTINGS_PATH = os.path.join(DIRECTORY, 'settings.json')
+LAYOUT_PATH = os.path.join(DIRECTORY, 'layout.json')
+
+# Wird erhöht, wenn sich der Aufbau des Schnappschusses ändert.
+SNAPSHOT_VERSION = 1
+
+# Schaltflächenstile, die mit den globalen Einstellungen (Schrift, Rahmen, ...) kombiniert werden.
+BUTTON_STYLES = ('BTN_DEFAULT', 'BTN_NUMBER', 'BTN_OPERATOR', 'BTN_CLEAR')
+
+Snapshot = namedtuple('Snapshot', 'settings layout themes')
+
+_NUMBER = (int, float)
+_OPTIONAL_INT = (int, type(None))
+
+# Erwartete Abschnitte von settings.json und der Typ jedes Eintrags.
+SCHEMA = {
+    'current_theme': str,
+    'cache': {'size': int},
+    'input': {'max_length': int},
+    'numeric': {'mode': str, 'precision': _OPTIONAL_INT},
+    'limits': {'max_digits': int, 'max_operations': int, 'on_exceed': str},
+    'evaluation': {'async': bool, 'timeout': _NUMBER, 'memory_limit_mb': _OPTIONAL_INT},
+    'history': {'enabled': bool, 'path': str, 'seed': int},
+    'diagnostics': {'enabled': bool, 'dump_path': (str, type(None)), 'dump_interval': _NUMBER},
+    'plot': {'expression': str, 'range': list, 'frame_budget_ms': _NUMBER},
+    'global': dict,
+    'themes': list,
+}
+THEME_SCHEMA = dict({'name': str, 'master_bg': str, 'frame_bg': str, 'INPUT': dict},
+                    **{style: dict for style in BUTTON_STYLES})
+LAYOUT_SCHEMA = {'rows': int, 'columns': int, 'buttons': list}
+BUTTON_SCHEMA = {'label': str, 'row': int, 'column': int, 'style': str, 'action': str}
+
+
+class SettingsError(ValueError):
+    """Die Einstellungen entsprechen nicht dem erwarteten Aufbau."""
+
+
+class FrozenDict(dict):
+    """Unveränderliches Dictionary.
+
+    Als Unterklasse von ``dict`` kann es ohne Kopie als ``cnf`` an Tk übergeben werden.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Themen sind unveränderlich')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __repr__(self):
+        return f'FrozenDict({dict.__repr__(self)})'
+
+
+def load(path=SETTINGS_PATH, layout_path=LAYOUT_PATH, use_snapshot=True):
+    """Gibt Einstellungen, Layout und Themen als :data:`Snapshot` zurück.
+
+    ``settings`` und ``layout`` sind bei jedem Aufruf neue, veränderbare Objekte,
+    ``themes`` ordnet jedem Themennamen seine fertigen Widget-Stile zu.
+    """
+    key = _key(path, layout_path)
+    snapshot_path = _snapshot_path(path)
+    if use_snapshot:
+        data = _read_snapshot(snapshot_path, key)
+        if data is not None:
+            return _thaw(*data)
+
+    with open(path, mode='r', encoding='utf-8') as f:
+        settings = json.load(f)
+    with open(layout_path, mode='r', encoding='utf-8') as f:
+        layout = json.load(f)
+    validate(settings, layout)
+    styles = build_styles(settings)
+
+    if use_snapshot:
+        _write_snapshot(snapshot_path, key, (settings, layout, styles))
+    return _thaw(settings, layout, styles)
+
+
+def save(settings, path=SETTINGS_PATH, layout_path=LAYOUT_PATH):
+    """Schreibt die Einstellungen atomar und erneuert den Schnappschuss.
+
+    Die Datei wird zuerst in eine temporäre Datei im selben Verzeichnis geschrieben
+    und dann ersetzt, sodass sie auch bei einem Absturz während des Schreibens nie
+    halb geschrieben ist.
+    """
+    validate(settings)
+    text = json.dumps(settings, indent=4)
+    with NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path),
+                            suffix='.tmp', delete=False) as tmp:
+        try:
+            tmp.write(text)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+            # NamedTemporaryFile legt die Datei nur für den Besitzer lesbar an (0600).
+            if os.path.exists(path):
+                os.chmod(tmp.name, stat.S_IMODE(os.stat(path).st_mode))
+        except BaseException:
+            _remove(tmp.name)
+            raise
+    try:
+        os.replace(tmp.name, path)
+    except BaseException:
+        _remove(tmp.name)
+        raise
+    load(path, layout_path)
+
+
+def validate(settings, layout=None):
+    """Prüft den Aufbau der Einstellungen (und des Layouts) und löst sonst :class:`SettingsError` aus."""
+    _check(settings, SCHEMA, 'settings')
+    names = set()
+    for number, theme in enumerate(settings['themes']):
+        _check(theme, THEME_SCHEMA, f'themes[{number}]')
+        names.add(theme['name'])
+    if settings['current_theme'] not in names:
+        raise SettingsError(f'current_theme: unbekanntes Thema {settings["current_theme"]!r}')
+    _check_choices(settings)
+
+    if layout is not None:
+        _check(layout, LAYOUT_SCHEMA, 'layout')
+        for number, button in enumerate(layout['buttons']):
+            _check(button, BUTTON_SCHEMA, f'layout.buttons[{number}]')
+            if button['style'] not in BUTTON_STYLES:
+                raise SettingsError(f'layout.buttons[{number}].style: unbekannter Stil {button["style"]!r}')
+
+
+def _check_choices(settings):
+    """Prüft Einträge mit festen Werten, die sonst erst beim Start in Calc/CostLimits scheitern."""
+    # Erst hier importiert, damit das Laden aus dem Schnappschuss ohne Rechenkern auskommt.
+    from ..cost import ON_EXCEED
+    from ..numeric import MODES
+
+    for section, name, allowed in (('numeric', 'mode', MODES), ('limits', 'on_exceed', ON_EXCEED)):
+        value = settings[section][name]
+        if value not in allowed:
+            raise SettingsError(f'settings.{section}.{name}: ungültiger Wert {value!r}, '
+                                f'erlaubt sind: {", ".join(allowed)}')
+
+
+def _check(data, schema, where):
+    if not isinstance(data, dict):
+        raise SettingsError(f'{where}: Objekt erwartet')
+    for name, expected in schema.items():
+        if name not in data:
+            raise SettingsError(f'{where}.{name} fehlt')
+        value = data[name]
+        if isinstance(expected, dict):
+            _check(value, expected, f'{where}.{name}')
+        # bool ist eine Unterklasse von int, zählt aber nicht als Zahl.
+        elif not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise SettingsError(f'{where}.{name}: ungültiger Wert {value!r}')
+
+
+def build_styles(settings):
+    """Berechnet für jedes Thema die fertigen Widget-Stile.
+
+    Die Stile der Schaltflächen werden dabei mit den globalen Einstellungen
+    (Breite, Höhe, Schriftart usw.) kombiniert.
+    """
+    styles = {}
+    for theme in settings['themes']:
+        style = dict(theme)
+        for key in BUTTON_STYLES:
+            style[key] = {**theme[key], **settings['global']}
+        styles[theme['name']] = style
+    return styles
+
+
+def _thaw(settings, layout, styles):
+    themes = {name: FrozenDict({key: FrozenDict(value) if isinstance(value, dict) else value
+                                for key, value in style.items()})
+              for name, style in styles.items()}
+    return Snapshot(settings, layout, themes)
+
+
+# -- Schnappschuss --------------------------------------------------------------
+
+def _key(*paths):
+    """Änderungszeit und Größe aller Dateien; ändert sich eine, ist der Schnappschuss veraltet."""
+    key = [SNAPSHOT_VERSION]
+    for path in paths:
+        stat = os.stat(path)
+        key.extend((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def _snapshot_path(path):
+    # marshal ist nur innerhalb derselben Python-Version kompatibel, wie .pyc-Dateien.
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), '__pycache__', f'{name}.{sys.implementation.cache_tag}.marshal')
+
+
+def _read_snapshot(snapshot_path, key):
+    try:
+        with open(snapshot_path, mode='rb') as f:
+            stored_key, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return data if stored_key == key else None
+
+
+def _write_snapshot(snapshot_path, key, data):
+    """Schreibt den Schnappschuss atomar; ohne Schreibrechte wird er übersprungen."""
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        with NamedTemporaryFile('wb', dir=os.path.dirname(snapshot_path),
+                                suffix='.tmp', delete=False) as tmp:
+            try:
+                tmp.write(marshal.dumps((key, data)))
+            except BaseException:
+                _remove(tmp.name)
+                raise
+        try:
+            os.replace(tmp.name, snapshot_path)
+        except OSError:
+            _remove(tmp.name)
+            raise
+    except OSError:
+        pass
+
+
+def _remove(path):
+    """Löscht eine übrig gebliebene temporäre Datei."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Spaltenweise Ausführung übersetzter Programme über ganze Wertereihen.
+
+Ist NumPy installiert, wird jede Instruktion als ufunc auf die kompletten
+Spalten angewendet. Andernfalls arbeitet jede Instruktion mit ``map`` über
+``array('d')``-Spalten, sodass die Schleife pro Element in C läuft und das
+Programm nur einmal pro Spalte und nicht einmal pro Zeile interpretiert wird.
+
+Beide Wege liefern dieselben Werte: Ungültige Einzelwerte (z.B. ``log(-1)``),
+Polstellen (``1/0``, ``log(0)``) und Überläufe (``exp(1000)``) ergeben ``nan``, wie
+ein Fehler der Skalarfunktion. Nur ``+``, ``-`` und ``*`` laufen wie in Python nach
+``±inf`` über, und unendliche Eingaben bleiben unendlich, wo Python es erlaubt.
+"""
+
+# Builtins
+import math
+import operator
+from array import array
+from itertools import repeat
+
+# Local
+from .compiler import BINARY, FETCH, FUNCTIONS, LOAD, PUSH, STORE, UNARY
+
+try:
+    import numpy
+except ImportError:  # NumPy ist optional
+    numpy = None
+
+
+# Größtes n, für das n! noch als float darstellbar ist.
+_FACTORIAL_MAX = 170
+
+# Operatoren und Funktionen, die in Python bei einem Überlauf ±inf ergeben, statt einen
+# Fehler auszulösen.
+_OVERFLOW_TO_INF = {operator.add, operator.sub, operator.mul, operator.neg, operator.pos,
+                    FUNCTIONS['degrees']}
+# Divisionen laufen in Python ebenfalls über, melden aber die Division durch 0.
+_DIVISIONS = {operator.truediv, operator.floordiv, operator.mod}
+
+
+def _constant(value):
+    """Konstante des Programms als float; zu große Ganzzahlen (z.B. ``10**400``) ergeben ``nan``."""
+    try:
+        return float(value)
+    except OverflowError:
+        return math.nan
+
+
+def _safe(func):
+    """Umhüllt eine Skalarfunktion so, dass Fehler und nicht reelle Ergebnisse
+    (z.B. ``(-1)**0.5``) als ``nan`` zurückgegeben werden."""
+    def wrapper(*args):
+        try:
+            result = func(*args)
+        except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+            return math.nan
+        return math.nan if isinstance(result, complex) else result
+    return wrapper
+
+
+def _float_factorial(x):
+    """``factorial`` für Spaltenwerte, die immer als ``float`` vorliegen."""
+    if not float(x).is_integer():
+        raise ValueError('factorial() akzeptiert nur ganzzahlige Werte')
+    # Ab 171! läuft float über; die exakte Berechnung wäre nur teuer.
+    if x > _FACTORIAL_MAX:
+        raise OverflowError('factorial() zu groß für float')
+    return float(math.factorial(int(x)))
+
+
+# Ersetzungen für Skalarfunktionen, die mit ``float``-Argumenten nicht funktionieren.
+_COLUMN_FUNCTIONS = {FUNCTIONS['factorial']: _float_factorial}
+
+
+def _numpy_functions():
+    """Ordnet jeder Skalarfunktion aus :data:`FUNCTIONS` ihr NumPy-Gegenstück zu."""
+    np = numpy
+
+    def from_scalar(func):
+        ufunc = np.frompyfunc(_safe(func), 1, 1)
+        return lambda x: np.asarray(ufunc(x), dtype=float)
+
+    def log(x, base=None):
+        if base is None:
+            return np.log(x)
+        # math.log lehnt die Basis 0 ab, np.log(0) wäre -inf und das Ergebnis 0.
+        return np.log(x) / np.log(np.where(np.equal(base, 0), np.nan, base))
+
+    names = {
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+        'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+        'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+        'asinh': np.arcsinh, 'acosh': np.arccosh, 'atanh': np.arctanh,
+        'sqrt': np.sqrt, 'exp': np.exp, 'expm1': np.expm1, 'log': log,
+        'log2': np.log2, 'log10': np.log10, 'log1p': np.log1p,
+        'degrees': np.degrees, 'radians': np.radians, 'fabs': np.fabs,
+        'floor': np.floor, 'ceil': np.ceil, 'pow': np.power, 'hypot': np.hypot,
+        'abs': np.abs,
+    }
+    # Für gamma, lgamma, erf, erfc und factorial gibt es keine ufunc in NumPy.
+    names['factorial'] = from_scalar(_float_factorial)
+    for name in ('gamma', 'lgamma', 'erf', 'erfc'):
+        names[name] = from_scalar(FUNCTIONS[name])
+
+    return {FUNCTIONS[name]: func for name, func in names.items()}
+
+
+_NUMPY_FUNCTIONS = _numpy_functions() if numpy is not None else None
+
+
+def _is_column(value):
+    return isinstance(value, array)
+
+
+def _apply(func, args, length):
+    """Wendet ``func`` elementweise auf Spalten und Skalare an."""
+    if not any(_is_column(a) for a in args):
+        return _safe(func)(*args)
+
+    iterables = [a if _is_column(a) else repeat(a, length) for a in args]
+    try:
+        return array('d', map(func, *iterables))
+    except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+        # Auch ein komplexes Ergebnis landet hier: array('d') lehnt es mit TypeError ab.
+        iterables = [a if _is_column(a) else repeat(a, length) for a in args]
+        return array('d', map(_safe(func), *iterables))
+
+
+def _run_python(program, columns, length):
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    slots = [None] * program.slots
+    for op, arg in program.code:
+        if op == PUSH:
+            push(_constant(arg))
+        elif op == LOAD:
+            push(columns[arg])
+        elif op == BINARY:
+            right = pop()
+            stack[-1] = _apply(arg, (stack[-1], right), length)
+        elif op == UNARY:
+            stack[-1] = _apply(arg, (stack[-1],), length)
+        elif op == FETCH:
+            push(slots[arg])
+        elif op == STORE:
+            slots[arg] = stack[-1]
+        else:
+            func, count = arg
+            split = len(stack) - count
+            args = tuple(stack[split:])
+            del stack[split:]
+            push(_apply(_COLUMN_FUNCTIONS.get(func, func), args, length))
+
+    result = stack[0]
+    if not _is_column(result):
+        result = array('d', repeat(float(result), length))
+    return result
+
+
+def _run_numpy(program, columns, length):
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    slots = [None] * program.slots
+    with numpy.errstate(all='ignore'):
+        for op, arg in program.code:
+            if op == PUSH:
+                # numpy.float64 statt float, damit auch Konstanten nach den Regeln von NumPy rechnen.
+                push(numpy.float64(_constant(arg)))
+            elif op == LOAD:
+                push(columns[arg])
+            elif op == BINARY:
+                right = pop()
+                left = stack[-1]
+                if arg is operator.pow:
+                    base = numpy.asarray(left, dtype=float)
+                    result = numpy.power(base, right)
+                    # Wie in Python ist (-inf)**y mit nicht ganzzahligem y gleich inf**y, nicht nan.
+                    result = numpy.where(numpy.isneginf(base) & (numpy.floor(right) != right),
+                                         numpy.power(numpy.inf, right), result)
+                else:
+                    result = arg(left, right)
+                if arg in _DIVISIONS:
+                    result = numpy.where(numpy.equal(right, 0), numpy.nan, result)
+                elif arg not in _OVERFLOW_TO_INF:
+                    result = _infinite_to_nan(result, (left, right))
+                stack[-1] = result
+            elif op == UNARY:
+                result = arg(stack[-1])
+                stack[-1] = result if arg in _OVERFLOW_TO_INF else _infinite_to_nan(result, (stack[-1],))
+            elif op == FETCH:
+                push(slots[arg])
+            elif op == STORE:
+                slots[arg] = stack[-1]
+            else:
+                func, count = arg
+                split = len(stack) - count
+                args = stack[split:]
+                del stack[split:]
+                result = _NUMPY_FUNCTIONS[func](*args)
+                push(result if func in _OVERFLOW_TO_INF else _infinite_to_nan(result, args))
+
+    return numpy.broadcast_to(numpy.asarray(stack[0], dtype=float), (length,)).copy()
+
+
+def _infinite_to_nan(result, args):
+    """Setzt ±inf aus endlichen Eingaben auf ``nan``, wo die Skalarfunktion einen Fehler meldet."""
+    result = numpy.asarray(result, dtype=float)
+    infinite = numpy.isinf(result)
+    if not infinite.any():
+        return result
+    for arg in args:
+        infinite &= numpy.isfinite(arg)
+    return numpy.where(infinite, numpy.nan, result)
+
+
+def evaluate_columns(program, columns, use_numpy=None):
+    """Führt ``program`` für jede Zeile der übergebenen Spalten aus.
+
+    ``columns`` ordnet jedem Variablennamen eine Sequenz gleicher Länge oder einen
+    Skalar zu. Das Ergebnis ist ein ``numpy.ndarray`` bzw. ein ``array('d')``.
+    """
+    missing = program.names.difference(columns)
+    if missing:
+        raise NameError(f'Keine Werte für: {", ".join(sorted(missing))}')
+
+    lengths = {len(v) for v in columns.values() if not isinstance(v, (int, float))}
+    if len(lengths) > 1:
+        raise ValueError('Alle Spalten müssen dieselbe Länge haben')
+    length = lengths.pop() if lengths else 1
+
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy:
+        if numpy is None:
+            raise ImportError('NumPy ist nicht installiert')
+        prepared = {name: numpy.float64(value) if isinstance(value, (int, float)) else numpy.asarray(value, dtype=float)
+                    for name, value in columns.items()}
+        return _run_numpy(program, prepared, length)
+
+    prepared = {name: float(value) if isinstance(value, (int, float)) else array('d', value)
+                for name, value in columns.items()}
+    return _run_python(program, prepared, length)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Auswertung in einem eigenen Prozess, damit die Oberfläche nie blockiert.
+
+:class:`EvaluationWorker` hält einen Arbeitsprozess mit eigenem :class:`Calc`
+bereit. Aufträge werden über eine Pipe geschickt und der Reihe nach bearbeitet,
+das Ergebnis wird mit :meth:`EvaluationWorker.poll` abgeholt, ohne zu warten.
+Mehrere Fenster können sich einen Arbeitsprozess teilen, jedes fragt nur seine
+eigene Auftragsnummer ab. Ein laufender Auftrag kann jederzeit abgebrochen werden;
+dabei wird der Prozess neu gestartet und die wartenden Aufträge erneut geschickt.
+"""
+
+# Builtins
+import multiprocessing
+import threading
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # Nicht verfügbar unter Windows
+    resource = None
+
+
+def _serve(conn, cache_size, mode, precision, limits, memory_limit):
+    """Hauptschleife des Arbeitsprozesses."""
+    # Import im Kindprozess, damit der Start schnell bleibt.
+    from .calc import Calc
+
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    calc = Calc(cache_size=cache_size, mode=mode, precision=precision, limits=limits)
+    while True:
+        try:
+            job_id, expr = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        try:
+            result = calc.calculation(expr)
+        except MemoryError:
+            result = 'Error'
+        conn.send((job_id, result))
+
+
+class EvaluationWorker:
+    """Wertet Ausdrücke in einem Arbeitsprozess aus.
+
+    ``memory_limit`` begrenzt den Adressraum des Prozesses in Bytes (nur POSIX).
+    """
+
+    def __init__(self, cache_size=256, mode='float', precision=None, limits=None, memory_limit=None):
+        self._args = (cache_size, mode, precision, limits, memory_limit)
+        # 'spawn' statt 'fork', damit der Kindprozess keine Tk-Verbindung erbt.
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._job_id = 0
+        # Abgeschickte Aufträge ohne Ergebnis in Reihenfolge: Nummer -> Ausdruck.
+        # Der erste ist der, den der Prozess gerade bearbeitet.
+        self._pending = OrderedDict()
+        self._results = {}
+        self._lock = threading.RLock()
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def start(self):
+        """Startet den Arbeitsprozess, falls er nicht bereits läuft."""
+        if self._process is not None and self._process.is_alive():
+            return
+
+        parent, child = self._context.Pipe()
+        self._process = self._context.Process(target=_serve, args=(child,) + self._args,
+                                              name='calc-worker', daemon=True)
+        self._process.start()
+        child.close()
+        self._conn = parent
+
+    def submit(self, expr):
+        """Schickt einen Ausdruck an den Arbeitsprozess und gibt die Auftragsnummer zurück."""
+        with self._lock:
+            self.start()
+            self._job_id += 1
+            self._pending[self._job_id] = expr
+            self._conn.send((self._job_id, expr))
+            return self._job_id
+
+    def poll(self, job_id=None):
+        """Gibt das Ergebnis des Auftrags ``job_id`` (Standard: des zuletzt abgeschickten)
+        zurück oder ``None``, wenn es noch fehlt."""
+        with self._lock:
+            job_id = self._job_id if job_id is None else job_id
+            if job_id in self._pending:
+                self._drain()
+            return self._results.pop(job_id, None)
+
+    def cancel(self, job_id=None):
+        """Bricht den Auftrag ``job_id`` (Standard: den zuletzt abgeschickten) ab.
+
+        Läuft er gerade, wird der Arbeitsprozess beendet; die übrigen wartenden
+        Aufträge werden an den neu gestarteten Prozess geschickt.
+        """
+        with self._lock:
+            job_id = self._job_id if job_id is None else job_id
+            self._drain()
+            self._results.pop(job_id, None)
+            if job_id not in self._pending:
+                return
+
+            running = next(iter(self._pending)) == job_id
+            del self._pending[job_id]
+            if running:
+                self._stop()
+                if self._pending:
+                    self.start()
+                    for waiting in self._pending.items():
+                        self._conn.send(waiting)
+
+    def _drain(self):
+        """Übernimmt alle fertigen Ergebnisse aus der Pipe, ohne zu warten."""
+        try:
+            while self._conn is not None and self._conn.poll():
+                done, result = self._conn.recv()
+                # Ergebnisse abgebrochener Aufträge werden verworfen.
+                if self._pending.pop(done, None) is not None:
+                    self._results[done] = result
+        except (EOFError, OSError):
+            # Der Prozess wurde beendet, z.B. vom Betriebssystem wegen Speichermangels.
+            self._stop()
+            self._results.update(dict.fromkeys(self._pending, 'Error'))
+            self._pending.clear()
+
+    def close(self):
+        with self._lock:
+            self._pending.clear()
+            self._results.clear()
+            self._stop()
+
+    def _stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=1)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Misst ``Calc.calculation`` für typische Eingaben des Taschenrechners.
+
+    python benchmarks/calculation.py
+
+``repeated`` wertet immer denselben Ausdruck aus (Ergebnis aus dem Zwischenspeicher),
+``unique`` bei jedem Aufruf einen neuen (übersetzen und ausführen). Die
+wissenschaftlichen Funktionen werden aus ``app/settings/layout.json`` gelesen,
+damit jede Schaltfläche der Oberfläche gemessen wird.
+"""
+
+# Builtins
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Local
+from app.calc import Calc  # noqa: E402
+from app.compiler import FUNCTIONS, compile_tree, parse  # noqa: E402
+from app.optimizer import optimize  # noqa: E402
+
+ARITHMETIC = '(12.5+7)*3-8/4'
+
+# Argument, das im Definitionsbereich aller Funktionen der Tastatur liegt (acosh braucht >= 1).
+FUNCTION_ARGUMENT = 1.5
+
+
+def scientific_functions():
+    """Gibt alle Funktionen zurück, die im Layout einer Schaltfläche zugeordnet sind."""
+    with open(os.path.join(ROOT, 'app', 'settings', 'layout.json'), mode='r', encoding='utf-8') as f:
+        layout = json.load(f)
+    return [key['token'] for key in layout['buttons'] if key.get('token') in FUNCTIONS]
+
+
+def nested_expression(depth=40):
+    """Verschachtelter Ausdruck der Form ((((1+1)*2+2)*3 ...)."""
+    expr = '1'
+    for i in range(1, depth + 1):
+        expr = f'({expr}+{i})*{i % 7 + 1}'
+    return expr
+
+
+# Anzahl der verketteten Formeln im Blatt (siehe app.session).
+SHEET_SIZE = 500
+
+# Generierte Formel mit wiederholten Teilausdrücken, wie bei Stapelauswertungen.
+BATCH_FORMULA = '+'.join(f'sin(x)**{i}*cos(y)+sqrt(x*x+y*y)/{i}' for i in range(1, 9))
+
+
+def _per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def _unique(calc, template, number):
+    """Misst ``number`` verschiedene Ausdrücke, damit kein Zwischenspeicher trifft."""
+    counter = iter(range(10 ** 9))
+    return _per_call_us(lambda: calc.calculation(template.format(next(counter))), number)
+
+
+def measure(number=2000):
+    results = {}
+
+    calc = Calc()
+    results['arithmetic'] = {
+        'repeated_us': _per_call_us(lambda: calc.calculation(ARITHMETIC), number),
+        'unique_us': _unique(Calc(), '(12.5+{})*3-8/4', number),
+    }
+
+    results['functions'] = {}
+    for name in scientific_functions():
+        expr = f'{name}({FUNCTION_ARGUMENT})'
+        results['functions'][name] = {
+            'repeated_us': _per_call_us(lambda: calc.calculation(expr), number),
+            'unique_us': _unique(Calc(), f'{name}({FUNCTION_ARGUMENT}+{{}}e-9)', number // 4),
+        }
+
+    nested = nested_expression()
+    results['nested'] = {
+        'repeated_us': _per_call_us(lambda: calc.calculation(nested), number),
+        'unique_us': _unique(Calc(), nested + '+{}', number // 4),
+    }
+
+    # Ausführung einer übersetzten Formel je Zeile, ohne und mit Optimierung.
+    tree = parse(BATCH_FORMULA)
+    row = {'x': 0.5, 'y': 1.5}
+    plain, optimized = compile_tree(tree), compile_tree(optimize(tree))
+    results['batch_formula'] = {
+        'plain_row_us': _per_call_us(lambda: plain.run(row), number),
+        'optimized_row_us': _per_call_us(lambda: optimized.run(row), number),
+    }
+
+    # Blatt mit verketteten Formeln: Änderung am Anfang bzw. an einer einzelnen Zelle.
+    session = Calc().session()
+    session.define('a0', '1')
+    for i in range(1, SHEET_SIZE):
+        session.define(f'a{i}', f'a{i - 1}*1.0001+sqrt(a0)')
+    session.define('single', 'a0+1')
+    values = iter(range(1, 10 ** 9))
+    results['sheet'] = {
+        'edit_root_us': _per_call_us(lambda: session.define('a0', str(next(values))), 20),
+        'edit_leaf_us': _per_call_us(lambda: session.define('single', f'a0+{next(values)}'), number),
+    }
+
+    # Durchsatz über eine Mischung mit 10 % Wiederholungen, wie bei einer Stapelauswertung.
+    exprs = [f'{i % (number * 9 // 10)}*3+sqrt(2)' for i in range(number)]
+
+    def mixed():
+        fresh = Calc()
+        for expr in exprs:
+            fresh.calculation(expr)
+
+    results['mixed_per_second'] = number / min(timeit.repeat(mixed, number=1, repeat=3))
+
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
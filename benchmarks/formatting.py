@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Misst die Formatierung der Ergebnisse (``Calc._format_result``).
+
+    python benchmarks/formatting.py
+"""
+
+# Builtins
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local
+from app.calc import Calc  # noqa: E402
+
+VALUES = {
+    'small_int': 42,
+    'large_int': 2 ** 200,
+    'short_float': 0.5,
+    'long_float': 1 / 3,
+    'decimal': Decimal(1) / Decimal(7),
+    'fraction': Fraction(22, 7),
+}
+
+
+def measure(number=50000):
+    format_result = Calc._format_result
+    results = {}
+    for label, value in VALUES.items():
+        seconds = min(timeit.repeat(lambda: format_result(value), number=number, repeat=5))
+        results[f'{label}_us'] = seconds / number * 1e6
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
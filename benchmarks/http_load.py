@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Lasttest für den HTTP/JSON-Dienst (``python -m app serve``).
+
+    python benchmarks/http_load.py [--url http://127.0.0.1:8080] [--clients 8] [--requests 500]
+
+Ohne ``--url`` wird ein Dienst in einem eigenen Thread gestartet. Jeder Client
+hält eine keep-alive-Verbindung offen und schickt abwechselnd einzelne Ausdrücke
+und Stapel. Ausgegeben werden Durchsatz, Latenzen und die Zähler des Dienstes.
+"""
+
+# Builtins
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local
+from app.server import CalcServer  # noqa: E402
+
+EXPRESSIONS = ['(1.25+3.5)*7-2/3', 'sqrt(2)+log(10)', 'sin(pi/4)**2', '2**64+3**40', 'factorial(20)/3']
+
+
+def _start_local_server():
+    """Startet einen Dienst auf einem freien Port und gibt dessen Adresse zurück."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = CalcServer()
+    thread = threading.Thread(target=asyncio.run, args=(server.serve('127.0.0.1', port),), daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return '127.0.0.1', port
+
+
+def _client(host, port, requests, batch, latencies):
+    conn = http.client.HTTPConnection(host, port)
+    headers = {'Content-Type': 'application/json'}
+    for index in range(requests):
+        if batch and index % 2:
+            payload = {'exprs': [f'{expr}+{index}' for expr in EXPRESSIONS] * (batch // len(EXPRESSIONS))}
+        else:
+            payload = {'expr': EXPRESSIONS[index % len(EXPRESSIONS)]}
+        start = time.perf_counter()
+        conn.request('POST', '/eval', json.dumps(payload), headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f'HTTP {response.status}')
+    conn.close()
+
+
+def _stats(host, port):
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/stats')
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats
+
+
+def measure(host, port, clients=8, requests=500, batch=50):
+    latencies = []
+    threads = [threading.Thread(target=_client, args=(host, port, requests, batch, latencies))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p99': round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'server': _stats(host, port),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None, help='Adresse eines laufenden Dienstes')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='Anfragen pro Client')
+    parser.add_argument('--batch', type=int, default=50, help='Ausdrücke pro Stapel, 0 für keine Stapel')
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = _start_local_server()
+
+    print(json.dumps(measure(host, port, args.clients, args.requests, args.batch), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Spielt Tastenfolgen über die Ereignisbehandlung des ``Calculator`` ab.
+
+    python benchmarks/keypress.py
+
+Jede Taste wird wie in ``Calculator._on_keypress`` über die Layout-Tabelle auf ihre
+Methode abgebildet und aufgerufen; die Berechnung läuft synchron (``evaluation.async``
+ist abgeschaltet). Mit Display wird ein verstecktes Tk-Fenster verwendet, ohne Display
+ersetzt ein einfaches Textfeld den ``tk.Entry``, gemessen werden dann nur die
+Methoden des Taschenrechners und das Eingabemodell.
+"""
+
+# Builtins
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Local
+from app.calc import Calc  # noqa: E402
+from app.input_model import InputBuffer  # noqa: E402
+
+# Tastenfolgen nach Beschriftung der Schaltflächen.
+SEQUENCES = {
+    'arithmetic': ['1', '2', '.', '5', '+', '7', '*', '3', '-', '8', '/', '4', '='],
+    'scientific': ['sin', '(', '1', '.', '5', ')', '+', 'log', '(', '2', ')', '='],
+    'parentheses': ['(', '(', '1', '+', '2', ')', '*', '(', '3', '+', '4', ')', ')', '='],
+    'edit': ['1', '2', '3', '4', 'log10', '<', '<', '<', '5', '<', 'C'],
+    'result_chain': ['9', '/', '7', '=', '*', '7', '=', '<', '<', '<', '+', '1', '='],
+}
+
+
+class _TextEntry:
+    """Ersatz für ``tk.Entry`` ohne Display, unterstützt nur die verwendeten Methoden."""
+
+    def __init__(self):
+        self.text = ''
+
+    def insert(self, index, text):
+        self.text = text + self.text if index == 0 else self.text + text
+
+    def delete(self, first, last=None):
+        self.text = self.text[:first]
+
+
+def _headless_calculator():
+    from app.Calculator import Calculator
+
+    calculator = Calculator.__new__(Calculator)
+    snapshot = Calculator._load_settings()
+    calculator.settings = snapshot.settings
+    calculator.layout = snapshot.layout
+    calculator.calc = Calc(cache_size=calculator.settings['cache']['size'])
+    calculator._worker = None
+    calculator._history = None
+    calculator._eval_started = None
+    calculator._input = InputBuffer(max_length=calculator.settings['input']['max_length'])
+    calculator._entry = _TextEntry()
+
+    keys = {}
+    for key in calculator.layout['buttons']:
+        action = Calculator._ACTIONS.get(key['action'])
+        if action is not None:
+            keys[key['label']] = (getattr(calculator, action), key.get('token'))
+    return calculator, keys, None
+
+
+def _tk_calculator():
+    import tkinter as tk
+    from app.Calculator import Calculator
+
+    class SyncCalculator(Calculator):
+        @staticmethod
+        def _load_settings():
+            snapshot = Calculator._load_settings()
+            settings = snapshot.settings
+            settings['evaluation'] = dict(settings['evaluation'], **{'async': False})
+            # Die Messung soll den Verlauf des Benutzers weder lesen noch verändern.
+            settings['history'] = dict(settings['history'], enabled=False)
+            return snapshot
+
+    master = tk.Tk()
+    master.withdraw()
+    calculator = SyncCalculator(master)
+    while 'scientific' not in calculator._panels:
+        master.update()
+
+    keys = {button.cget('text'): entry for button, entry in calculator._keys.items()}
+    return calculator, keys, master
+
+
+def _replay(keys, sequence, master):
+    for label in sequence:
+        handler, token = keys[label]
+        if token is None:
+            handler()
+        else:
+            handler(token)
+        if master is not None:
+            master.update_idletasks()
+
+
+def measure(rounds=500):
+    try:
+        calculator, keys, master = _tk_calculator()
+        results = {'entry': 'tk'}
+    except Exception:  # tkinter fehlt oder kein Display
+        calculator, keys, master = _headless_calculator()
+        results = {'entry': 'headless'}
+
+    for label, sequence in SEQUENCES.items():
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                calculator._clear_input()
+                _replay(keys, sequence, master)
+            best = min(best, time.perf_counter() - start)
+        results[label] = {
+            'keypress_us': best / (rounds * (len(sequence) + 1)) * 1e6,
+            'sequence_us': best / rounds * 1e6,
+            'display': calculator._input.text,
+        }
+
+    if master is not None:
+        master.destroy()
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
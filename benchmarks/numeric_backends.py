@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Vergleicht die Kosten der Zahlensysteme float, decimal und fraction.
+
+    python benchmarks/numeric_backends.py
+
+Für jeden Ausdruck wird einmal die Übersetzung und Ausführung (ohne Zwischenspeicher)
+und einmal nur die Ausführung eines bereits übersetzten Programms gemessen.
+"""
+
+# Builtins
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local
+from app.calc import Calc  # noqa: E402
+
+EXPRESSIONS = {
+    'arithmetic': '(1.25+3.5)*7-2/3',
+    'power': '2**64+3**40',
+    'functions': 'sqrt(2)+log(10)+exp(1)',
+    'mixed': 'sin(0.5)*(1/3+1/7)**2',
+}
+
+BACKENDS = [('float', None), ('decimal', 28), ('decimal', 100), ('fraction', None)]
+
+
+def measure(number=2000):
+    results = {}
+    for mode, precision in BACKENDS:
+        name = mode if precision is None else f'{mode}-{precision}'
+        results[name] = {}
+        for label, expr in EXPRESSIONS.items():
+            cold = Calc(cache_size=0)
+            warm = Calc()
+            program = warm.compile(expr, mode=mode, precision=precision)
+            backend, _ = warm._backend(mode, precision)
+
+            def run():
+                with backend.context(precision):
+                    program.run()
+
+            compile_and_run = min(timeit.repeat(
+                lambda: cold.calculation(expr, mode=mode, precision=precision), number=number, repeat=3))
+            run_only = min(timeit.repeat(run, number=number, repeat=3))
+            results[name][label] = {
+                'compile_and_run_us': compile_and_run / number * 1e6,
+                'run_only_us': run_only / number * 1e6,
+            }
+
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
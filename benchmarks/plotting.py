@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Misst die adaptive Abtastung des Funktionsgraphen (``app.plotting``).
+
+    python benchmarks/plotting.py
+
+``cold`` tastet einen Bereich mit leerem Zwischenspeicher ab, ``pan`` verschiebt ihn
+um ein Zehntel und ``zoom`` vergrößert um den Faktor 2, beide mit den gemerkten
+Werten. Die Auflösung entspricht einer 640x400 Pixel großen Zeichenfläche.
+"""
+
+# Builtins
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local
+from app.plotting import Sampler  # noqa: E402
+
+EXPRESSIONS = ['sin(x)', 'gamma(x)', 'erf(x)*exp(-x*x/50)', 'tan(x)']
+OPTIONS = {'points': 640 // 8, 'tolerance': 0.5 / 400}
+
+
+def _ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def measure():
+    results = {}
+    for expr in EXPRESSIONS:
+        points = len(Sampler(expr).sample(-10, 10, **OPTIONS).xs)
+
+        def cold():
+            Sampler(expr).sample(-10, 10, **OPTIONS)
+
+        warm = Sampler(expr)
+        warm.sample(-10, 10, **OPTIONS)
+        results[expr] = {
+            'cold_ms': _ms(cold),
+            'pan_ms': _ms(lambda: warm.sample(-8, 12, **OPTIONS)),
+            'zoom_ms': _ms(lambda: warm.sample(-3, 7, **OPTIONS)),
+            'points': points,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Führt alle Benchmarks aus und vergleicht sie mit einer gespeicherten Basislinie.
+
+    python benchmarks/run.py                           alle Messungen als JSON ausgeben
+    python benchmarks/run.py --save baseline.json      Ergebnis als Basislinie speichern
+    python benchmarks/run.py --baseline baseline.json  mit der Basislinie vergleichen
+    python benchmarks/run.py --only calculation,keypress
+
+Verglichen werden alle Kennzahlen, deren Name auf ``_ms`` oder ``_us`` (kleiner ist
+besser) bzw. ``_per_second`` (größer ist besser) endet. Verschlechtert sich eine
+Kennzahl um mehr als ``--tolerance``, wird sie als Regression gemeldet und das
+Skript endet mit dem Rückgabewert 1.
+"""
+
+# Builtins
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Local
+import calculation  # noqa: E402
+import formatting  # noqa: E402
+import keypress  # noqa: E402
+import numeric_backends  # noqa: E402
+import plotting  # noqa: E402
+import startup  # noqa: E402
+import windows_memory  # noqa: E402
+
+SUITES = {
+    'calculation': calculation.measure,
+    'formatting': formatting.measure,
+    'keypress': keypress.measure,
+    'numeric_backends': numeric_backends.measure,
+    'plotting': plotting.measure,
+    'startup': startup.measure,
+    'windows_memory': windows_memory.measure,
+}
+
+# Erlaubte Verschlechterung gegenüber der Basislinie (0.25 = 25 %).
+DEFAULT_TOLERANCE = 0.25
+
+
+def flatten(results, prefix=''):
+    """Wandelt verschachtelte Ergebnisse in ``{'suite.gruppe.kennzahl': wert}`` um."""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _direction(name):
+    """1 wenn kleinere Werte besser sind, -1 wenn größere besser sind, sonst 0."""
+    if name.endswith(('_ms', '_us')):
+        return 1
+    if name.endswith('_per_second'):
+        return -1
+    return 0
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Vergleicht alle Kennzahlen mit der Basislinie.
+
+    Gibt ``(vergleich, regressionen)`` zurück; ``change`` ist die relative
+    Veränderung, positiv bedeutet schlechter.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    comparison, regressions = {}, []
+    for name, value in current.items():
+        direction = _direction(name)
+        old = previous.get(name)
+        if not direction or not isinstance(old, (int, float)) or not old:
+            continue
+
+        change = (value - old) / old * direction
+        comparison[name] = {'baseline': old, 'current': value, 'change': round(change, 4)}
+        if change > tolerance:
+            regressions.append(name)
+
+    return comparison, regressions
+
+
+def run(suites):
+    results = {}
+    for name in suites:
+        start = time.perf_counter()
+        results[name] = SUITES[name]()
+        print(f'{name}: {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks des Taschenrechners')
+    parser.add_argument('--only', default=','.join(SUITES),
+                        help=f'Kommagetrennte Auswahl aus: {", ".join(SUITES)}')
+    parser.add_argument('--baseline', default=None, help='JSON-Datei mit der Basislinie')
+    parser.add_argument('--save', default=None, help='Speichert das Ergebnis als Basislinie')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Erlaubte Verschlechterung (Standard: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args(argv)
+
+    suites = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f'Unbekannte Benchmarks: {", ".join(sorted(unknown))}')
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': run(suites),
+    }
+
+    if args.baseline:
+        with open(args.baseline, mode='r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'], report['regressions'] = compare(
+            report['results'], baseline['results'], args.tolerance)
+
+    if args.save:
+        with open(args.save, mode='w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+    print(json.dumps(report, indent=4))
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Misst die Startzeit des Taschenrechners.
+
+    python benchmarks/startup.py
+
+Gemessen werden der Import von ``app.calc`` (ohne tkinter), das Laden der
+Einstellungen aus JSON bzw. aus dem Schnappschuss (``app.settings``) sowie die Zeit bis
+zum ersten gezeichneten Fenster und bis zur vollständigen wissenschaftlichen
+Tastatur. Jede Messung läuft in einem eigenen Interpreter, damit keine bereits
+importierten Module das Ergebnis verfälschen. Ohne Display wird die GUI-Messung
+übersprungen.
+
+Einstellungen und Layout werden in ein temporäres Verzeichnis kopiert, das auch als
+``HOME`` dient; der Verlauf ist abgeschaltet. So bleiben ``~/.malia-calculator`` und
+der Schnappschuss im Projekt unberührt.
+"""
+
+# Builtins
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Zielwert für die Zeit bis zum ersten Fenster in Millisekunden.
+FIRST_FRAME_TARGET_MS = 150
+
+_IMPORT_SNIPPET = '''
+import time, sys
+t0 = time.perf_counter()
+import app.calc
+print((time.perf_counter() - t0) * 1000, 'tkinter' in sys.modules)
+'''
+
+_SETTINGS_SNIPPET = '''
+import sys, time
+from app import settings
+paths = sys.argv[1:3]
+t0 = time.perf_counter()
+settings.load(*paths, use_snapshot=False)
+t1 = time.perf_counter()
+settings.load(*paths)
+t2 = time.perf_counter()
+settings.load(*paths)
+print((t1 - t0) * 1000, (time.perf_counter() - t2) * 1000)
+'''
+
+_GUI_SNIPPET = '''
+import sys, time
+t0 = time.perf_counter()
+import tkinter as tk
+from app import settings
+from app.Calculator import Calculator
+
+class IsolatedCalculator(Calculator):
+    @staticmethod
+    def _load_settings():
+        snapshot = settings.load(*sys.argv[1:3])
+        snapshot.settings['history'] = dict(snapshot.settings['history'], enabled=False)
+        return snapshot
+
+master = tk.Tk()
+calc = IsolatedCalculator(master)
+master.update()
+first_frame = (time.perf_counter() - t0) * 1000
+while 'scientific' not in calc._panels:
+    master.update()
+complete = (time.perf_counter() - t0) * 1000
+master.destroy()
+print(first_frame, complete)
+'''
+
+
+def _run(snippet, directory=None):
+    args, env = [], None
+    if directory is not None:
+        args = [os.path.join(directory, 'settings.json'), os.path.join(directory, 'layout.json')]
+        env = dict(os.environ, HOME=directory)
+    return subprocess.run([sys.executable, '-c', snippet, *args], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+
+
+def _copy_settings(directory):
+    """Kopiert Einstellungen und Layout, damit die Messung nur in ``directory`` schreibt."""
+    from_dir = os.path.join(ROOT, 'app', 'settings')
+    for name in ('settings.json', 'layout.json'):
+        shutil.copy(os.path.join(from_dir, name), directory)
+
+
+def measure(repeat=5):
+    """Führt alle Messungen ``repeat`` mal aus und gibt jeweils den besten Wert zurück."""
+    with tempfile.TemporaryDirectory(prefix='malia-startup-') as directory:
+        _copy_settings(directory)
+        return _measure(repeat, directory)
+
+
+def _measure(repeat, directory):
+    results = {}
+
+    imports = [_run(_IMPORT_SNIPPET).stdout.split() for _ in range(repeat)]
+    results['import_calc_ms'] = min(float(ms) for ms, _ in imports)
+    results['import_calc_pulls_tkinter'] = any(flag == 'True' for _, flag in imports)
+
+    loads = [tuple(map(float, _run(_SETTINGS_SNIPPET, directory).stdout.split())) for _ in range(repeat)]
+    results['settings_json_ms'] = min(json_ms for json_ms, _ in loads)
+    results['settings_snapshot_ms'] = min(snapshot_ms for _, snapshot_ms in loads)
+
+    runs = [_run(_GUI_SNIPPET, directory) for _ in range(repeat)]
+    if all(r.returncode == 0 for r in runs):
+        times = [tuple(map(float, r.stdout.split())) for r in runs]
+        results['first_frame_ms'] = min(t[0] for t in times)
+        results['scientific_panel_ms'] = min(t[1] for t in times)
+        results['first_frame_target_ms'] = FIRST_FRAME_TARGET_MS
+        results['first_frame_within_target'] = results['first_frame_ms'] <= FIRST_FRAME_TARGET_MS
+    else:
+        results['gui_skipped'] = runs[0].stderr.strip().splitlines()[-1]
+
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(), indent=4))
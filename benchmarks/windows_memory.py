@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+"""Vergleicht den Speicherbedarf von N Taschenrechnern.
+
+    python benchmarks/windows_memory.py [--count 4]
+
+``processes`` startet N Prozesse mit je einem Fenster, ``windows`` einen Prozess mit
+N Fenstern, die sich einen Rechenkern teilen (siehe ``app.engine``). Gemessen wird
+die Summe über alle beteiligten Prozesse einschließlich der Arbeitsprozesse für die
+Auswertung: RSS sowie PSS, bei dem gemeinsam genutzte Seiten anteilig zählen.
+Die Werte stammen aus ``/proc`` (Linux). Ohne Display wird die Messung übersprungen.
+
+Einstellungen und Layout werden in ein temporäres Verzeichnis kopiert, das auch als
+``HOME`` dient; der Verlauf ist abgeschaltet, damit ``~/.malia-calculator`` unberührt
+bleibt und kein Verlauf die Messung verfälscht.
+"""
+
+# Builtins
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNIPPET = '''
+import sys
+import tkinter as tk
+from app import settings
+from app.Calculator import Calculator
+
+class IsolatedCalculator(Calculator):
+    @staticmethod
+    def _load_settings():
+        snapshot = settings.load(*sys.argv[2:4])
+        snapshot.settings['history'] = dict(snapshot.settings['history'], enabled=False)
+        return snapshot
+
+master = tk.Tk()
+calculator = IsolatedCalculator(master)
+for _ in range(int(sys.argv[1]) - 1):
+    calculator._new_window()
+while any('scientific' not in window._panels for window in calculator.engine.windows):
+    master.update()
+master.update()
+print('ready', flush=True)
+sys.stdin.readline()
+calculator.engine.close()
+'''
+
+# Zeit, bis sich der Speicherbedarf nach dem Start gesetzt hat (z.B. Arbeitsprozess importiert).
+SETTLE_SECONDS = 1.0
+
+
+def _children():
+    """Ordnet jeder Prozessnummer die Nummern ihrer Kindprozesse zu."""
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', mode='r') as f:
+                # Der Programmname in Klammern kann Leerzeichen enthalten.
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _memory_kb(pid):
+    """Gibt (RSS, PSS) des Prozesses in KiB zurück."""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', mode='r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def _tree(pids):
+    """Alle Prozesse in ``pids`` und ihre Nachkommen."""
+    children = _children()
+    found = []
+    stack = list(pids)
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, ()))
+    return found
+
+
+def _copy_settings(directory):
+    """Kopiert Einstellungen und Layout, damit die Messung nur in ``directory`` schreibt."""
+    from_dir = os.path.join(ROOT, 'app', 'settings')
+    for name in ('settings.json', 'layout.json'):
+        shutil.copy(os.path.join(from_dir, name), directory)
+
+
+def _launch(windows, directory):
+    paths = [os.path.join(directory, 'settings.json'), os.path.join(directory, 'layout.json')]
+    return subprocess.Popen([sys.executable, '-c', _SNIPPET, str(windows), *paths], cwd=ROOT,
+                            env=dict(os.environ, HOME=directory), text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _measure(processes, windows, directory):
+    """Startet ``processes`` Prozesse mit je ``windows`` Fenstern und misst deren Speicher."""
+    running = [_launch(windows, directory) for _ in range(processes)]
+    try:
+        for process in running:
+            if process.stdout.readline().strip() != 'ready':
+                process.wait()
+                lines = process.stderr.read().strip().splitlines() or ['abgebrochen']
+                raise RuntimeError(lines[-1])
+        time.sleep(SETTLE_SECONDS)
+
+        pids = _tree(process.pid for process in running)
+        memory = [_memory_kb(pid) for pid in pids]
+        return {
+            'processes': len(pids),
+            'rss_kb': sum(rss for rss, _ in memory),
+            'pss_kb': sum(pss for _, pss in memory),
+        }
+    finally:
+        for process in running:
+            if process.poll() is None:
+                process.communicate('\n', timeout=10)
+
+
+def measure(count=4):
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        return {'skipped': '/proc/<pid>/smaps_rollup nicht verfügbar'}
+
+    with tempfile.TemporaryDirectory(prefix='malia-memory-') as directory:
+        _copy_settings(directory)
+        try:
+            separate = _measure(count, 1, directory)
+            shared = _measure(1, count, directory)
+        except RuntimeError as exc:
+            return {'gui_skipped': str(exc)}
+
+    return {
+        'count': count,
+        'processes': separate,
+        'windows': shared,
+        'saved_rss_kb': separate['rss_kb'] - shared['rss_kb'],
+        'saved_pss_kb': separate['pss_kb'] - shared['pss_kb'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=4, help='Anzahl der Taschenrechner (Standard: 4)')
+    print(json.dumps(measure(parser.parse_args().count), indent=4))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import pytest
+
+# Local
+from app.calc import Calc
+
+
+@pytest.mark.parametrize('expr, expected', [
+    ('1+2*3', '7'),
+    ('10**15-1', '999999999999999'),
+    ('10**15', '1.00000E+15'),
+    ('-10**14', '-1.00000E+14'),
+    ('10**400', '1.00000E+400'),
+    ('-10**400', '-1.00000E+400'),
+    ('factorial(1000)', '4.02387E+2567'),
+    ('2**0.5', '1.41421E+00'),
+])
+def test_format_result(expr, expected):
+    assert Calc().calculation(expr) == expected
+
+
+def test_errors_set_last_error():
+    calc = Calc()
+    assert calc.calculation('1/0') == 'Error'
+    assert calc.last_error
+    assert calc.calculation('x+1') == 'Error'
+    assert 'x' in calc.last_error
+
+
+@pytest.mark.parametrize('mode, expected', [
+    ('float', '3.33333E-01'),
+    ('decimal', '0.3333333333333333333333333333'),
+    ('fraction', '1/3'),
+])
+def test_backends(mode, expected):
+    assert Calc(mode=mode).calculation('1/3') == expected
+
+
+def test_results_are_cached():
+    calc = Calc()
+    calc.calculation('2 +  2')
+    calc.calculation(' 2 + 2 ')
+    assert calc.cache_stats()['result']['hits'] == 1
+
+
+def test_auto_keeps_the_requested_precision():
+    calc = Calc(mode='auto', precision=40)
+    assert calc.calculation('sqrt(2)') == '1.414213562373095048801688724209698078570'
+    assert calc.calculation('pi') == '3.141592653589793238462643383279502884197'
+    # atan gibt es in decimal nur über float, das ergäbe nur ~16 richtige Stellen.
+    assert calc.calculation('atan(1)*4') == 'Error'
+    assert 'float' in calc.last_error
+    assert Calc(mode='auto', precision=10).calculation('sin(1)') == '8.41471E-01'
+
+
+def test_auto_and_decimal_do_not_share_cached_results():
+    calc = Calc(precision=40)
+    assert calc.calculation('sin(1)', mode='decimal') == '0.8414709848078965'
+    assert calc.calculation('sin(1)', mode='auto') == 'Error'
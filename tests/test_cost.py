@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import math
+
+# Local
+from app.calc import Calc
+from app.compiler import parse
+from app.cost import CostLimits, analyze, to_float
+
+
+def test_large_power_is_approximated():
+    calc = Calc()
+    assert calc.calculation('10**10**5') == 'Error'
+    assert 'Stellen' in calc.last_error
+    calc = Calc(limits=CostLimits(max_digits=100))
+    assert calc.calculation('2**400') == '2.58225E+120'
+    assert calc.explain('2**400')['notes']
+
+
+def test_large_power_is_rejected():
+    calc = Calc(limits=CostLimits(on_exceed='reject'))
+    assert calc.calculation('2**20000') == 'Error'
+    assert 'Grenze' in calc.last_error
+
+
+def test_operation_limit():
+    calc = Calc(limits=CostLimits(max_operations=10))
+    assert calc.calculation('+'.join(['1'] * 20)) == 'Error'
+
+
+def test_unknown_names_are_not_unbounded():
+    estimate = analyze(parse('factorial(n)'), CostLimits())
+    assert not estimate.exceeded
+
+
+def test_known_values_are_checked():
+    estimate = analyze(parse('n**n**n'), CostLimits(), values={'n': 9})
+    assert estimate.exceeded
+    assert not analyze(parse('n**n'), CostLimits(), values={'n': 9}).exceeded
+
+
+def test_factorial_of_variable_stays_exact():
+    session = Calc().session()
+    session.execute('n = 5')
+    assert session.execute('f = factorial(n)') == '120'
+    assert Calc().explain('factorial(x)')['notes'] == []
+
+
+def test_factorial_domain_error_is_kept():
+    session = Calc().session()
+    session.execute('n = 5')
+    assert session.execute('g = factorial(n+0.5)') == 'Error'
+    assert math.isnan(Calc().evaluate_batch('factorial(x)', x=[4.5])[0])
+    # Auch wenn ein anderer Teil näherungsweise berechnet wird.
+    assert Calc(limits=CostLimits(max_digits=100)).calculation('factorial(2.5) + 2**1000') == 'Error'
+
+
+def test_factorial_is_approximated_with_gamma():
+    calc = Calc(limits=CostLimits(max_digits=100))
+    assert calc.calculation('factorial(100)') == '9.33262E+157'
+    assert to_float(parse('factorial(100)'))[1] == 'gamma'
+    assert to_float(parse('factorial(x)'))[1] == 'factorial'
+    assert to_float(parse('factorial(-3)'))[1] == 'factorial'
+
+
+def test_large_factorial_in_columns_is_nan():
+    values = Calc().evaluate_batch('factorial(x)', x=[4, 171, 1e6])
+    assert values[0] == 24
+    assert math.isnan(values[1]) and math.isnan(values[2])
+
+
+def test_exact_pow_is_estimated_like_power():
+    calc = Calc()
+    assert calc.analyze('pow(9, 9**9)', mode='fraction').exceeded
+    assert calc.analyze('pow(factorial(20), factorial(20))', mode='decimal').exceeded
+    assert calc.calculation('pow(9, 9**8)', mode='fraction') == 'Error'
+    assert 'Stellen' in calc.last_error
+    assert calc.calculation('pow(2, 10)', mode='fraction') == '1024'
+    # math.pow rechnet mit float und läuft sofort über.
+    assert not calc.analyze('pow(9, 9**9)', mode='float').exceeded
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import pytest
+
+# Local
+from app import engine as engine_module
+from app.engine import Engine
+from app.settings import load
+
+
+class _DeferredThread:
+    """Ersatz für threading.Thread, der erst auf Anforderung ausgeführt wird."""
+
+    started = []
+
+    def __init__(self, target, args=(), name=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.started.append(self)
+
+    def run(self):
+        self.target(*self.args)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    snapshot = load()
+    snapshot.settings['evaluation']['async'] = False
+    snapshot.settings['history']['enabled'] = False
+    written = []
+    monkeypatch.setattr(engine_module, 'save_settings', written.append)
+    monkeypatch.setattr(engine_module.threading, 'Thread', _DeferredThread)
+    _DeferredThread.started = []
+    engine = Engine(snapshot)
+    engine.written = written
+    yield engine
+    engine.close()
+
+
+@pytest.mark.parametrize('order', [[0, 1], [1, 0]])
+def test_only_latest_settings_are_saved(engine, order):
+    engine.settings['current_theme'] = 'A'
+    engine.save_settings()
+    engine.settings['current_theme'] = 'B'
+    engine.save_settings()
+
+    threads = _DeferredThread.started
+    for index in order:
+        threads[index].run()
+    assert [settings['current_theme'] for settings in engine.written] == ['B']
+
+
+def test_saved_settings_are_a_copy(engine):
+    engine.settings['current_theme'] = 'A'
+    engine.save_settings()
+    engine.settings['current_theme'] = 'B'
+    _DeferredThread.started[0].run()
+    assert engine.written[0]['current_theme'] == 'A'
+
+
+def test_windows_share_one_calc(engine):
+    assert engine.calc.calculation('6*7') == '42'
+    assert engine.worker is None and engine.history is None
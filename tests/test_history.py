@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import os
+import random
+
+import pytest
+
+# Local
+from app import history as history_module
+from app.history import MAGIC, Entry, History
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'history.bin')
+
+
+def _fill(history, exprs):
+    for expr in exprs:
+        history.append(expr, 'r' + expr)
+
+
+def test_append_and_read(path):
+    with History(path) as history:
+        _fill(history, ['1+1', '2*3', 'sin(0)'])
+        history.append('sin(0)', 'rsin(0)')  # direkte Wiederholung
+        assert len(history) == 3
+        assert history[0] == Entry('float', '1+1', 'r1+1')
+        assert history[-1].expr == 'sin(0)'
+        assert [entry.expr for entry in history.recent(2)] == ['sin(0)', '2*3']
+
+    with History(path) as history:
+        assert len(history) == 3
+        assert history[1].result == 'r2*3'
+
+
+def test_prefix_search_newest_first(path):
+    with History(path) as history:
+        _fill(history, ['12+1', '3*4', '12*2', 'sin(1)', '12+1', '1'])
+        assert history.search('12') == 4
+        assert history.search('12', before=4) == 2
+        assert history.search('12', before=2) == 0
+        assert history.search('12', before=0) is None
+        assert history.search('1') == 5
+        assert history.search('4') is None
+        assert history.search('') == 5
+
+
+def test_prefix_index_follows_appends(path):
+    with History(path) as history:
+        _fill(history, ['ab', 'b'])
+        assert history.search('a') == 0
+        _fill(history, ['a2', 'c'])
+        assert history.search('a') == 2
+        assert history.search('c') == 3
+
+
+@pytest.mark.parametrize('scan_steps', [1024, 3])
+def test_prefix_search_matches_linear_search(path, monkeypatch, scan_steps):
+    # Mit wenigen Schritten wird auch der Weg über viele Treffer geprüft.
+    monkeypatch.setattr(history_module, '_SCAN_STEPS', scan_steps)
+    rng = random.Random(7)
+    exprs = [rng.choice(['1', '12', '2', 'sin(', 'ä']) + str(rng.randint(0, 30)) for _ in range(300)]
+    with History(path) as history:
+        _fill(history, exprs[:200])
+        history.build_index()
+        _fill(history, exprs[200:])
+        stored = [history[i].expr for i in range(len(history))]
+        for text in ['1', '12', '2', 'sin(1', 'ä', 'x', '120']:
+            for before in [None, 0, 5, 150, 250, len(stored)]:
+                limit = len(stored) if before is None else before
+                expected = max((i for i in range(limit) if stored[i].startswith(text)), default=None)
+                assert history.search(text, before=before) == expected, (text, before)
+
+
+def test_prefix_search_while_index_is_built(path):
+    with History(path) as history:
+        _fill(history, ['12', '3', '1'])
+    with History(path) as history:
+        history.build_index(background=True)
+        assert history.search('1') == 2
+        assert history.search('1', before=2) == 0
+
+
+def test_substring_search(path):
+    with History(path) as history:
+        _fill(history, ['sin(x)', 'cos(x)', '1+sin(2)'])
+        assert history.search('sin', prefix=False) == 2
+        assert history.search('sin', before=2, prefix=False) == 0
+        # Treffer im Ergebnis zählen nicht.
+        assert history.search('rcos', prefix=False) is None
+        assert [entry.expr for entry in history.find('(x)')] == ['cos(x)', 'sin(x)']
+
+
+def test_recovers_partial_record(path):
+    with History(path) as history:
+        _fill(history, ['1', '2'])
+    with open(path, 'ab') as f:
+        f.write(b'\x05\x00')  # abgebrochener Eintrag
+
+    with History(path) as history:
+        assert len(history) == 2
+        _fill(history, ['3'])
+        assert history[-1].expr == '3'
+
+
+def test_recovers_missing_index(path):
+    with History(path) as history:
+        _fill(history, ['1', '2', '3'])
+    with open(path + '.idx', 'r+b') as f:
+        f.truncate(8 + 3)  # ein Eintrag fehlt, ein halber Eintrag übrig
+
+    with History(path) as history:
+        assert [entry.expr for entry in history.recent(5)] == ['3', '2', '1']
+        assert os.path.getsize(path + '.idx') == 3 * 8
+
+
+def test_rejects_foreign_file(path):
+    with open(path, 'wb') as f:
+        f.write(b'X' * len(MAGIC))
+    with pytest.raises(ValueError):
+        History(path)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import math
+from decimal import Decimal
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+# Local
+from app.compiler import FETCH, SHARED, SLOT, STORE, compile_tree, parse
+from app.numeric import DECIMAL, FLOAT, FRACTION
+from app.optimizer import optimize, simplify, to_source
+
+EXPRESSIONS = [
+    'x+0', '0+x', 'x-0', '-(0+x)', 'log1p(x+0)', 'x*1', '1*x', 'x**1', '--x', 'x-(-y)', 'x+(-y)',
+    '(-x)*(-y)', 'x*0', 'x-x', 'sin(x)**2+sin(x)', '(x+y)*(x+y)-(x+y)', 'x/y+x/y', 'atan2(x, y)*atan2(x, y)',
+]
+
+VALUES = {
+    FLOAT: [0.0, -0.0, 0, 1.5, -2.0, math.inf, -math.inf, math.nan, 1e308],
+    FRACTION: [Fraction(0), Fraction(3, 2), Fraction(-2), -0.0, math.inf],
+    DECIMAL: [Decimal('0'), Decimal('-0'), Decimal('2.5'), Decimal('-Infinity'), Decimal('NaN')],
+}
+
+
+def _run(program, env):
+    try:
+        return program.run(env)
+    except (ValueError, ArithmeticError, TypeError) as exc:
+        return type(exc)
+
+
+def _same(a, b):
+    """Gleich einschließlich nan und dem Vorzeichen von 0."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float):
+        return (math.isnan(a) and math.isnan(b)) or (a == b and math.copysign(1, a) == math.copysign(1, b))
+    if isinstance(a, Decimal):
+        return str(a) == str(b)
+    return a == b
+
+
+@pytest.mark.parametrize('backend', [FLOAT, FRACTION, DECIMAL], ids=lambda backend: backend.name)
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_optimized_matches_unoptimized(expr, backend):
+    with backend.context(None):
+        tree = parse(expr, backend)
+        plain = compile_tree(tree, backend)
+        optimized = compile_tree(optimize(tree, backend), backend)
+        for x, y in product(VALUES[backend], repeat=2):
+            env = {'x': x, 'y': y}
+            assert _same(_run(plain, env), _run(optimized, env)), (x, y)
+
+
+def test_simplify_folds_constants_and_applies_identities():
+    assert simplify(parse('2*3+x')) == parse('6+x')
+    assert simplify(parse('x*1')) == parse('x')
+    assert simplify(parse('--x')) == parse('x')
+
+
+@pytest.mark.parametrize('expr', ['x*0', 'x-x', 'x+0', '0+x', 'x-(-y)', 'x+(-y)', '(-x)*(-y)'])
+def test_simplify_skips_inexact_rules(expr):
+    # Nicht gleichwertig für inf, nan bzw. -0.0 (auch zusammen mit exakten Nullen).
+    assert simplify(parse(expr)) == parse(expr)
+
+
+def test_simplify_keeps_double_negation_for_decimal():
+    with DECIMAL.context(None):
+        assert simplify(parse('--x', DECIMAL), DECIMAL) == parse('--x', DECIMAL)
+
+
+def test_common_subexpression_is_computed_once():
+    tree = optimize(parse('sin(x)**2+sin(x)'))
+    assert tree == ('bin', '+', ('bin', '**', (SHARED, 0, parse('sin(x)')), ('num', 2)), (SLOT, 0))
+    assert to_source(tree) == 't0 = sin(x)\nt0**2+t0'
+
+    program = compile_tree(tree)
+    ops = [op for op, _ in program.code]
+    assert (ops.count(STORE), ops.count(FETCH), program.slots) == (1, 1, 1)
+    assert program.run({'x': 0.5}) == math.sin(0.5) ** 2 + math.sin(0.5)
+
+
+def test_nested_common_subexpressions():
+    # sin(x+y) enthält x+y, beide werden nur einmal berechnet.
+    tree = optimize(parse('(x+y)*(x+y) + sin(x+y)*sin(x+y)'))
+    assert to_source(tree) == 't0 = x+y\nt1 = sin(t0)\nt0*t0+t1*t1'
+    program = compile_tree(tree)
+    assert program.slots == 2
+    assert program.run({'x': 1.0, 'y': 2.0}) == 9 + math.sin(3) ** 2
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import math
+
+import pytest
+
+# Local
+from app.plotting import Sampler, sample
+
+
+def test_refines_where_the_function_bends():
+    xs, ys, complete = sample('x**3', -1, 1, points=8)
+    assert complete
+    assert xs == sorted(xs)
+    assert ys == pytest.approx([x ** 3 for x in xs])
+
+
+def test_undefined_points_are_nan():
+    # Wurzeltaste: **(1/2) ist für negative Zahlen nicht reell.
+    xs, ys, _ = sample('x**(1/2)', -10, 10)
+    assert all(math.isnan(y) for x, y in zip(xs, ys) if x < 0)
+    assert all(y == pytest.approx(math.sqrt(x)) for x, y in zip(xs, ys) if x >= 0)
+
+
+def test_panning_reuses_points():
+    sampler = Sampler('sin(x)')
+    sampler.sample(0, 8)
+    evaluations = sampler.evaluations
+    sampler.sample(1, 9)
+    assert sampler.evaluations - evaluations < evaluations / 2
+
+
+def test_second_variable_is_rejected():
+    with pytest.raises(NameError):
+        Sampler('x*y')
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import asyncio
+import json
+
+import pytest
+
+# Local
+from app.server import CalcServer
+
+
+async def _exchange(server, *requests):
+    """Sendet rohe Anfragen über eine Verbindung und gibt alle Antworten als (status, json) zurück."""
+    listener = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for request in requests:
+            writer.write(request)
+        await writer.drain()
+
+        responses = []
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+            except asyncio.IncompleteReadError:
+                break
+            lines = head.decode('latin-1').split('\r\n')
+            headers = dict(line.lower().split(': ', 1) for line in lines[1:] if line)
+            body = await reader.readexactly(int(headers['content-length']))
+            responses.append((int(lines[0].split()[1]), json.loads(body)))
+            if headers['connection'] == 'close' or len(responses) == len(requests):
+                break
+        writer.close()
+    return responses
+
+
+def _post(payload, connection='keep-alive'):
+    body = json.dumps(payload).encode()
+    return (b'POST /eval HTTP/1.1\r\nContent-Type: application/json\r\n'
+            b'Connection: %s\r\nContent-Length: %d\r\n\r\n%s' % (connection.encode(), len(body), body))
+
+
+def _exchange_sync(*requests, **options):
+    return asyncio.run(_exchange(CalcServer(**options), *requests))
+
+
+def test_eval_and_keep_alive():
+    responses = _exchange_sync(_post({'expr': '1+2'}), _post({'exprs': ['2*3', '1/0']}),
+                               b'GET /health HTTP/1.1\r\n\r\n')
+    assert responses == [(200, {'result': '3'}), (200, {'results': ['6', 'Error']}),
+                         (200, {'status': 'ok'})]
+
+
+@pytest.mark.parametrize('request_bytes', [
+    b'GARBAGE\r\n\r\n',
+    b'POST /eval HTTP/1.1\r\nContent-Length: abc\r\n\r\n',
+    b'POST /eval HTTP/1.1\r\nContent-Length: -1\r\n\r\n',
+])
+def test_malformed_head_is_bad_request(request_bytes):
+    # Die zweite Anfrage wird nicht mehr beantwortet, die Verbindung ist geschlossen.
+    responses = _exchange_sync(request_bytes, _post({'expr': '1'}))
+    assert len(responses) == 1
+    assert responses[0][0] == 400
+
+
+def test_invalid_json_is_bad_request():
+    body = b'{"expr": '
+    status, payload = _exchange_sync(b'POST /eval HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))[0]
+    assert status == 400
+    assert 'JSON' in payload['error']
+
+
+def test_oversized_body_is_rejected():
+    responses = _exchange_sync(_post({'expr': '1+' * 100 + '1'}), _post({'expr': '1'}), max_body=64)
+    assert responses == [(413, {'error': 'Request Entity Too Large'})]
+
+
+def test_oversized_batch_is_rejected():
+    status, payload = _exchange_sync(_post({'exprs': ['1'] * 5}), max_batch=4)[0]
+    assert status == 413
+
+
+def test_unknown_path_and_method():
+    responses = _exchange_sync(b'GET /nothing HTTP/1.1\r\n\r\n', b'GET /eval HTTP/1.1\r\n\r\n')
+    assert [status for status, _ in responses] == [404, 405]
+
+
+def test_too_many_connections():
+    # Die Antwort kommt sofort nach dem Verbindungsaufbau, noch vor einer Anfrage.
+    status, payload = _exchange_sync(max_connections=0)[0]
+    assert status == 503
+
+
+@pytest.mark.parametrize('payload', [
+    {'expr': '1', 'mode': [1]},
+    {'expr': '1', 'mode': 'complex'},
+    {'expr': '1', 'mode': 'decimal', 'precision': True},
+    {'expr': '1', 'mode': 'decimal', 'precision': 0},
+    {'expr': '1', 'mode': 'decimal', 'precision': 200000},
+])
+def test_invalid_mode_or_precision_is_bad_request(payload):
+    responses = _exchange_sync(_post(payload), _post({'expr': '1+1'}))
+    assert responses[0][0] == 400
+    assert responses[1] == (200, {'result': '2'})
+
+
+def test_precision_within_limit():
+    status, payload = _exchange_sync(_post({'expr': '1/3', 'mode': 'decimal', 'precision': 5}),
+                                     max_precision=5)[0]
+    assert (status, payload) == (200, {'result': '0.33333'})
+
+
+def test_slow_calculation_times_out():
+    slow = _post({'expr': 'exp(pi)', 'mode': 'decimal', 'precision': 3000})
+    responses = _exchange_sync(slow, b'GET /health HTTP/1.1\r\n\r\n', max_precision=3000, timeout=0.05)
+    assert responses[0][0] == 503
+    assert responses[1] == (200, {'status': 'ok'})
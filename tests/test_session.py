@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import pytest
+
+# Local
+from app.calc import Calc
+from app.cost import CostLimits
+from app.session import CycleError
+
+
+@pytest.fixture
+def session():
+    return Calc().session()
+
+
+def test_variables_and_functions(session):
+    assert session.execute('a = 3') == '3'
+    assert session.execute('f(x) = x**2 + 1') == ''
+    assert session.execute('b = f(a) * 2') == '20'
+    assert session.execute('b + a') == '23'
+
+
+def test_only_dependents_are_recomputed(session):
+    session.execute('a = 1')
+    session.execute('b = a + 1')
+    session.execute('c = 5')
+    assert session.define('a', '2') == ['a', 'b']
+    assert session.result('b') == '3'
+
+
+def test_unchanged_value_stops_recomputation(session):
+    session.execute('a = 1')
+    session.execute('b = a * 0 + 7')
+    session.execute('c = b + 1')
+    assert session.define('a', '2') == ['a', 'b']
+
+
+def test_function_change_recompiles_users(session):
+    session.execute('f(x) = x + 1')
+    session.execute('a = f(1)')
+    session.execute('f(x) = x * 10')
+    assert session.result('a') == '10'
+
+
+def test_cycles_are_rejected(session):
+    session.execute('a = 1')
+    session.execute('b = a + 1')
+    with pytest.raises(CycleError):
+        session.define('a', 'b + 1')
+    assert session.result('a') == '1'
+    assert session.execute('f(x) = f(x)') == 'Error'
+
+
+def test_missing_variable_is_an_error_until_defined(session):
+    assert session.execute('b = a + 1') == 'Error'
+    session.execute('a = 1')
+    assert session.result('b') == '2'
+
+
+def test_cost_limits_use_actual_values(session):
+    # Beim Übersetzen ist a noch unbekannt, exakt gerechnet hätte b ~10**369693100 Stellen.
+    session.execute('a = 9')
+    assert session.execute('b = a**a**a**a') == 'Error'
+    assert 'Stellen' in session.last_error
+    assert session.execute('c = a**a') == '387420489'
+
+
+def test_cost_limits_are_checked_on_recomputation(session):
+    session.execute('a = 2')
+    session.execute('b = a**a**a')
+    assert session.result('b') == '16'
+    session.define('a', '9')
+    assert session.result('b') == 'Error'
+
+
+def test_too_expensive_cell_is_approximated():
+    session = Calc(limits=CostLimits(max_digits=50)).session()
+    session.execute('a = 9')
+    assert session.execute('a**60') == '1.79701E+57'
+
+
+def test_too_expensive_cell_is_rejected():
+    session = Calc(limits=CostLimits(on_exceed='reject')).session()
+    session.execute('a = 9')
+    assert session.execute('b = a**a**a') == 'Error'
+    assert 'Grenze' in session.last_error
+
+
+def test_doubling_functions_hit_the_operation_limit(session):
+    session.execute('f0(x) = x*x')
+    for i in range(1, 40):
+        assert session.execute(f'f{i}(x) = f{i - 1}(x)*f{i - 1}(x)') == ''
+    assert session.execute('a = f3(2)') == '65536'
+    assert session.execute('b = f20(1)') == 'Error'
+    assert 'Grenze' in session.last_error
+
+
+def test_nested_calls_hit_the_operation_limit(session):
+    session.execute('f0(x) = x+1')
+    for i in range(1, 20):
+        session.execute(f'f{i}(x) = f{i - 1}(f{i - 1}(x))')
+    assert session.execute('a = f5(1)') == '33'
+    assert session.execute('b = f19(1)') == 'Error'
+    assert 'Grenze' in session.last_error
+
+
+def test_indirect_recursion_is_rejected(session):
+    session.execute('f(x) = g(x) + 1')
+    assert session.execute('g(x) = f(x)') == 'Error'
+    assert 'Zirkelbezug' in session.last_error
+    assert session.execute('g(x) = x') == ''
+    assert session.execute('f(2)') == '3'
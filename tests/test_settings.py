@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import json
+import os
+import shutil
+import stat
+
+import pytest
+
+# Local
+from app import settings as settings_module
+from app.settings import LAYOUT_PATH, SETTINGS_PATH, FrozenDict, SettingsError, load, save, validate
+
+
+@pytest.fixture
+def paths(tmp_path):
+    """Kopien von settings.json und layout.json, damit die Tests die echten Dateien nicht ändern."""
+    settings_path = tmp_path / 'settings.json'
+    layout_path = tmp_path / 'layout.json'
+    shutil.copy(SETTINGS_PATH, settings_path)
+    shutil.copy(LAYOUT_PATH, layout_path)
+    return str(settings_path), str(layout_path)
+
+
+def test_load_returns_frozen_themes(paths):
+    snapshot = load(*paths)
+    theme = snapshot.themes[snapshot.settings['current_theme']]
+    assert isinstance(theme, FrozenDict)
+    with pytest.raises(TypeError):
+        theme['master_bg'] = '#000'
+    # Die Schaltflächenstile enthalten die globalen Einstellungen.
+    assert snapshot.settings['global'].items() <= theme['BTN_NUMBER'].items()
+
+
+def test_snapshot_is_used_and_refreshed(paths, monkeypatch):
+    settings_path, layout_path = paths
+    first = load(settings_path, layout_path)
+    assert os.path.exists(settings_module._snapshot_path(settings_path))
+
+    # Solange sich die Dateien nicht ändern, wird kein JSON gelesen.
+    monkeypatch.setattr(settings_module.json, 'load', None)
+    assert load(settings_path, layout_path) == first
+    monkeypatch.undo()
+
+    data = json.loads(open(settings_path, encoding='utf-8').read())
+    data['cache']['size'] = 12345
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    assert load(settings_path, layout_path).settings['cache']['size'] == 12345
+
+
+def test_invalid_settings_are_rejected(paths):
+    settings_path, layout_path = paths
+    data = load(settings_path, layout_path).settings
+    data['cache']['size'] = 'groß'
+    with pytest.raises(SettingsError):
+        validate(data)
+    data['cache']['size'] = True
+    with pytest.raises(SettingsError):
+        validate(data)
+
+
+@pytest.mark.parametrize('section, name, value', [
+    ('numeric', 'mode', 'complex'),
+    ('limits', 'on_exceed', 'ignore'),
+])
+def test_unknown_choices_are_not_saved(paths, section, name, value):
+    settings_path, layout_path = paths
+    data = load(settings_path, layout_path).settings
+    data[section][name] = value
+    with pytest.raises(SettingsError, match=name):
+        validate(data)
+    with open(settings_path, mode='rb') as f:
+        before = f.read()
+    with pytest.raises(SettingsError):
+        save(data, settings_path, layout_path)
+    with open(settings_path, mode='rb') as f:
+        assert f.read() == before
+
+
+def test_unknown_theme_is_rejected(paths):
+    data = load(*paths).settings
+    data['current_theme'] = 'Gibt es nicht'
+    with pytest.raises(SettingsError):
+        save(data, *paths)
+
+
+def test_save_keeps_file_mode(paths):
+    settings_path, layout_path = paths
+    os.chmod(settings_path, 0o644)
+    data = load(settings_path, layout_path).settings
+    data['cache']['size'] = 99
+    save(data, settings_path, layout_path)
+
+    assert stat.S_IMODE(os.stat(settings_path).st_mode) == 0o644
+    assert load(settings_path, layout_path).settings['cache']['size'] == 99
+
+
+def test_failed_save_leaves_no_temporary_file(paths, monkeypatch):
+    settings_path, layout_path = paths
+    before = open(settings_path, encoding='utf-8').read()
+    data = load(settings_path, layout_path).settings
+
+    def fail(fd):
+        raise OSError('Datenträger voll')
+
+    monkeypatch.setattr(settings_module.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        save(data, settings_path, layout_path)
+
+    assert sorted(os.listdir(os.path.dirname(settings_path))) == ['__pycache__', 'layout.json', 'settings.json']
+    assert open(settings_path, encoding='utf-8').read() == before
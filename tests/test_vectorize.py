@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# @autor: Sebastian Rohner
+# @github: github.com/Syncriix
+
+# Builtins
+import math
+from importlib.util import find_spec
+
+import pytest
+
+# Local
+from app.calc import Calc
+from app.vectorize import evaluate_columns
+
+# Beide Ausführungswege: array('d') und, falls installiert, NumPy.
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(find_spec('numpy') is None,
+                                                              reason='NumPy ist nicht installiert'))]
+
+
+def _evaluate(expr, use_numpy, **columns):
+    return list(evaluate_columns(Calc().compile(expr), columns, use_numpy=use_numpy))
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_matches_scalar_evaluation(use_numpy):
+    xs = [0.5 * i for i in range(-8, 9)]
+    values = _evaluate('sin(x)*y + x**2', use_numpy, x=xs, y=3)
+    assert values == pytest.approx([math.sin(x) * 3 + x ** 2 for x in xs])
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_invalid_values_are_nan(use_numpy):
+    values = _evaluate('log(x) + 1/x', use_numpy, x=[1, -1, 0])
+    assert values[0] == 1
+    assert math.isnan(values[1]) and math.isnan(values[2])
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_negative_base_is_nan(use_numpy):
+    values = _evaluate('x**0.5', use_numpy, x=[4, -1])
+    assert values[0] == 2
+    assert math.isnan(values[1])
+    assert math.isnan(_evaluate('x**(1/2)', use_numpy, x=-4)[0])
+    assert math.isnan(_evaluate('pow(x, 0.5)', use_numpy, x=[-4])[0])
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_factorial_columns(use_numpy):
+    values = _evaluate('factorial(x)', use_numpy, x=[5, 4.5])
+    assert values[0] == 120
+    assert math.isnan(values[1])
+
+
+def test_missing_column():
+    with pytest.raises(NameError):
+        Calc().evaluate_batch('x + y', x=[1])
+
+
+def test_columns_must_have_same_length():
+    with pytest.raises(ValueError):
+        Calc().evaluate_batch('x + y', x=[1, 2], y=[1])
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+@pytest.mark.parametrize('expr, nan', [
+    ('1/x', [True, False, False]),
+    ('x//0', [True, True, True]),
+    ('x%0', [True, True, True]),
+    ('x**-1', [True, False, False]),
+    ('exp(x*1000)', [False, True, False]),
+    ('log(x)', [True, False, True]),
+    ('log(x, 0)', [True, True, True]),
+    ('atanh(x)', [False, True, True]),
+    ('2**2000+x', [True, True, True]),
+    ('x*10**400', [True, True, True]),
+    ('10**400', [True, True, True]),
+])
+def test_poles_and_overflow_are_nan(use_numpy, expr, nan):
+    # Für x = 0, 1, -1; die Skalarfunktion meldet an diesen Stellen einen Fehler.
+    assert [math.isnan(value) for value in _evaluate(expr, use_numpy, x=[0, 1, -1])] == nan
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_addition_and_multiplication_overflow_to_inf(use_numpy):
+    assert _evaluate('x*1e308*10', use_numpy, x=[1, -1]) == [math.inf, -math.inf]
+    assert _evaluate('x/1e-320', use_numpy, x=1) == [math.inf]
+
+
+@pytest.mark.skipif(find_spec('numpy') is None, reason='NumPy ist nicht installiert')
+def test_numpy_and_array_agree():
+    xs = [-2.5, -1, 0, 1e-320, 0.5, 1, 2.5, 171, 1e300, math.inf, -math.inf]
+    exprs = ['1/x', 'x//0', 'x/0', 'x%0', 'x**-1', 'x**0.5', 'exp(x*1000)', 'cosh(x*1000)', 'log(x)',
+             'log(x, 0)', 'log10(x)', 'sqrt(x)', 'atanh(x)', 'asin(x)', 'gamma(x)', 'lgamma(x)',
+             'factorial(x)', 'degrees(x*1e308)', 'x*10**400', '2**x*1e300', 'x-x', 'floor(x)/0']
+    calc = Calc()
+    for expr in exprs:
+        program = calc.compile(expr)
+        python = evaluate_columns(program, {'x': xs}, use_numpy=False)
+        numpy = evaluate_columns(program, {'x': xs}, use_numpy=True)
+        for x, a, b in zip(xs, python, numpy):
+            assert (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b), (expr, x)